@@ -1,6 +1,15 @@
 from django.contrib import admin
 
-from .models import Agent, BillingProfile, ChatAsset, Conversation, EmailRecord, GmailOAuthCredential, Message
+from .models import (
+    Agent,
+    BillingProfile,
+    ChatAsset,
+    Conversation,
+    DocumentIngestionJob,
+    EmailRecord,
+    GmailOAuthCredential,
+    Message,
+)
 
 
 @admin.register(GmailOAuthCredential)
@@ -43,6 +52,13 @@ class ChatAssetAdmin(admin.ModelAdmin):
     search_fields = ("original_name", "conversation__title")
 
 
+@admin.register(DocumentIngestionJob)
+class DocumentIngestionJobAdmin(admin.ModelAdmin):
+    list_display = ("asset", "user", "status", "chunks_stored", "chunks_total", "attempts", "created_at")
+    list_filter = ("status",)
+    search_fields = ("asset__original_name", "user__email", "error_message")
+
+
 @admin.register(EmailRecord)
 class EmailRecordAdmin(admin.ModelAdmin):
     list_display = ("recipient_email", "user", "status", "gmail_message_id", "sent_at")
@@ -1,12 +1,14 @@
-from django.http import JsonResponse, StreamingHttpResponse
+from django.http import JsonResponse
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
 from accounts.api.billing.services import (
+    get_cached_billing_profile,
     get_or_create_billing_profile,
     maybe_sync_billing_profile,
     profile_has_paid_token_access,
 )
+from accounts.api.sse import EventWriter, sse_response
 
 FREE_MODEL_IDS = {"gpt-oss-120b", "models-router"}
 
@@ -53,14 +55,16 @@ def get_user_billing_profile(user, sync_remote=False):
     if not user or not getattr(user, "is_authenticated", False):
         return None
 
+    # Per-request gates read the cached entitlement; Stripe is kept current
+    # by the billing webhook and the reconcile_billing command instead.
+    if not sync_remote:
+        return get_cached_billing_profile(user)
+
     profile = get_or_create_billing_profile(user)
-    if sync_remote:
-        try:
-            profile = maybe_sync_billing_profile(profile, force=True)
-        except Exception:
-            pass
-    else:
-        profile = maybe_sync_billing_profile(profile, force=False)
+    try:
+        profile = maybe_sync_billing_profile(profile, force=True)
+    except Exception:
+        pass
     return profile
 
 
@@ -100,16 +104,10 @@ def json_token_limit_response(message="Token limit reached. Please wait until su
     )
 
 
-def sse_error_response(message):
-    response = StreamingHttpResponse(
-        [f"data: [ERROR]{message}\n\n", "data: [DONE]\n\n"],
-        content_type="text/event-stream",
-    )
-    response["Cache-Control"] = "no-cache"
-    response["X-Accel-Buffering"] = "no"
-    response["Access-Control-Allow-Origin"] = "*"
-    return response
+def sse_error_response(message, **extra):
+    writer = EventWriter()
+    return sse_response([writer.error(message, **extra), writer.done()])
 
 
 def sse_token_limit_response(message="Token limit reached. Please wait until subscription renewal."):
-    return sse_error_response(message)
+    return sse_error_response(message, token_limit_reached=True)
@@ -0,0 +1,102 @@
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+
+from langchain.agents import AgentExecutor, create_openai_tools_agent
+from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+MAX_MODEL_CLIENTS = 32
+MAX_AGENT_RUNNABLES = 128
+
+
+class LRURegistry:
+    """Thread-safe, process-wide LRU map of objects that are costly to build."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get_or_build(self, key, factory):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        # Build outside the lock so a slow client construction does not block
+        # lookups for other keys. If two threads race, the first insert wins.
+        value = factory()
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+model_clients = LRURegistry(MAX_MODEL_CLIENTS)
+agent_runnables = LRURegistry(MAX_AGENT_RUNNABLES)
+
+
+def prompt_fingerprint(system_prompt: str) -> str:
+    return hashlib.sha256((system_prompt or "").encode("utf-8")).hexdigest()[:16]
+
+
+def get_model_client(model_id: str, factory):
+    """Return the shared chat model client for `model_id`, building it once."""
+    return model_clients.get_or_build(model_id, factory)
+
+
+def get_tools_agent_prompt(system_prompt: str) -> ChatPromptTemplate:
+    return agent_runnables.get_or_build(
+        ("prompt", prompt_fingerprint(system_prompt)),
+        lambda: ChatPromptTemplate.from_messages([
+            ("system", system_prompt),
+            MessagesPlaceholder(variable_name="chat_history"),
+            ("human", "{input}"),
+            MessagesPlaceholder(variable_name="agent_scratchpad"),
+        ]),
+    )
+
+
+def get_agent_executor(model_id: str, model_factory, system_prompt: str, tools, request_tools=(), **executor_options):
+    """
+    Return an AgentExecutor for (model, toolset, prompt) backed by a cached agent.
+
+    `tools` are shared across requests. `request_tools` are per-request tool
+    instances (for example a tool bound to the current user); only their
+    schemas take part in the cache key, so the bound agent graph is reused
+    and just the thin executor wrapper is created with the live instances.
+    """
+    request_tools = list(request_tools)
+    all_tools = [*tools, *request_tools]
+    tool_names = tuple(tool.name for tool in all_tools)
+    options_key = tuple(sorted(executor_options.items()))
+    agent_key = ("agent", model_id, tool_names, prompt_fingerprint(system_prompt))
+
+    def _build_agent():
+        model = get_model_client(model_id, model_factory)
+        return create_openai_tools_agent(model, all_tools, get_tools_agent_prompt(system_prompt))
+
+    if request_tools:
+        agent = agent_runnables.get_or_build(agent_key, _build_agent)
+        return AgentExecutor(agent=agent, tools=all_tools, **executor_options)
+
+    return agent_runnables.get_or_build(
+        ("executor", *agent_key[1:], options_key),
+        lambda: AgentExecutor(
+            agent=agent_runnables.get_or_build(agent_key, _build_agent),
+            tools=all_tools,
+            **executor_options,
+        ),
+    )
@@ -1,14 +1,23 @@
+import hashlib
+import hmac
+import time
 from datetime import datetime, timedelta, timezone as dt_timezone
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
 from django.utils import timezone
+from django_redis import get_redis_connection
 
 from accounts.models import BillingProfile
 
 STRIPE_API_BASE = "https://api.stripe.com/v1"
 ACTIVE_BILLING_STATUSES = {"active", "trialing"}
 BILLING_SYNC_INTERVAL = timedelta(minutes=15)
+STRIPE_WEBHOOK_TOLERANCE = 300  # seconds
+TOKEN_USAGE_DIRTY_KEY = "billing:usage:dirty"
+TOKEN_USAGE_COUNTER_TTL = 60 * 60 * 24 * 45  # outlives a monthly cycle plus flush lag
 
 
 class StripeServiceError(Exception):
@@ -28,6 +37,28 @@ def get_or_create_billing_profile(user):
     return profile
 
 
+def billing_profile_cache_key(user_id):
+    return f"billing:profile:{user_id}"
+
+
+def invalidate_cached_billing_profile(user_id):
+    cache.delete(billing_profile_cache_key(user_id))
+
+
+def get_cached_billing_profile(user):
+    """
+    Entitlement read for hot paths: no Stripe call, at most one DB read per
+    BILLING_PROFILE_CACHE_TTL. Webhooks and reconciliation keep the row fresh
+    and invalidate this entry whenever they change it.
+    """
+    cache_key = billing_profile_cache_key(user.pk)
+    profile = cache.get(cache_key)
+    if profile is None:
+        profile = ensure_token_cycle(get_or_create_billing_profile(user))
+        cache.set(cache_key, profile, timeout=getattr(settings, "BILLING_PROFILE_CACHE_TTL", 60))
+    return profile
+
+
 def get_paid_monthly_token_quota():
     return max(int(getattr(settings, "PAID_MONTHLY_TOKEN_QUOTA", 0) or 0), 0)
 
@@ -103,19 +134,21 @@ def ensure_token_cycle(profile):
 
     if fields_to_update:
         profile.save(update_fields=fields_to_update)
+        invalidate_cached_billing_profile(profile.user_id)
 
     return profile
 
 
 def billing_snapshot(profile):
     ensure_token_cycle(profile)
+    usage = get_token_usage(profile)
     token_quota = get_paid_monthly_token_quota() if profile.is_paid else None
     token_remaining = None
     token_limit_reached = False
 
     if token_quota is not None:
-        token_remaining = max(token_quota - profile.token_total_used, 0)
-        token_limit_reached = profile.token_total_used >= token_quota
+        token_remaining = max(token_quota - usage["total"], 0)
+        token_limit_reached = usage["total"] >= token_quota
 
     return {
         "plan": profile.plan_name,
@@ -128,9 +161,9 @@ def billing_snapshot(profile):
         "stripeSubscriptionId": profile.stripe_subscription_id or None,
         "lastVerifiedAt": profile.last_verified_at.isoformat() if profile.last_verified_at else None,
         "tokenUsage": {
-            "input": profile.token_input_used,
-            "output": profile.token_output_used,
-            "total": profile.token_total_used,
+            "input": usage["input"],
+            "output": usage["output"],
+            "total": usage["total"],
         },
         "tokenQuota": token_quota,
         "tokenRemaining": token_remaining,
@@ -194,6 +227,7 @@ def _apply_subscription_to_profile(profile, subscription, selected_plan=None):
         "plan_name",
         "updated_at",
     ])
+    invalidate_cached_billing_profile(profile.user_id)
     return ensure_token_cycle(profile)
 
 
@@ -246,7 +280,40 @@ def profile_has_paid_token_access(profile):
     if token_quota <= 0:
         return False
 
-    return profile.token_total_used < token_quota
+    return get_token_usage(profile)["total"] < token_quota
+
+
+def token_quota_reached(profile):
+    return get_token_usage(profile)["total"] >= get_paid_monthly_token_quota()
+
+
+def token_usage_counter_key(user_id, reset_at):
+    # One counter per user and billing cycle, so a renewal starts a fresh
+    # key instead of racing in-flight increments against a reset.
+    cycle = int(reset_at.timestamp()) if reset_at else "none"
+    return f"billing:usage:{user_id}:{cycle}"
+
+
+def get_token_usage(profile):
+    """Current-cycle usage, read from the live counter with the DB row as fallback."""
+    usage = {
+        "input": profile.token_input_used,
+        "output": profile.token_output_used,
+        "total": profile.token_total_used,
+    }
+    try:
+        counters = get_redis_connection("default").hgetall(
+            token_usage_counter_key(profile.user_id, profile.token_usage_reset_at)
+        )
+    except Exception as exc:
+        print(f"[WARN] Token usage counter read failed: {exc}")
+        return usage
+
+    for field in usage:
+        value = counters.get(field.encode("utf-8"))
+        if value is not None:
+            usage[field] = int(value)
+    return usage
 
 
 def record_token_usage(profile, input_tokens=0, output_tokens=0, total_tokens=None):
@@ -265,20 +332,64 @@ def record_token_usage(profile, input_tokens=0, output_tokens=0, total_tokens=No
     if safe_total_tokens <= 0:
         return profile
 
-    profile.token_input_used += safe_input_tokens
-    profile.token_output_used += safe_output_tokens
-    profile.token_total_used += safe_total_tokens
-    profile.token_usage_last_recorded_at = timezone.now()
-    profile.save(update_fields=[
-        "token_input_used",
-        "token_output_used",
-        "token_total_used",
-        "token_usage_last_recorded_at",
-        "updated_at",
-    ])
+    # Atomic per-cycle counters; flush_token_usage copies them into the row.
+    # HSETNX seeds a new counter from the row so usage recorded before the
+    # counter existed is kept.
+    counter_key = token_usage_counter_key(profile.user_id, profile.token_usage_reset_at)
+    pipe = get_redis_connection("default").pipeline(transaction=True)
+    pipe.hsetnx(counter_key, "input", profile.token_input_used)
+    pipe.hsetnx(counter_key, "output", profile.token_output_used)
+    pipe.hsetnx(counter_key, "total", profile.token_total_used)
+    pipe.hincrby(counter_key, "input", safe_input_tokens)
+    pipe.hincrby(counter_key, "output", safe_output_tokens)
+    pipe.hincrby(counter_key, "total", safe_total_tokens)
+    pipe.hset(counter_key, "recorded_at", int(time.time()))
+    pipe.expire(counter_key, TOKEN_USAGE_COUNTER_TTL)
+    pipe.sadd(TOKEN_USAGE_DIRTY_KEY, counter_key)
+    pipe.execute()
     return profile
 
 
+def flush_token_usage_counters(batch_size=500):
+    """
+    Copy dirty usage counters into BillingProfile rows. Counters hold the
+    cycle total, so a flush is an idempotent overwrite and never loses
+    increments that land while it runs. Returns the number of rows written.
+    """
+    connection = get_redis_connection("default")
+    flushed = 0
+    while True:
+        counter_keys = connection.spop(TOKEN_USAGE_DIRTY_KEY, batch_size)
+        if not counter_keys:
+            return flushed
+
+        for raw_key in counter_keys:
+            counter_key = raw_key.decode("utf-8")
+            _, _, user_id, cycle = counter_key.split(":", 3)
+            counters = connection.hgetall(counter_key)
+            if not counters:
+                continue
+
+            rows = BillingProfile.objects.filter(user_id=user_id)
+            if cycle == "none":
+                rows = rows.filter(token_usage_reset_at__isnull=True)
+            else:
+                # A counter from a finished cycle must not overwrite the new one.
+                rows = rows.filter(token_usage_reset_at=datetime.fromtimestamp(int(cycle), tz=dt_timezone.utc))
+
+            recorded_at = counters.get(b"recorded_at")
+            flushed += rows.update(
+                token_input_used=int(counters.get(b"input", 0)),
+                token_output_used=int(counters.get(b"output", 0)),
+                token_total_used=int(counters.get(b"total", 0)),
+                token_usage_last_recorded_at=(
+                    datetime.fromtimestamp(int(recorded_at), tz=dt_timezone.utc) if recorded_at else timezone.now()
+                ),
+                updated_at=timezone.now(),
+            )
+            invalidate_cached_billing_profile(user_id)
+
+
 def sync_subscription_from_stripe(profile):
     if not stripe_is_configured():
         return ensure_token_cycle(profile)
@@ -404,3 +515,112 @@ def verify_checkout_session_and_sync(profile, user, session_id):
     ])
     _apply_subscription_to_profile(profile, subscription, selected_plan=selected_plan)
     return session, profile
+
+
+def verify_stripe_webhook_signature(payload, signature_header, secret=None):
+    """Check a Stripe-Signature header against the raw request body."""
+    secret = secret or getattr(settings, "STRIPE_WEBHOOK_SECRET", "")
+    if not secret:
+        raise StripeServiceError("Stripe webhooks are not configured yet.")
+
+    timestamp = None
+    signatures = []
+    for part in (signature_header or "").split(","):
+        key, _, value = part.strip().partition("=")
+        if key == "t":
+            timestamp = value
+        elif key == "v1":
+            signatures.append(value)
+
+    if not timestamp or not signatures:
+        raise StripeServiceError("Missing Stripe signature.")
+    try:
+        signed_at = int(timestamp)
+    except ValueError:
+        raise StripeServiceError("Invalid Stripe signature timestamp.")
+    if abs(time.time() - signed_at) > STRIPE_WEBHOOK_TOLERANCE:
+        raise StripeServiceError("Stripe signature timestamp is outside the tolerance window.")
+
+    signed_payload = f"{timestamp}.".encode("utf-8") + payload
+    expected = hmac.new(secret.encode("utf-8"), signed_payload, hashlib.sha256).hexdigest()
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise StripeServiceError("Stripe signature does not match.")
+
+
+def find_billing_profile_for_stripe_object(stripe_object):
+    metadata = stripe_object.get("metadata") or {}
+    user_id = metadata.get("user_id") or stripe_object.get("client_reference_id")
+    if user_id:
+        profile = BillingProfile.objects.filter(user_id=user_id).first()
+        if profile:
+            return profile
+
+    customer_id = stripe_object.get("customer")
+    if isinstance(customer_id, dict):
+        customer_id = customer_id.get("id")
+    if customer_id:
+        return BillingProfile.objects.filter(stripe_customer_id=customer_id).first()
+    return None
+
+
+def handle_stripe_webhook_event(event):
+    """
+    Apply a verified Stripe event to the matching BillingProfile.
+
+    Returns the updated profile, or None when the event is not relevant or
+    does not belong to a known user.
+    """
+    event_type = event.get("type") or ""
+    stripe_object = (event.get("data") or {}).get("object") or {}
+
+    if event_type.startswith("customer.subscription."):
+        profile = find_billing_profile_for_stripe_object(stripe_object)
+        if not profile:
+            return None
+        if stripe_object.get("customer") and not profile.stripe_customer_id:
+            profile.stripe_customer_id = stripe_object["customer"]
+            profile.save(update_fields=["stripe_customer_id", "updated_at"])
+        return _apply_subscription_to_profile(profile, stripe_object)
+
+    if event_type == "checkout.session.completed":
+        if stripe_object.get("mode") != "subscription":
+            return None
+        profile = find_billing_profile_for_stripe_object(stripe_object)
+        if not profile:
+            return None
+        profile.stripe_checkout_session_id = stripe_object.get("id", profile.stripe_checkout_session_id)
+        profile.stripe_customer_id = stripe_object.get("customer") or profile.stripe_customer_id
+        subscription_id = stripe_object.get("subscription")
+        if isinstance(subscription_id, str) and subscription_id:
+            profile.stripe_subscription_id = subscription_id
+        profile.save(update_fields=[
+            "stripe_checkout_session_id",
+            "stripe_customer_id",
+            "stripe_subscription_id",
+            "updated_at",
+        ])
+        return sync_subscription_from_stripe(profile)
+
+    if event_type in {"invoice.paid", "invoice.payment_failed"}:
+        profile = find_billing_profile_for_stripe_object(stripe_object)
+        if not profile:
+            return None
+        subscription_id = stripe_object.get("subscription")
+        if isinstance(subscription_id, str) and subscription_id:
+            profile.stripe_subscription_id = subscription_id
+        return sync_subscription_from_stripe(profile)
+
+    return None
+
+
+def profiles_due_for_reconciliation(now=None):
+    """Paid (or never verified) profiles that a missed webhook could have left stale."""
+    now = now or timezone.now()
+    stale_before = now - BILLING_SYNC_INTERVAL
+    return BillingProfile.objects.exclude(stripe_customer_id="").filter(
+        Q(last_verified_at__isnull=True)
+        | Q(
+            Q(last_verified_at__lte=stale_before) | Q(current_period_end__lte=now),
+            billing_status__in=ACTIVE_BILLING_STATUSES,
+        )
+    )
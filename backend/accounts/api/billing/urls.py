@@ -6,4 +6,5 @@ urlpatterns = [
     path("create-checkout-session/", views.create_checkout_session, name="create_checkout_session"),
     path("verify-session/", views.verify_checkout_session, name="verify_checkout_session"),
     path("status/", views.billing_status, name="billing_status"),
+    path("webhook/", views.stripe_webhook, name="stripe_webhook"),
 ]
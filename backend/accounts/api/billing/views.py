@@ -1,4 +1,9 @@
+import json
+
 from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from urllib.parse import urlsplit
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -11,10 +16,12 @@ from .services import (
     billing_snapshot,
     ensure_stripe_customer,
     get_or_create_billing_profile,
+    handle_stripe_webhook_event,
     stripe_is_configured,
     stripe_request,
     sync_subscription_from_stripe,
     verify_checkout_session_and_sync,
+    verify_stripe_webhook_signature,
 )
 
 
@@ -156,3 +163,26 @@ def billing_status(request):
         pass
 
     return Response({"billing": billing_snapshot(profile)})
+
+
+@csrf_exempt
+@require_POST
+def stripe_webhook(request):
+    try:
+        verify_stripe_webhook_signature(request.body, request.headers.get("Stripe-Signature"))
+    except StripeServiceError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    try:
+        event = json.loads(request.body.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return JsonResponse({"error": "Invalid JSON payload."}, status=400)
+
+    try:
+        handle_stripe_webhook_event(event)
+    except StripeServiceError as exc:
+        # Let Stripe retry; reconciliation picks it up if retries run out.
+        print(f"[WARN] Stripe webhook {event.get('type')} failed: {exc}")
+        return JsonResponse({"error": str(exc)}, status=502)
+
+    return JsonResponse({"received": True})
@@ -0,0 +1,128 @@
+# backend/accounts/api/chat/embeddings.py
+import hashlib
+import os
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from langchain_cohere import CohereEmbeddings
+from langchain_core.embeddings import Embeddings
+
+from accounts.models import EmbeddingCacheEntry
+
+load_dotenv()
+
+EMBEDDING_MODEL = "embed-english-v3.0"
+EMBED_BATCH_SIZE = 96          # Cohere accepts at most 96 texts per embed call
+EMBED_CONCURRENCY = 4
+CACHE_LOOKUP_SIZE = 500        # hashes per cache SELECT
+
+
+def get_embedding_client():
+    return CohereEmbeddings(
+        model=EMBEDDING_MODEL,
+        cohere_api_key=os.getenv("COHERE_API_KEY"),
+    )
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def pack_vector(vector) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(data) -> list[float]:
+    values = array("f")
+    values.frombytes(bytes(data))
+    return values.tolist()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that batches provider calls and caches document vectors.
+
+    Vectors are stored in EmbeddingCacheEntry keyed by (model, SHA-256 of the
+    text), so a chunk that was embedded once, in any upload, is never sent to
+    the provider again. Within a call, identical texts are embedded once.
+    Misses are split into `batch_size` groups and up to `concurrency` groups
+    are in flight at a time.
+
+    `provider` is any LangChain Embeddings implementation, so the layer can
+    be exercised with a fake provider such as
+    `langchain_community.embeddings.FakeEmbeddings`.
+    """
+
+    def __init__(self, provider=None, *, model=EMBEDDING_MODEL, batch_size=EMBED_BATCH_SIZE, concurrency=EMBED_CONCURRENCY):
+        self.provider = provider or get_embedding_client()
+        self.model = model
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+
+        hashes = [content_hash(text) for text in texts]
+        vectors = self._load_cached(set(hashes))
+
+        missing = {}
+        for text, digest in zip(texts, hashes):
+            if digest not in vectors and digest not in missing:
+                missing[digest] = text
+
+        if missing:
+            fresh = self._embed_missing(list(missing.items()))
+            vectors.update(fresh)
+            self._store(fresh)
+
+        return [vectors[digest] for digest in hashes]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.provider.embed_query(text)
+
+    def _load_cached(self, hashes) -> dict:
+        hashes = list(hashes)
+        cached = {}
+        for start in range(0, len(hashes), CACHE_LOOKUP_SIZE):
+            rows = EmbeddingCacheEntry.objects.filter(
+                model=self.model,
+                content_hash__in=hashes[start:start + CACHE_LOOKUP_SIZE],
+            ).values_list("content_hash", "vector")
+            for digest, data in rows:
+                cached[digest] = unpack_vector(data)
+        return cached
+
+    def _embed_missing(self, items) -> dict:
+        batches = [items[start:start + self.batch_size] for start in range(0, len(items), self.batch_size)]
+
+        def _embed_batch(batch):
+            return self.provider.embed_documents([text for _, text in batch])
+
+        if len(batches) == 1 or self.concurrency <= 1:
+            results = [_embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+                results = list(executor.map(_embed_batch, batches))
+
+        fresh = {}
+        for batch, batch_vectors in zip(batches, results):
+            for (digest, _), vector in zip(batch, batch_vectors):
+                fresh[digest] = list(vector)
+        return fresh
+
+    def _store(self, vectors: dict):
+        EmbeddingCacheEntry.objects.bulk_create(
+            [
+                EmbeddingCacheEntry(
+                    model=self.model,
+                    content_hash=digest,
+                    dimensions=len(vector),
+                    vector=pack_vector(vector),
+                )
+                for digest, vector in vectors.items()
+            ],
+            batch_size=CACHE_LOOKUP_SIZE,
+            ignore_conflicts=True,
+        )
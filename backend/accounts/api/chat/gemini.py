@@ -1,17 +1,19 @@
+from asgiref.sync import sync_to_async
 from langchain.chat_models import init_chat_model
 from langchain_tavily import TavilySearch
-from langchain_community.callbacks.manager import get_openai_callback
 from langchain_core.chat_history import InMemoryChatMessageHistory
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.agents import AgentExecutor, create_openai_tools_agent
-from langchain.tools import Tool
+from langchain.prompts import ChatPromptTemplate
 import os,re
 from dotenv import load_dotenv
 from threading import Lock
 from uuid import uuid4
-from .documents import load_vectorstore
-from accounts.api.billing.services import extract_token_usage, get_or_create_billing_profile, record_token_usage
+from .model_router import ModelRouter, RouteRule, RoutingDecision
+from .retrieval import build_document_search_tool
+from accounts.api.agent_registry import get_agent_executor, get_model_client
+from accounts.api.history import build_chat_history
+from accounts.api.llm_streaming import AgentTextStream
+from accounts.api.response_cache import alookup_response, aresponse_cache_applies, astore_response, build_cache_key
+from accounts.api.billing.services import get_cached_billing_profile, record_token_usage
 
 # -------------------- Load Environment Variables --------------------
 load_dotenv()
@@ -69,80 +71,45 @@ chat_history = InMemoryChatMessageHistory()
 # -------------------- Tavily Search Tool --------------------
 
 search_tool = TavilySearch(max_results=3)
-# -------------------- Document Search Tool --------------------
-def document_search(query: str) -> str:
-    """Search uploaded PDF documents for relevant information."""
-    vectorstore = load_vectorstore()
-    if not vectorstore:
-        return "No documents have been uploaded in this conversation."
-    
-    results = vectorstore.similarity_search_with_score(query, k=3)  # increased to k=3
-    if not results:
-        return "No relevant documents found for your query."
-    
-    relevant = []
-    for doc, score in results:
-        if score > 0.65:  # slightly lower threshold for better recall
-            relevant.append(doc.page_content.strip())
-    
-    if relevant:
-        return "Relevant document content:\n" + "\n\n".join(relevant)
-    
-    return "No sufficiently relevant document content found."
-
-document_search_tool = Tool.from_function(
-    func=document_search,
-    name="document_search",
-    description="Search uploaded PDF documents for relevant information. Use when query relates to document content."
-)
-
 # -------------------- Model Initialization --------------------
 def init_model(model_id: str = "openai/gpt-5-nano"):
-    """Initialize a chat model using OpenRouter."""
-    return init_chat_model(
+    """Return the shared OpenRouter chat model client for `model_id`."""
+    return get_model_client(model_id, lambda: init_chat_model(
         model_id,
         model_provider="openai",
         api_key=os.getenv("OPENROUTER_API_KEY"),
         base_url="https://openrouter.ai/api/v1",
-        streaming=True  # Enable streaming
-    )
+        streaming=True,  # Enable streaming
+        stream_usage=True,  # Usage arrives on the final streamed chunk
+    ))
+
+
+MODEL_ROUTER = ModelRouter(
+    [
+        RouteRule("image", IMAGE_GENERATION_MODEL, IMAGE_MODEL_PATTERNS),
+        RouteRule("code", "gpt5-nano", CODE_MODEL_PATTERNS),
+        RouteRule("writing", "claude-3 haiku", WRITING_MODEL_PATTERNS),
+        RouteRule("support", "deepseek-chat", SUPPORT_MODEL_PATTERNS),
+        RouteRule("reasoning", "gpt5-nano", REASONING_MODEL_PATTERNS),
+    ],
+    known_models=MODEL_MAP,
+    default_model=AUTO_MODEL_DEFAULT,
+    manual_fallback="gpt5-nano",
+    long_input_model="gpt5-nano",
+    passthrough_models=(IMAGE_GENERATION_MODEL,),
+)
 
 
-def resolve_normal_chat_model(user_input: str, requested_model: str) -> str:
+def route_normal_chat_model(user_input: str, requested_model: str) -> RoutingDecision:
     """
     Resolve the backend model for normal chat.
 
     Manual selection remains untouched. The `auto` option only routes between
     the existing text models in this module, while explicit image generation
-    continues to use the separate branch in chat/views.py.
+    continues to use the separate branch in chat/views.py. Callers route once
+    per request and pass the decision's model id down.
     """
-    if requested_model == IMAGE_GENERATION_MODEL:
-        return IMAGE_GENERATION_MODEL
-
-    if requested_model != "auto":
-        return requested_model if requested_model in MODEL_MAP else "gpt5-nano"
-
-    normalized_input = (user_input or "").strip().lower()
-
-    if any(re.search(pattern, normalized_input) for pattern in IMAGE_MODEL_PATTERNS):
-        return IMAGE_GENERATION_MODEL
-
-    if any(re.search(pattern, normalized_input) for pattern in CODE_MODEL_PATTERNS):
-        return "gpt5-nano"
-
-    if any(re.search(pattern, normalized_input) for pattern in WRITING_MODEL_PATTERNS):
-        return "claude-3 haiku"
-
-    if any(re.search(pattern, normalized_input) for pattern in SUPPORT_MODEL_PATTERNS):
-        return "deepseek-chat"
-
-    if any(re.search(pattern, normalized_input) for pattern in REASONING_MODEL_PATTERNS):
-        return "gpt5-nano"
-
-    if len(normalized_input) > 600:
-        return "gpt5-nano"
-
-    return AUTO_MODEL_DEFAULT
+    return MODEL_ROUTER.route(user_input, requested_model)
 
 # -------------------- System Prompt --------------------
 system_message = """
@@ -288,14 +255,6 @@ Follow all formatting, retrieval, and structural guidelines in every response, n
 
 """
 
-# -------------------- Prompt Template --------------------
-prompt = ChatPromptTemplate.from_messages([
-    ("system", system_message),
-    MessagesPlaceholder(variable_name="chat_history"),
-    ("human", "{input}"),
-    MessagesPlaceholder(variable_name="agent_scratchpad")
-])
-
 title_system_prompt = """
 You are a helpful assistant that generates concise, descriptive chat titles based on the user's first message.
 
@@ -320,8 +279,33 @@ title_prompt = ChatPromptTemplate.from_messages([
     ("human", "User message: {user_input}")
 ])
 
-def generate_chat_title(user_input: str) -> str:
+GREETING_TITLE = "General Conversation"
+GREETING_RE = re.compile(
+    r"^(hi+|hello+|hey+|hiya|yo|sup|salam|assalam[ou]* ?(o|u)? ?alaikum|aoa|good (morning|afternoon|evening|night)"
+    r"|how are you|how r u|what'?s up|thanks?|thank you|ok(ay)?|test(ing)?)"
+    r"( there| bot| buddy| friend)?[\s!.?,]*(how are you|how r u)?[\s!.?,]*$",
+    re.IGNORECASE,
+)
+
+
+def fallback_chat_title(user_input: str) -> str:
+    return user_input[:30] + "..." if len(user_input) > 30 else user_input
+
+
+def quick_chat_title(user_input: str):
+    """Title for trivial openers without an LLM call; None when the model should decide."""
+    normalized = " ".join((user_input or "").split())
+    if not normalized or GREETING_RE.match(normalized):
+        return GREETING_TITLE
+    return None
+
+
+async def generate_chat_title(user_input: str) -> str:
     """Generate a chat title from the first user message."""
+    quick_title = quick_chat_title(user_input)
+    if quick_title:
+        return quick_title
+
     try:
         provider_model = MODEL_MAP["gpt-oss-120b"]  
         model = init_model(provider_model)
@@ -329,7 +313,7 @@ def generate_chat_title(user_input: str) -> str:
         # Create a simple chain for title generation
         chain = title_prompt | model
         
-        response = chain.invoke({"user_input": user_input})
+        response = await chain.ainvoke({"user_input": user_input})
         title = response.content.strip()
         
         # Clean up the title - remove any quotes or extra spaces
@@ -346,8 +330,7 @@ def generate_chat_title(user_input: str) -> str:
     except Exception as e:
         print(f"[ERROR] Title generation failed: {str(e)}")
         # Fallback: use first 30 characters of user input
-        fallback_title = user_input[:30] + "..." if len(user_input) > 30 else user_input
-        return fallback_title
+        return fallback_chat_title(user_input)
 
 # -------------------- Chat History (per chat_id) --------------------
 
@@ -355,59 +338,58 @@ chat_histories = {}
 chat_lock = Lock()
 
 
-def build_chat_history(history_messages=None):
-    chat_history = InMemoryChatMessageHistory()
-    for message in history_messages or []:
-        text = getattr(message, "content_text", "") or ""
-        role = getattr(message, "role", "")
-        if not text:
-            continue
-        if role == "user":
-            chat_history.add_message(HumanMessage(content=text))
-        elif role == "assistant":
-            chat_history.add_message(AIMessage(content=text))
-        elif role == "system":
-            chat_history.add_message(SystemMessage(content=text))
-    return chat_history
-
-
 # -------------------- Streaming Bot Response Function --------------------
-def get_bot_response(user_input: str, model_id: str, history_messages=None, user=None, track_tokens=False):
+async def get_bot_response(user_input: str, model_id: str, history_messages=None, user=None, track_tokens=False, conversation_id=None):
     try:
         chat_history = build_chat_history(history_messages)
-        resolved_model_id = resolve_normal_chat_model(user_input, model_id)
-        provider_model = MODEL_MAP.get(resolved_model_id, "openai/gpt-5-nano")
-        model = init_model(provider_model)
+        # `model_id` is already routed by the caller.
+        provider_model = MODEL_MAP.get(model_id, "openai/gpt-5-nano")
+
+        cache_key = None
+        if await aresponse_cache_applies(conversation_id):
+            cache_key = build_cache_key("chat", provider_model, system_message, user_input, history_messages)
+            cached_answer = await alookup_response(cache_key)
+            if cached_answer is not None:
+                # Served without a model call, so there is no usage to bill.
+                yield cached_answer
+                return
         
-        tools = [search_tool, document_search_tool]
+        tools = [search_tool]
+        request_tools = [build_document_search_tool(conversation_id)] if conversation_id else []
         
-        agent = create_openai_tools_agent(model, tools, prompt)
-        agent_executor = AgentExecutor(
-            agent=agent,
-            tools=tools,
+        agent_executor = get_agent_executor(
+            provider_model,
+            lambda: init_model(provider_model),
+            system_message,
+            tools,
+            request_tools=request_tools,
             verbose=True,
-            handle_parsing_errors=True
+            handle_parsing_errors=True,
         )
         
         print("=== EXECUTING CHAT ===")
-        print(f"Requested model: {model_id}")
-        print(f"Resolved model: {resolved_model_id}")
+        print(f"Model: {model_id}")
         
-        # Run the agent (tool calling happens here)
-        with get_openai_callback() as callback:
-            result = agent_executor.invoke({
-                "input": user_input,
-                "chat_history": chat_history.messages,
-                "agent_scratchpad": []
-            })
-        
-        final_answer = result["output"]
-        usage = extract_token_usage(callback)
+        # Forward model deltas as they arrive (tool calling happens in between)
+        stream = AgentTextStream(agent_executor, {
+            "input": user_input,
+            "chat_history": chat_history,
+            "agent_scratchpad": []
+        }, bill_user=user if track_tokens else None, label="chat")
+        answer_parts = []
+        async for chunk in stream:
+            answer_parts.append(chunk)
+            yield chunk
+
+        if cache_key:
+            await astore_response(cache_key, "".join(answer_parts), stream.tools_used)
+
+        usage = stream.usage
 
         if track_tokens and user:
             try:
-                profile = get_or_create_billing_profile(user)
-                record_token_usage(profile, **usage)
+                profile = await sync_to_async(get_cached_billing_profile)(user)
+                await sync_to_async(record_token_usage)(profile, **usage)
                 print(
                     "Token usage recorded for chat: "
                     f"in={usage['input_tokens']} out={usage['output_tokens']} total={usage['total_tokens']}"
@@ -415,14 +397,6 @@ def get_bot_response(user_input: str, model_id: str, history_messages=None, user
             except Exception as usage_error:
                 print(f"[WARN] Token usage recording failed for chat: {usage_error}")
         
-        # stream final answer word-by-word
-        words = final_answer.split(" ")
-        for i, word in enumerate(words):
-            yield word + " "
-            # Small delay to simulate typing — adjust or remove
-            import time
-            time.sleep(0.006)  # ~15ms per word → natural speed
-        
     except Exception as e:
         print(f"[ERROR] Chat: {str(e)}")
         yield f"Error: {str(e)}"
@@ -0,0 +1,379 @@
+# backend/accounts/api/chat/ingestion.py
+import os
+import queue
+import socket
+import threading
+import uuid
+from datetime import timedelta
+
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.document_loaders import PyPDFLoader
+
+from accounts.models import DocumentIngestionJob
+from .documents import build_vectorstore, chunk_scope_metadata, delete_asset_chunks
+from .embeddings import EMBED_BATCH_SIZE, CachedEmbeddings
+
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 150
+PARSE_WORKERS = 2
+EMBED_WORKERS = 4
+STAGE_QUEUE_SIZE = 8           # batches buffered between stages
+MAX_ATTEMPTS = 3
+LEASE_DURATION = timedelta(minutes=2)   # a job is re-claimed once its lease runs out
+LEASE_RENEW_INTERVAL = 30              # seconds between lease renewals by a live worker
+
+ACTIVE_STATUSES = (DocumentIngestionJob.Status.PARSING, DocumentIngestionJob.Status.EMBEDDING)
+
+_STOP = object()
+
+
+# ────────────────────────────────────────────────
+# Job bookkeeping
+# ────────────────────────────────────────────────
+
+def enqueue_ingestion_jobs(user, conversation, assets) -> list[DocumentIngestionJob]:
+    return DocumentIngestionJob.objects.bulk_create([
+        DocumentIngestionJob(asset=asset, conversation=conversation, user=user)
+        for asset in assets
+    ])
+
+
+def get_user_ingestion_jobs(user, job_ids) -> list[DocumentIngestionJob]:
+    return list(
+        DocumentIngestionJob.objects.filter(user=user, id__in=job_ids)
+        .select_related("asset")
+        .order_by("created_at")
+    )
+
+
+def serialize_ingestion_job(job: DocumentIngestionJob) -> dict:
+    return {
+        "id": str(job.id),
+        "assetId": str(job.asset_id),
+        "fileName": job.asset.original_name,
+        "status": job.status,
+        "pagesTotal": job.pages_total,
+        "chunksTotal": job.chunks_total,
+        "chunksStored": job.chunks_stored,
+        "error": job.error_message or None,
+    }
+
+
+def new_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"[-64:]
+
+
+def claim_next_job(worker_id: str):
+    """
+    Lock and return the oldest runnable job, or None.
+
+    A claimed job is leased to `worker_id` for LEASE_DURATION and the worker
+    renews the lease while it runs. An active job whose lease ran out
+    belonged to a worker that died; it is picked up again until
+    MAX_ATTEMPTS is spent.
+    """
+    now = timezone.now()
+    stale = Q(status__in=ACTIVE_STATUSES) & (Q(lease_expires_at__lt=now) | Q(lease_expires_at__isnull=True))
+
+    DocumentIngestionJob.objects.filter(stale, attempts__gte=MAX_ATTEMPTS).update(
+        status=DocumentIngestionJob.Status.FAILED,
+        error_message="Ingestion did not finish after several attempts.",
+        finished_at=now,
+    )
+
+    with transaction.atomic():
+        job = (
+            DocumentIngestionJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=DocumentIngestionJob.Status.QUEUED) | stale)
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = DocumentIngestionJob.Status.PARSING
+        job.attempts += 1
+        job.chunks_stored = 0
+        job.error_message = ""
+        job.started_at = now
+        job.lease_owner = worker_id
+        job.lease_expires_at = now + LEASE_DURATION
+        job.save(update_fields=[
+            "status", "attempts", "chunks_stored", "error_message", "started_at",
+            "lease_owner", "lease_expires_at", "updated_at",
+        ])
+
+    return DocumentIngestionJob.objects.select_related("asset").get(pk=job.pk)
+
+
+def leased_job(job: DocumentIngestionJob, worker_id: str):
+    """The job's row while `worker_id` still holds its lease (empty queryset otherwise)."""
+    return DocumentIngestionJob.objects.filter(pk=job.pk, lease_owner=worker_id, status__in=ACTIVE_STATUSES)
+
+
+def holds_lease(job: DocumentIngestionJob, worker_id: str) -> bool:
+    return leased_job(job, worker_id).exists()
+
+
+def renew_leases(job_ids, worker_id: str) -> set:
+    """Extend the leases `worker_id` holds among `job_ids`; returns the ids still held."""
+    now = timezone.now()
+    held = DocumentIngestionJob.objects.filter(pk__in=job_ids, lease_owner=worker_id, status__in=ACTIVE_STATUSES)
+    held_ids = set(held.values_list("pk", flat=True))
+    if held_ids:
+        held.filter(pk__in=held_ids).update(lease_expires_at=now + LEASE_DURATION, updated_at=now)
+    return held_ids
+
+
+def start_embedding(job: DocumentIngestionJob, worker_id: str) -> bool:
+    """Move a parsed job to its next stage; False when the lease was lost."""
+    now = timezone.now()
+    fields = {
+        "pages_total": job.pages_total,
+        "chunks_total": job.chunks_total,
+        "status": DocumentIngestionJob.Status.EMBEDDING if job.chunks_total else DocumentIngestionJob.Status.COMPLETED,
+        "lease_expires_at": now + LEASE_DURATION,
+        "updated_at": now,
+    }
+    if not job.chunks_total:
+        fields["finished_at"] = now
+    return bool(leased_job(job, worker_id).update(**fields))
+
+
+def mark_job_failed(job: DocumentIngestionJob, error: Exception, worker_id: str):
+    leased_job(job, worker_id).update(
+        status=DocumentIngestionJob.Status.FAILED,
+        error_message=str(error)[:2000],
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+
+
+def record_chunks_stored(job: DocumentIngestionJob, count: int, worker_id: str) -> bool:
+    """Count a stored batch; False when `worker_id` no longer holds the job."""
+    now = timezone.now()
+    active = leased_job(job, worker_id).filter(status=DocumentIngestionJob.Status.EMBEDDING)
+    if not active.update(chunks_stored=F("chunks_stored") + count, lease_expires_at=now + LEASE_DURATION, updated_at=now):
+        return False
+    active.filter(chunks_stored__gte=F("chunks_total")).update(
+        status=DocumentIngestionJob.Status.COMPLETED,
+        finished_at=now,
+        updated_at=now,
+    )
+    return True
+
+
+# ────────────────────────────────────────────────
+# Stages
+# ────────────────────────────────────────────────
+
+def split_asset(job: DocumentIngestionJob):
+    pages = PyPDFLoader(job.asset.file.path).load()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    chunks = splitter.split_documents(pages)
+    scope = chunk_scope_metadata(conversation_id=job.conversation_id, asset_id=job.asset_id, user_id=job.user_id)
+    for chunk in chunks:
+        chunk.metadata.update(scope)
+    return pages, chunks
+
+
+class IngestionPipeline:
+    """
+    Parse, embed and insert as three pipelined stages.
+
+    Parse workers claim jobs and cut each document into embedding-sized
+    batches. Embed workers call the provider for those batches concurrently
+    while a single writer inserts finished batches into the vector store, so
+    a large PDF is being stored while its later pages are still embedding.
+    The queues between stages are bounded, which keeps memory flat and
+    pushes back on parsing when embedding is the bottleneck.
+
+    Every job this pipeline works on is leased to it. A heartbeat thread
+    renews the leases, and writes go through only while the lease is held:
+    a job that another worker took over is dropped here, not finished twice.
+    """
+
+    def __init__(
+        self,
+        *,
+        parse_workers=PARSE_WORKERS,
+        embed_workers=EMBED_WORKERS,
+        queue_size=STAGE_QUEUE_SIZE,
+        batch_size=EMBED_BATCH_SIZE,
+        embeddings=None,
+        vectorstore=None,
+    ):
+        self.parse_workers = parse_workers
+        self.embed_workers = embed_workers
+        self.batch_size = batch_size
+        # Batches are already sized and spread over the embed workers, so the
+        # cache layer only needs to skip chunks it has seen before.
+        self.embeddings = embeddings or CachedEmbeddings(concurrency=1)
+        self.vectorstore = vectorstore or build_vectorstore(self.embeddings)
+        self.embed_queue = queue.Queue(maxsize=queue_size)
+        self.store_queue = queue.Queue(maxsize=queue_size)
+        self.worker_id = new_worker_id()
+        self.leased_jobs = set()
+        self.dropped_jobs = set()
+        self.jobs_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.heartbeat_stop = threading.Event()
+
+    def run(self, *, once=False, poll_interval=2.0):
+        """Process jobs until stopped; with `once`, exit when the queue is empty."""
+        parsers = [
+            threading.Thread(target=self._parse_loop, args=(once, poll_interval), name=f"ingest-parse-{i}", daemon=True)
+            for i in range(self.parse_workers)
+        ]
+        embedders = [
+            threading.Thread(target=self._embed_loop, name=f"ingest-embed-{i}", daemon=True)
+            for i in range(self.embed_workers)
+        ]
+        writer = threading.Thread(target=self._store_loop, name="ingest-store", daemon=True)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="ingest-heartbeat", daemon=True)
+
+        for thread in [*parsers, *embedders, writer, heartbeat]:
+            thread.start()
+
+        try:
+            for thread in parsers:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            self.stop_event.set()
+            for thread in parsers:
+                thread.join()
+
+        # Drain in stage order so every batch already parsed still lands.
+        for _ in embedders:
+            self.embed_queue.put(_STOP)
+        for thread in embedders:
+            thread.join()
+        self.store_queue.put(_STOP)
+        writer.join()
+        self.heartbeat_stop.set()
+        heartbeat.join()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _is_dropped(self, job):
+        with self.jobs_lock:
+            return job.pk in self.dropped_jobs
+
+    def _drop(self, job):
+        with self.jobs_lock:
+            self.dropped_jobs.add(job.pk)
+            self.leased_jobs.discard(job.pk)
+
+    def _fail(self, job, error):
+        self._drop(job)
+        print(f"Ingestion of asset {job.asset_id} failed: {error}")
+        mark_job_failed(job, error, self.worker_id)
+
+    def _lose(self, job):
+        self._drop(job)
+        print(f"Ingestion of asset {job.asset_id} was taken over by another worker; dropping it here")
+
+    def _heartbeat_loop(self):
+        try:
+            while not self.heartbeat_stop.wait(LEASE_RENEW_INTERVAL):
+                with self.jobs_lock:
+                    job_ids = set(self.leased_jobs)
+                if not job_ids:
+                    continue
+                close_old_connections()
+                try:
+                    held = renew_leases(job_ids, self.worker_id)
+                except Exception as exc:
+                    print(f"[WARN] Renewing ingestion leases failed: {exc}")
+                    continue
+                # Finished jobs, and any taken over elsewhere, need no renewal.
+                with self.jobs_lock:
+                    self.leased_jobs -= job_ids - held
+        finally:
+            connections.close_all()
+
+    def _parse_loop(self, once, poll_interval):
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                job = claim_next_job(self.worker_id)
+                if job is None:
+                    if once:
+                        return
+                    self.stop_event.wait(poll_interval)
+                    continue
+                with self.jobs_lock:
+                    self.leased_jobs.add(job.pk)
+                self._parse_job(job)
+        finally:
+            connections.close_all()
+
+    def _parse_job(self, job):
+        try:
+            if job.attempts > 1:
+                # A previous attempt may have stored part of the document.
+                delete_asset_chunks(job.asset_id)
+            pages, chunks = split_asset(job)
+        except Exception as exc:
+            self._fail(job, exc)
+            return
+
+        job.pages_total = len(pages)
+        job.chunks_total = len(chunks)
+        if not start_embedding(job, self.worker_id):
+            self._lose(job)
+            return
+
+        for start in range(0, len(chunks), self.batch_size):
+            if self._is_dropped(job):
+                return
+            self.embed_queue.put((job, chunks[start:start + self.batch_size]))
+
+    def _embed_loop(self):
+        try:
+            while True:
+                item = self.embed_queue.get()
+                if item is _STOP:
+                    return
+                job, batch = item
+                if self._is_dropped(job):
+                    continue
+                close_old_connections()
+                try:
+                    vectors = self.embeddings.embed_documents([chunk.page_content for chunk in batch])
+                except Exception as exc:
+                    self._fail(job, exc)
+                    continue
+                self.store_queue.put((job, batch, vectors))
+        finally:
+            connections.close_all()
+
+    def _store_loop(self):
+        try:
+            while True:
+                item = self.store_queue.get()
+                if item is _STOP:
+                    return
+                job, batch, vectors = item
+                if self._is_dropped(job):
+                    continue
+                close_old_connections()
+                try:
+                    if not holds_lease(job, self.worker_id):
+                        self._lose(job)
+                        continue
+                    self.vectorstore.add_embeddings(
+                        texts=[chunk.page_content for chunk in batch],
+                        embeddings=vectors,
+                        metadatas=[chunk.metadata for chunk in batch],
+                    )
+                    if not record_chunks_stored(job, len(batch), self.worker_id):
+                        self._lose(job)
+                except Exception as exc:
+                    self._fail(job, exc)
+        finally:
+            connections.close_all()
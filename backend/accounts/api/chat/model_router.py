@@ -0,0 +1,162 @@
+# backend/accounts/api/chat/model_router.py
+import copy
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+TOKEN_RE = re.compile(r"[a-z0-9+#.]+")
+
+
+@dataclass(frozen=True)
+class RouteRule:
+    name: str
+    model_id: str
+    patterns: tuple
+
+
+@dataclass(frozen=True)
+class RoutingDecision:
+    model_id: str
+    rule: str                 # rule name, or "manual", "length", "default"
+    source: str               # "manual", "patterns", "length", "classifier" or "default"
+    requested_model: str
+    confidence: Optional[float] = None
+
+
+class TfidfRouteClassifier:
+    """
+    Nearest-centroid TF-IDF classifier over route names.
+
+    Small and dependency-free: fit it on labelled prompts, and the router
+    consults it only for prompts that no rule matched. Predictions below
+    `min_score` are ignored so the router falls back to its default.
+    """
+
+    def __init__(self, min_score: float = 0.3):
+        self.min_score = min_score
+        self.idf = {}
+        self.centroids = {}
+
+    @staticmethod
+    def tokenize(text: str) -> list[str]:
+        return TOKEN_RE.findall((text or "").lower())
+
+    def _vector(self, tokens) -> dict:
+        counts = Counter(token for token in tokens if token in self.idf)
+        vector = {token: count * self.idf[token] for token, count in counts.items()}
+        norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+        return {token: value / norm for token, value in vector.items()}
+
+    def fit(self, samples):
+        """`samples` is an iterable of (prompt, route name)."""
+        samples = [(self.tokenize(prompt), label) for prompt, label in samples]
+        document_frequency = Counter(token for tokens, _ in samples for token in set(tokens))
+        total = len(samples) or 1
+        self.idf = {token: math.log((1 + total) / (1 + count)) + 1.0 for token, count in document_frequency.items()}
+
+        sums = {}
+        for tokens, label in samples:
+            centroid = sums.setdefault(label, Counter())
+            centroid.update(self._vector(tokens))
+        self.centroids = {}
+        for label, centroid in sums.items():
+            norm = math.sqrt(sum(value * value for value in centroid.values())) or 1.0
+            self.centroids[label] = {token: value / norm for token, value in centroid.items()}
+        return self
+
+    def predict(self, text: str):
+        """Return (route name, score) or (None, 0.0)."""
+        vector = self._vector(self.tokenize(text))
+        best_label, best_score = None, 0.0
+        for label, centroid in self.centroids.items():
+            score = sum(value * centroid.get(token, 0.0) for token, value in vector.items())
+            if score > best_score:
+                best_label, best_score = label, score
+        if best_score < self.min_score:
+            return None, best_score
+        return best_label, best_score
+
+
+class ModelRouter:
+    """
+    Resolve the model for a chat request in a single pass over the prompt.
+
+    All rule patterns are compiled once into one alternation of lookaheads,
+    ordered by rule priority. Scanning the prompt with it finds every
+    position where some rule matches, and at each position the highest
+    priority rule wins, so the result is the same as testing the rules one
+    after another, without re-running the regex engine once per pattern.
+    """
+
+    def __init__(
+        self,
+        rules,
+        *,
+        known_models,
+        default_model: str,
+        manual_fallback: str,
+        long_input_model: str,
+        long_input_chars: int = 600,
+        passthrough_models=(),
+        classifier=None,
+    ):
+        self.rules = tuple(rules)
+        self.known_models = frozenset(known_models)
+        self.default_model = default_model
+        self.manual_fallback = manual_fallback
+        self.long_input_model = long_input_model
+        self.long_input_chars = long_input_chars
+        self.passthrough_models = frozenset(passthrough_models)
+        self.classifier = classifier
+        self.rule_models = {rule.name: rule.model_id for rule in self.rules}
+        self.rule_priority = {f"r{index}": index for index in range(len(self.rules))}
+
+        alternatives = [
+            f"(?P<r{index}>{'|'.join(f'(?:{pattern})' for pattern in rule.patterns)})"
+            for index, rule in enumerate(self.rules)
+        ]
+        self.matcher = re.compile(f"(?=(?:{'|'.join(alternatives)}))")
+
+    def with_classifier(self, classifier) -> "ModelRouter":
+        """Same rules and matcher, consulting `classifier` for unmatched prompts."""
+        router = copy.copy(self)
+        router.classifier = classifier
+        return router
+
+    def match_rule(self, text: str) -> Optional[RouteRule]:
+        best = None
+        for match in self.matcher.finditer(text):
+            index = self.rule_priority[match.lastgroup]
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        return self.rules[best] if best is not None else None
+
+    def route(self, user_input: str, requested_model: str) -> RoutingDecision:
+        if requested_model in self.passthrough_models:
+            return RoutingDecision(requested_model, "manual", "manual", requested_model)
+
+        if requested_model != "auto":
+            model_id = requested_model if requested_model in self.known_models else self.manual_fallback
+            return RoutingDecision(model_id, "manual", "manual", requested_model)
+
+        normalized_input = (user_input or "").strip().lower()
+
+        rule = self.match_rule(normalized_input)
+        if rule is not None:
+            return RoutingDecision(rule.model_id, rule.name, "patterns", requested_model)
+
+        if len(normalized_input) > self.long_input_chars:
+            return RoutingDecision(self.long_input_model, "length", "length", requested_model)
+
+        if self.classifier is not None:
+            label, score = self.classifier.predict(normalized_input)
+            if label in self.rule_models:
+                return RoutingDecision(
+                    self.rule_models[label], label, "classifier", requested_model, confidence=score
+                )
+
+        return RoutingDecision(self.default_model, "default", "default", requested_model)
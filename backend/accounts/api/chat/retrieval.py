@@ -0,0 +1,248 @@
+# backend/accounts/api/chat/retrieval.py
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain.tools import Tool
+from langchain_core.documents import Document
+from sqlalchemy import text
+
+from .documents import COLLECTION_NAME, TEXT_SEARCH_CONFIG, get_vector_engine, load_vectorstore
+
+DOCUMENT_SEARCH_K = 3
+CANDIDATE_K = 20               # results taken from each retriever before fusion
+RRF_K = 60                     # reciprocal rank fusion damping constant
+MAX_VECTOR_DISTANCE = 0.7      # cosine distance; vector-only hits beyond this are noise
+
+# Tokens worth matching verbatim: anything with a digit (CS-101, 4.2.1,
+# E1102) or an all-caps acronym.
+IDENTIFIER_RE = re.compile(r"[A-Za-z0-9][\w.\-/:]*\d[\w.\-/:]*|\b[A-Z]{2,}\b")
+
+# plainto_tsquery ANDs its terms; swapping to OR gives BM25-like partial
+# matching, with ts_rank_cd rewarding chunks that cover more of the query.
+LEXICAL_SEARCH_SQL = f"""
+    WITH q AS (
+        SELECT replace(plainto_tsquery('{TEXT_SEARCH_CONFIG}', :query)::text, '&', '|')::tsquery AS query
+    )
+    SELECT e.document, e.cmetadata, ts_rank_cd(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(e.document, '')), q.query) AS rank
+    FROM langchain_pg_embedding e
+    JOIN langchain_pg_collection c ON c.uuid = e.collection_id
+    CROSS JOIN q
+    WHERE c.name = :collection
+      AND e.cmetadata->>'conversation_id' = :conversation_id
+      AND q.query::text <> ''
+      AND to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(e.document, '')) @@ q.query
+    ORDER BY rank DESC
+    LIMIT :limit
+"""
+
+# A conversation's chunks are fetched through the conversation_id index and
+# ranked exactly. MATERIALIZED keeps the planner from turning this into a
+# scan of the whole table ordered by distance.
+VECTOR_SEARCH_SQL = """
+    WITH scoped AS MATERIALIZED (
+        SELECT e.document, e.cmetadata, e.embedding
+        FROM langchain_pg_embedding e
+        JOIN langchain_pg_collection c ON c.uuid = e.collection_id
+        WHERE c.name = :collection
+          AND e.cmetadata->>'conversation_id' = :conversation_id
+    )
+    SELECT document, cmetadata, embedding <=> CAST(:embedding AS vector) AS distance
+    FROM scoped
+    ORDER BY distance
+    LIMIT :limit
+"""
+
+_search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="document-search")
+
+
+def _chunk_key(doc: Document):
+    return (doc.metadata.get("asset_id"), doc.page_content)
+
+
+def reciprocal_rank_fusion(result_lists, rrf_k: int = RRF_K) -> list[Document]:
+    """Merge ranked lists; each list contributes 1 / (rrf_k + rank) per document."""
+    scores = {}
+    docs = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = _chunk_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [docs[key] for key in ordered]
+
+
+# ────────────────────────────────────────────────
+# Rerankers
+# ────────────────────────────────────────────────
+
+class IdentifierReranker:
+    """
+    Lift chunks that contain the query's identifiers verbatim.
+
+    Embeddings blur exact strings such as course codes, clause numbers and
+    error codes; a chunk that repeats them is almost always the one wanted.
+    Order is otherwise kept, so this is safe to run on every query.
+    """
+
+    def rerank(self, query: str, docs: list[Document]) -> list[Document]:
+        identifiers = {token.strip(".:/-").lower() for token in IDENTIFIER_RE.findall(query)}
+        if not identifiers:
+            return docs
+
+        def matches(doc):
+            content = doc.page_content.lower()
+            return sum(1 for token in identifiers if token in content)
+
+        return sorted(docs, key=matches, reverse=True)
+
+
+class CrossEncoderReranker:
+    """Score (query, chunk) pairs with a local sentence-transformers cross-encoder."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model_name)
+
+    def rerank(self, query: str, docs: list[Document]) -> list[Document]:
+        if not docs:
+            return docs
+        scores = self.model.predict([(query, doc.page_content) for doc in docs])
+        ranked = sorted(zip(scores, range(len(docs))), reverse=True)
+        return [docs[index] for _, index in ranked]
+
+
+def get_default_reranker():
+    """
+    DOCUMENT_RERANKER selects the stage: unset or "identifier" for the
+    built-in identifier reranker, "none" to disable, or a cross-encoder model
+    name (requires sentence-transformers).
+    """
+    choice = os.getenv("DOCUMENT_RERANKER", "identifier").strip()
+    if choice.lower() == "none":
+        return None
+    if choice.lower() in ("", "identifier"):
+        return IdentifierReranker()
+    try:
+        return CrossEncoderReranker(choice)
+    except Exception as exc:
+        print(f"Cross-encoder reranker '{choice}' unavailable, using identifier reranker: {exc}")
+        return IdentifierReranker()
+
+
+# ────────────────────────────────────────────────
+# Hybrid retriever
+# ────────────────────────────────────────────────
+
+class HybridRetriever:
+    """
+    Full-text and vector search over one conversation's chunks, fused with RRF.
+
+    Both searches run concurrently and return up to `candidate_k` chunks.
+    The fused list then passes through the optional reranker before the top
+    `k` are returned. `mode` can restrict retrieval to "vector" or "lexical"
+    for comparison.
+    """
+
+    def __init__(
+        self,
+        vectorstore,
+        *,
+        collection_name=COLLECTION_NAME,
+        reranker=None,
+        candidate_k=CANDIDATE_K,
+        rrf_k=RRF_K,
+        max_vector_distance=MAX_VECTOR_DISTANCE,
+    ):
+        self.vectorstore = vectorstore
+        self.collection_name = collection_name
+        self.reranker = reranker
+        self.candidate_k = candidate_k
+        self.rrf_k = rrf_k
+        self.max_vector_distance = max_vector_distance
+
+    def vector_search(self, query: str, conversation_id: str, limit: int) -> list[Document]:
+        embedding = self.vectorstore.embeddings.embed_query(query)
+        with get_vector_engine().connect() as conn:
+            rows = conn.execute(
+                text(VECTOR_SEARCH_SQL),
+                {
+                    "embedding": "[" + ",".join(map(str, embedding)) + "]",
+                    "collection": self.collection_name,
+                    "conversation_id": conversation_id,
+                    "limit": limit,
+                },
+            ).all()
+        return [
+            Document(page_content=row.document or "", metadata=row.cmetadata or {})
+            for row in rows
+            if row.distance <= self.max_vector_distance
+        ]
+
+    def lexical_search(self, query: str, conversation_id: str, limit: int) -> list[Document]:
+        with get_vector_engine().connect() as conn:
+            rows = conn.execute(
+                text(LEXICAL_SEARCH_SQL),
+                {
+                    "query": query,
+                    "collection": self.collection_name,
+                    "conversation_id": conversation_id,
+                    "limit": limit,
+                },
+            ).all()
+        return [Document(page_content=row.document or "", metadata=row.cmetadata or {}) for row in rows]
+
+    def search(self, query: str, *, conversation_id, k: int = DOCUMENT_SEARCH_K, mode: str = "hybrid", rerank: bool = True) -> list[Document]:
+        conversation_id = str(conversation_id)
+        if mode == "vector":
+            candidates = self.vector_search(query, conversation_id, self.candidate_k)
+        elif mode == "lexical":
+            candidates = self.lexical_search(query, conversation_id, self.candidate_k)
+        else:
+            vector_future = _search_executor.submit(self.vector_search, query, conversation_id, self.candidate_k)
+            lexical_results = self.lexical_search(query, conversation_id, self.candidate_k)
+            candidates = reciprocal_rank_fusion([lexical_results, vector_future.result()], rrf_k=self.rrf_k)
+
+        if rerank and self.reranker is not None:
+            candidates = self.reranker.rerank(query, candidates)
+        return candidates[:k]
+
+
+_retriever = None
+
+
+def get_document_retriever():
+    """Shared retriever over the shared vector store, or None while it is empty."""
+    global _retriever
+    vectorstore = load_vectorstore()
+    if vectorstore is None:
+        return None
+    if _retriever is None:
+        _retriever = HybridRetriever(vectorstore, reranker=get_default_reranker())
+    return _retriever
+
+
+def search_documents(query: str, *, conversation_id, k: int = DOCUMENT_SEARCH_K) -> list[Document]:
+    retriever = get_document_retriever()
+    if retriever is None:
+        return []
+    return retriever.search(query, conversation_id=conversation_id, k=k)
+
+
+def build_document_search_tool(conversation_id) -> Tool:
+    """Return a document_search tool bound to one conversation's uploads."""
+
+    def document_search(query: str) -> str:
+        """Search uploaded PDF documents for relevant information."""
+        results = search_documents(query, conversation_id=conversation_id)
+        if not results:
+            return "No relevant document content found in this conversation."
+        return "Relevant document content:\n" + "\n\n".join(doc.page_content.strip() for doc in results)
+
+    return Tool.from_function(
+        func=document_search,
+        name="document_search",
+        description="Search uploaded PDF documents for relevant information. Use when query relates to document content."
+    )
@@ -1,16 +1,11 @@
-import os
-import re
+import asyncio
 import base64
 import binascii
+import uuid
 
-from django.conf import settings
-from django.http import JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.vectorstores import PGVector
-from langchain_cohere import CohereEmbeddings
-from dotenv import load_dotenv
 
 from accounts.api.access import (
     authenticate_request_user,
@@ -20,35 +15,88 @@ from accounts.api.access import (
     sse_error_response,
     sse_token_limit_response,
 )
+from accounts.api.billing.services import token_quota_reached
+from accounts.api.context_window import aget_context_window
 from accounts.api.persistence import (
+    CONVERSATION_PAGE_SIZE,
+    MAX_CONVERSATION_PAGE_SIZE,
+    MAX_MESSAGE_PAGE_SIZE,
+    MESSAGE_PAGE_SIZE,
+    InvalidCursor,
     attach_pending_assets_to_message,
+    clamp_page_size,
     create_conversation,
     create_message,
     get_builtin_agent,
-    get_recent_context_messages,
     get_user_conversation,
+    list_conversation_messages,
+    list_user_agent_conversations,
     list_user_conversations,
     rename_conversation,
     save_remote_image_asset,
     serialize_conversation,
+    serialize_message,
     soft_delete_conversation,
     store_uploaded_assets,
     update_message,
 )
-from .documents import CONNECTION_STRING, COLLECTION_NAME
+from accounts.api.sse import EventWriter, StreamingText, coalesce_chunks, resume_frames, sse_response
 from .generate_image import image_generator
-from .gemini import IMAGE_GENERATION_MODEL, generate_chat_title, get_bot_response, resolve_normal_chat_model
-
-load_dotenv()
-COHERE_API_KEY = os.getenv("COHERE_API_KEY")
+from .gemini import (
+    IMAGE_GENERATION_MODEL,
+    fallback_chat_title,
+    generate_chat_title,
+    get_bot_response,
+    route_normal_chat_model,
+)
+from .ingestion import enqueue_ingestion_jobs, get_user_ingestion_jobs, serialize_ingestion_job
 
+MAX_TRACKED_JOBS = 20
 
-def _get_embedding_client():
-    return CohereEmbeddings(
-        model="embed-english-v3.0",
-        cohere_api_key=COHERE_API_KEY,
-    )
 
+async def _title_conversation(conversation, query):
+    """Generate and persist the title; runs alongside the answer stream."""
+    try:
+        title = await generate_chat_title(query)
+    except Exception as exc:
+        print(f"Title generation failed: {exc}")
+        title = fallback_chat_title(query)
+    try:
+        await sync_to_async(rename_conversation)(conversation, title)
+    except Exception as exc:
+        print(f"Saving chat title failed: {exc}")
+    return title
+
+
+async def _interleave_title(chunks, title_task):
+    """
+    Yield ("chunk", text) from `chunks` and ("title", title) as soon as the
+    title task finishes, whichever comes first. Without a task this is just
+    the chunk stream.
+    """
+    iterator = chunks.__aiter__()
+    next_chunk = asyncio.ensure_future(iterator.__anext__())
+    pending_title = title_task
+    try:
+        while True:
+            waiting = {next_chunk, pending_title} if pending_title else {next_chunk}
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if pending_title in done:
+                pending_title = None
+                yield "title", title_task.result()
+            if next_chunk in done:
+                try:
+                    chunk = next_chunk.result()
+                except StopAsyncIteration:
+                    break
+                yield "chunk", chunk
+                next_chunk = asyncio.ensure_future(iterator.__anext__())
+        if pending_title:
+            yield "title", await pending_title
+    finally:
+        if not next_chunk.done():
+            next_chunk.cancel()
+            await asyncio.gather(next_chunk, return_exceptions=True)
 
 @csrf_exempt
 def conversations_view(request):
@@ -59,9 +107,48 @@ def conversations_view(request):
     if not user:
         return json_auth_required_response()
 
-    conversations = list_user_conversations(user)
-    payload = [serialize_conversation(conversation, request=request, include_messages=True) for conversation in conversations]
-    return JsonResponse({"conversations": payload})
+    cursor = request.GET.get("cursor", "").strip()
+    limit = clamp_page_size(request.GET.get("limit"), CONVERSATION_PAGE_SIZE, MAX_CONVERSATION_PAGE_SIZE)
+    try:
+        conversations, next_cursor = list_user_conversations(user, cursor=cursor, limit=limit)
+    except InvalidCursor as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    payload = {
+        "conversations": [serialize_conversation(conversation, request=request) for conversation in conversations],
+        "nextCursor": next_cursor,
+    }
+    if not cursor:
+        payload["agentConversations"] = [
+            serialize_conversation(conversation, request=request)
+            for conversation in list_user_agent_conversations(user)
+        ]
+    return JsonResponse(payload)
+
+
+@csrf_exempt
+def conversation_messages_view(request, conversation_id):
+    if request.method != "GET":
+        return JsonResponse({"error": "GET required"}, status=405)
+
+    user = authenticate_request_user(request)
+    if not user:
+        return json_auth_required_response()
+
+    conversation = get_user_conversation(user, conversation_id)
+    if not conversation:
+        return JsonResponse({"error": "Conversation not found."}, status=404)
+
+    before = request.GET.get("before", "").strip()
+    if before and not before.isdigit():
+        return JsonResponse({"error": "Invalid cursor."}, status=400)
+
+    limit = clamp_page_size(request.GET.get("limit"), MESSAGE_PAGE_SIZE, MAX_MESSAGE_PAGE_SIZE)
+    messages, next_cursor = list_conversation_messages(conversation, before=int(before) if before else None, limit=limit)
+    return JsonResponse({
+        "messages": [serialize_message(message, request=request) for message in messages],
+        "nextCursor": next_cursor,
+    })
 
 
 @csrf_exempt
@@ -142,43 +229,48 @@ def upload_document(request):
     if not files:
         return JsonResponse({"error": "No PDF file uploaded"}, status=400)
 
-    all_chunks = []
     stored_assets = store_uploaded_assets(user, conversation, files)
-
-    for asset in stored_assets:
-        full_path = asset.file.path
-        loader = PyPDFLoader(full_path)
-        documents = loader.load()
-        splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=150)
-        chunks = splitter.split_documents(documents)
-        all_chunks.extend(chunks)
-
-    if all_chunks:
-        embeddings = _get_embedding_client()
-        PGVector.from_documents(
-            documents=all_chunks,
-            embedding=embeddings,
-            connection_string=CONNECTION_STRING,
-            collection_name=COLLECTION_NAME,
-            pre_delete_collection=False,
-        )
+    jobs = enqueue_ingestion_jobs(user, conversation, stored_assets)
 
     return JsonResponse({
-        "message": "PDF processed and stored.",
+        "message": "PDF queued for processing.",
         "assets": [str(asset.id) for asset in stored_assets],
-    })
+        "jobs": [serialize_ingestion_job(job) for job in jobs],
+    }, status=202)
+
+
+@csrf_exempt
+def ingestion_jobs_view(request):
+    if request.method != "GET":
+        return JsonResponse({"error": "GET required"}, status=405)
+
+    user = authenticate_request_user(request)
+    if not user:
+        return json_auth_required_response()
+
+    job_ids = []
+    for raw_id in request.GET.get("ids", "").split(",")[:MAX_TRACKED_JOBS]:
+        try:
+            job_ids.append(uuid.UUID(raw_id.strip()))
+        except ValueError:
+            continue
+    if not job_ids:
+        return JsonResponse({"error": "ids is required."}, status=400)
+
+    jobs = get_user_ingestion_jobs(user, job_ids)
+    return JsonResponse({"jobs": [serialize_ingestion_job(job) for job in jobs]})
 
 
 @csrf_exempt
-def chat_view(request):
+async def chat_view(request):
     if request.method != "GET":
         return JsonResponse({"error": "GET required for streaming"}, status=405)
 
-    user = authenticate_request_user(request, allow_query_token=True)
+    user = await sync_to_async(authenticate_request_user)(request, allow_query_token=True)
     if not user:
         return sse_error_response("Authentication required. Please sign in again.")
 
-    billing_profile = get_user_billing_profile(user, sync_remote=True)
+    billing_profile = await sync_to_async(get_user_billing_profile)(user)
     query = request.GET.get("text", "").strip()
     model_id = request.GET.get("model", "gpt5-nano").strip() or "gpt5-nano"
     chat_id = request.GET.get("chat_id", "").strip()
@@ -187,37 +279,39 @@ def chat_view(request):
     if not query:
         return JsonResponse({"error": "Empty message"}, status=400)
 
-    conversation = get_user_conversation(user, chat_id)
+    conversation = await sync_to_async(get_user_conversation)(user, chat_id)
     if not conversation:
         return sse_error_response("Conversation not found.")
+    resumed = await sync_to_async(resume_frames)(request, conversation)
+    if resumed is not None:
+        return sse_response(resumed)
 
     if model_requires_pro(model_id):
         if not billing_profile or not billing_profile.is_paid:
             return sse_error_response("Upgrade to Pro to use this model.")
-        if billing_profile.token_total_used >= getattr(settings, "PAID_MONTHLY_TOKEN_QUOTA", 0):
+        if await sync_to_async(token_quota_reached)(billing_profile):
             return sse_token_limit_response("Token limit reached. Please wait until subscription renewal.")
 
-    previous_context = get_recent_context_messages(conversation, limit=10)
-    user_message = create_message(
+    routing = route_normal_chat_model(query, model_id)
+    resolved_model_id = routing.model_id
+    print(f"Model routing: {model_id} -> {resolved_model_id} (rule: {routing.rule}, via {routing.source})")
+
+    previous_context = (await aget_context_window(conversation, model=resolved_model_id)).messages
+    user_message = await sync_to_async(create_message)(
         conversation,
         role="user",
         user=user,
         content_text=query,
     )
-    attach_pending_assets_to_message(conversation, user_message)
+    await sync_to_async(attach_pending_assets_to_message)(conversation, user_message)
 
-    chat_title = None
+    # The title is produced next to the answer instead of in front of it;
+    # the title event goes out whenever it is ready.
+    title_task = None
     if is_first_message and (conversation.title or "New Chat") == "New Chat":
-        try:
-            chat_title = generate_chat_title(query)
-            rename_conversation(conversation, chat_title)
-        except Exception as exc:
-            print(f"Title generation failed: {exc}")
-            chat_title = query[:30] + "..." if len(query) > 30 else query
-            rename_conversation(conversation, chat_title)
+        title_task = asyncio.create_task(_title_conversation(conversation, query))
 
-    resolved_model_id = resolve_normal_chat_model(query, model_id)
-    assistant_message = create_message(
+    assistant_message = await sync_to_async(create_message)(
         conversation,
         role="assistant",
         user=None,
@@ -226,16 +320,15 @@ def chat_view(request):
         model_used=resolved_model_id,
     )
 
-    def event_stream():
-        accumulated_text = ""
-        try:
-            if chat_title:
-                yield f"data: [TITLE]{chat_title}\n\n"
+    events = EventWriter(assistant_message.id)
 
+    async def event_stream():
+        streamed = StreamingText(assistant_message)
+        try:
             if resolved_model_id == IMAGE_GENERATION_MODEL:
-                text_response, image_url = image_generator(query)
+                text_response, image_url = await sync_to_async(image_generator, thread_sensitive=False)(query)
                 final_text = text_response if text_response and text_response != "[No text response]" else "Here's your generated image:"
-                update_message(
+                await sync_to_async(update_message)(
                     assistant_message,
                     content_text=final_text,
                     status="completed",
@@ -246,7 +339,7 @@ def chat_view(request):
                 if image_url:
                     local_image_url = image_url
                     try:
-                        asset = save_remote_image_asset(
+                        asset = await sync_to_async(save_remote_image_asset)(
                             user,
                             conversation,
                             assistant_message,
@@ -265,44 +358,55 @@ def chat_view(request):
                             except (binascii.Error, ValueError):
                                 local_image_url = None
 
-                for token in re.findall(r"\S+\s*", final_text):
-                    if token.strip():
-                        yield f"data: {token.replace(chr(10), '\\n')}\n\n"
+                for frame in events.text(final_text):
+                    yield frame
                 if local_image_url:
-                    yield f"data: [IMAGE]{local_image_url}\n\n"
-                yield "data: [DONE]\n\n"
+                    yield events.image(local_image_url)
+                if title_task:
+                    yield events.title(await title_task)
+                yield events.done()
                 return
 
-            for chunk in get_bot_response(
+            bot_response = get_bot_response(
                 query,
                 resolved_model_id,
                 history_messages=previous_context,
                 user=user,
                 track_tokens=model_requires_pro(resolved_model_id),
-            ):
-                if chunk.strip():
-                    accumulated_text += chunk
-                    yield f"data: {chunk.replace(chr(10), '\\n')}\n\n"
-
-            update_message(
+                conversation_id=conversation.id,
+            )
+            # Model deltas are merged into frames every few milliseconds
+            # instead of one write per token.
+            async for kind, value in _interleave_title(coalesce_chunks(bot_response), title_task):
+                if kind == "title":
+                    yield events.title(value)
+                elif value:
+                    await streamed.add(value)
+                    yield events.token(value)
+
+            await sync_to_async(update_message)(
                 assistant_message,
-                content_text=accumulated_text.strip(),
+                content_text=streamed.text.strip(),
                 status="completed",
                 model_used=resolved_model_id,
             )
+        except (asyncio.CancelledError, GeneratorExit):
+            # The client disconnected: keep what was generated so far.
+            await sync_to_async(update_message)(
+                assistant_message,
+                content_text=streamed.text.strip(),
+                status="interrupted",
+                model_used=resolved_model_id,
+            )
+            raise
         except Exception as exc:
-            update_message(
+            await sync_to_async(update_message)(
                 assistant_message,
-                content_text=accumulated_text.strip(),
+                content_text=streamed.text.strip(),
                 status="failed",
                 model_used=resolved_model_id,
             )
-            yield f"data: [ERROR]{str(exc)}\n\n"
-        yield "data: [DONE]\n\n"
-
-    response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
-    response["Cache-Control"] = "no-cache"
-    response["X-Accel-Buffering"] = "no"
-    response["Access-Control-Allow-Origin"] = "*"
-    response["Access-Control-Allow-Headers"] = "Cache-Control"
-    return response
+            yield events.error(str(exc))
+        yield events.done()
+
+    return sse_response(event_stream())
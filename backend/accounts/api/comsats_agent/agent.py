@@ -4,15 +4,15 @@ import re
 from datetime import datetime
 from threading import Lock
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import AnonymousUser
-from langchain.agents import AgentExecutor, create_openai_tools_agent
-from langchain_community.callbacks.manager import get_openai_callback
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.tools import StructuredTool
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
-from accounts.api.billing.services import extract_token_usage, get_or_create_billing_profile, record_token_usage
+from accounts.api.agent_registry import get_agent_executor
+from accounts.api.billing.services import get_cached_billing_profile, record_token_usage
+from accounts.api.history import build_chat_history
+from accounts.api.llm_streaming import ainvoke_agent
 
 from .gmail import build_gmail_oauth_url, is_gmail_connected, send_gmail_email
 
@@ -47,36 +47,12 @@ Rules:
   Full email body here
 """
 
-prompt = ChatPromptTemplate.from_messages([
-    ("system", SYSTEM_PROMPT),
-    MessagesPlaceholder(variable_name="chat_history"),
-    ("human", "{input}"),
-    MessagesPlaceholder(variable_name="agent_scratchpad"),
-])
-
-
 class SendUniversityEmailInput(BaseModel):
     recipient_email: str = Field(description="Official COMSATS recipient email address ending in @cuilahore.edu.pk")
     subject: str = Field(description="Clear subject line for the email")
     body: str = Field(description="Final email body to send")
 
 
-def build_chat_history(history_messages=None):
-    built_messages = []
-    for message in history_messages or []:
-        text = getattr(message, "content_text", "") or ""
-        role = getattr(message, "role", "")
-        if not text:
-            continue
-        if role == "user":
-            built_messages.append(HumanMessage(content=text))
-        elif role == "assistant":
-            built_messages.append(AIMessage(content=text))
-        elif role == "system":
-            built_messages.append(SystemMessage(content=text))
-    return built_messages
-
-
 def build_email_tool_for_user(user):
     def _send_university_email(recipient_email: str, subject: str, body: str):
         if not user or isinstance(user, AnonymousUser) or not getattr(user, "is_authenticated", False):
@@ -140,35 +116,35 @@ def extract_email_draft(answer_text: str):
     }
 
 
-def get_comsats_response(query: str, thread_id="comsats_agent_chat", history_messages=None, user=None, track_tokens=False):
+async def get_comsats_response(query: str, thread_id="comsats_agent_chat", history_messages=None, user=None, track_tokens=False):
     try:
         chat_history = build_chat_history(history_messages)
-        tools = [build_email_tool_for_user(user)]
 
-        agent = create_openai_tools_agent(llm, tools, prompt)
-        agent_executor = AgentExecutor(
-            agent=agent,
-            tools=tools,
+        # The agent graph is shared; only the email tool is bound per user.
+        agent_executor = get_agent_executor(
+            llm.model_name,
+            lambda: llm,
+            SYSTEM_PROMPT,
+            [],
+            request_tools=[build_email_tool_for_user(user)],
             verbose=True,
             handle_parsing_errors=True,
         )
 
-        with get_openai_callback() as callback:
-            result = agent_executor.invoke({
-                "input": query,
-                "chat_history": chat_history,
-                "agent_scratchpad": [],
-            })
+        result, usage = await ainvoke_agent(agent_executor, {
+            "input": query,
+            "chat_history": chat_history,
+            "agent_scratchpad": [],
+        }, bill_user=user if track_tokens else None, label="comsats")
         answer_text = result["output"].strip()
-        usage = extract_token_usage(callback)
         if "email sent successfully" not in answer_text.lower():
             draft = extract_email_draft(answer_text)
             if draft:
                 answer_text = f"{answer_text}\n\n{EMAIL_DRAFT_TAG}{json.dumps(draft)}"
         if track_tokens and user:
             try:
-                profile = get_or_create_billing_profile(user)
-                record_token_usage(profile, **usage)
+                profile = await sync_to_async(get_cached_billing_profile)(user)
+                await sync_to_async(record_token_usage)(profile, **usage)
             except Exception as usage_error:
                 print(f"[WARN] Comsats token usage recording failed: {usage_error}")
         return answer_text
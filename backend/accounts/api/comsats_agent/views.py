@@ -1,8 +1,8 @@
+import asyncio
 import json
-import time
 
-from django.conf import settings
-from django.http import HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseRedirect, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST
 from rest_framework_simplejwt.authentication import JWTAuthentication
@@ -14,16 +14,18 @@ from accounts.api.access import (
     sse_error_response,
     sse_token_limit_response,
 )
+from accounts.api.billing.services import token_quota_reached
+from accounts.api.context_window import aget_context_window
 from accounts.api.persistence import (
     attach_pending_assets_to_message,
     create_email_record,
     create_message,
     get_builtin_agent,
-    get_recent_context_messages,
     get_user_conversation,
     update_message,
     assign_agent_to_conversation,
 )
+from accounts.api.sse import EventWriter, resume_frames, sse_response
 from accounts.models import Message
 from .agent import EMAIL_DRAFT_TAG, extract_email_draft, get_comsats_response, reset_comsats_chat
 from .gmail import (
@@ -67,39 +69,42 @@ def authenticate_header_token(request):
 
 @csrf_exempt
 @require_GET
-def comsats_stream(request):
+async def comsats_stream(request):
     query = request.GET.get("text", "").strip()
     chat_id = request.GET.get("chat_id", "").strip()
-    user = authenticate_query_token(request)
+    user = await sync_to_async(authenticate_query_token)(request)
 
     if not user:
         return sse_error_response("Authentication required. Please sign in again.")
-    billing_profile = get_user_billing_profile(user, sync_remote=True)
+    billing_profile = await sync_to_async(get_user_billing_profile)(user)
     if not billing_profile or not billing_profile.is_paid:
         return sse_error_response("Upgrade to Pro to use domain agents.")
-    if billing_profile.token_total_used >= getattr(settings, "PAID_MONTHLY_TOKEN_QUOTA", 0):
+    if await sync_to_async(token_quota_reached)(billing_profile):
         return sse_token_limit_response("Token limit reached. Please wait until subscription renewal.")
     if not query:
         return JsonResponse({"error": "Query is required"}, status=400)
 
-    conversation = get_user_conversation(user, chat_id)
+    conversation = await sync_to_async(get_user_conversation)(user, chat_id)
     if not conversation:
         return sse_error_response("Conversation not found.")
+    resumed = await sync_to_async(resume_frames)(request, conversation)
+    if resumed is not None:
+        return sse_response(resumed)
 
-    builtin_agent = get_builtin_agent("builtin-comsats")
+    builtin_agent = await sync_to_async(get_builtin_agent)("builtin-comsats")
     if builtin_agent:
-        assign_agent_to_conversation(conversation, builtin_agent, conversation_type="domain_agent")
+        await sync_to_async(assign_agent_to_conversation)(conversation, builtin_agent, conversation_type="domain_agent")
 
-    previous_context = get_recent_context_messages(conversation, limit=10)
-    user_message = create_message(
+    previous_context = (await aget_context_window(conversation, model="x-ai/grok-4.1-fast")).messages
+    user_message = await sync_to_async(create_message)(
         conversation,
         role="user",
         user=user,
         content_text=query,
     )
-    attach_pending_assets_to_message(conversation, user_message)
+    await sync_to_async(attach_pending_assets_to_message)(conversation, user_message)
 
-    assistant_message = create_message(
+    assistant_message = await sync_to_async(create_message)(
         conversation,
         role="assistant",
         content_text="",
@@ -107,21 +112,22 @@ def comsats_stream(request):
         model_used="x-ai/grok-4.1-fast",
     )
 
-    def stream_response():
+    events = EventWriter(assistant_message.id)
+
+    async def stream_response():
         raw_answer = ""
         try:
-            response = get_comsats_response(
+            response = await get_comsats_response(
                 query,
                 thread_id=chat_id,
                 history_messages=previous_context,
                 user=user,
                 track_tokens=True,
             )
-            for word in response.split(" "):
-                raw_answer += word + " "
-                yield f"data: {word.replace(chr(10), '\\n')} \n\n"
-                time.sleep(0.02)
+            raw_answer = response
 
+            # The agent appends the draft after EMAIL_DRAFT_TAG; it goes to
+            # the client as its own event instead of inside the text.
             marker_index = raw_answer.find(EMAIL_DRAFT_TAG)
             stored_text = raw_answer.strip()
             content_json = {}
@@ -137,32 +143,39 @@ def comsats_stream(request):
                 if draft:
                     content_json["email_draft"] = draft
 
-            update_message(
+            for frame in events.text(stored_text):
+                yield frame
+            if content_json.get("email_draft"):
+                yield events.email_draft(content_json["email_draft"])
+
+            await sync_to_async(update_message)(
                 assistant_message,
                 content_text=stored_text,
                 content_json=content_json,
                 status="completed",
                 model_used="x-ai/grok-4.1-fast",
             )
-            yield "data: [DONE]\n\n"
+            yield events.done()
+        except (asyncio.CancelledError, GeneratorExit):
+            # The client disconnected: keep what was generated so far.
+            await sync_to_async(update_message)(
+                assistant_message,
+                content_text=raw_answer.strip(),
+                status="interrupted",
+                model_used="x-ai/grok-4.1-fast",
+            )
+            raise
         except Exception as exc:
-            update_message(
+            await sync_to_async(update_message)(
                 assistant_message,
                 content_text=raw_answer.strip(),
                 status="failed",
                 model_used="x-ai/grok-4.1-fast",
             )
-            error_msg = f"[ERROR] {str(exc)}"
-            for word in error_msg.split(" "):
-                yield f"data: {word.replace(chr(10), '\\n')} \n\n"
-                time.sleep(0.02)
-            yield "data: [DONE]\n\n"
+            yield events.error(str(exc))
+            yield events.done()
 
-    response = StreamingHttpResponse(stream_response(), content_type='text/event-stream')
-    response['Cache-Control'] = 'no-cache'
-    response['X-Accel-Buffering'] = 'no'
-    response['Access-Control-Allow-Origin'] = '*'
-    return response
+    return sse_response(stream_response())
 
 
 @csrf_exempt
@@ -182,7 +195,7 @@ def comsats_send_email(request):
     user = authenticate_header_token(request)
     if not user:
         return JsonResponse({"error": "Authentication required."}, status=401)
-    billing_profile = get_user_billing_profile(user, sync_remote=True)
+    billing_profile = get_user_billing_profile(user)
     if not billing_profile or not billing_profile.is_paid:
         return json_pro_required_response("Upgrade to Pro to use the Comsats agent.")
 
@@ -0,0 +1,208 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+import tiktoken
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from langchain.chat_models import init_chat_model
+from langchain.prompts import ChatPromptTemplate
+
+from accounts.api.agent_registry import get_model_client
+from accounts.api.history import load_history_rows
+from accounts.models import Conversation, Message
+
+MAX_CONTEXT_MESSAGES = 20      # newest unsummarized messages considered per request
+MAX_MESSAGE_TOKENS = 1000      # longer messages are cut before they enter the window
+MESSAGE_OVERHEAD_TOKENS = 4    # role and separator tokens per chat message
+SUMMARY_INPUT_MESSAGE_TOKENS = 500
+SUMMARY_MODEL = "google/gemini-2.5-flash-lite-preview-09-2025"
+SUMMARY_LOCK_TIMEOUT = 120
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+
+summary_prompt = ChatPromptTemplate.from_messages([
+    ("system", """You maintain a running summary of a chat between a user and an assistant.
+Merge the new messages into the existing summary. Keep names, numbers, decisions, open questions
+and anything the user asked to remember. Drop greetings and filler. Write plain prose, at most 200 words.
+Return only the updated summary."""),
+    ("human", "Existing summary:\n{summary}\n\nNew messages:\n{transcript}"),
+])
+
+_summary_tasks = set()
+
+
+@dataclass(frozen=True)
+class ContextMessage:
+    """History entry handed to the agents' build_chat_history in place of a Message."""
+
+    role: str
+    content_text: str
+
+
+@dataclass
+class ContextWindow:
+    conversation_id: object
+    messages: list
+    tokens: int
+    # Messages up to this sequence_no no longer fit and should be folded
+    # into the conversation summary; None when nothing overflowed.
+    summarize_through: Optional[int] = None
+
+
+def context_token_budget() -> int:
+    return getattr(settings, "CONTEXT_TOKEN_BUDGET", 3000)
+
+
+@lru_cache(maxsize=32)
+def get_encoding(model: str):
+    """tiktoken encoding for `model`; models tiktoken does not know use cl100k_base."""
+    name = (model or "").rsplit("/", 1)[-1]
+    try:
+        return tiktoken.encoding_for_model(name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str = "") -> int:
+    return len(get_encoding(model).encode(text or "", disallowed_special=()))
+
+
+def truncate_tokens(text: str, model: str, max_tokens: int) -> str:
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text or "", disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text or ""
+    return encoding.decode(tokens[:max_tokens]).rstrip() + " … [truncated]"
+
+
+def build_context_window(conversation: Conversation, *, model: str = "", budget: Optional[int] = None, max_messages: int = MAX_CONTEXT_MESSAGES) -> ContextWindow:
+    """
+    Fit the conversation history into `budget` tokens of `model`.
+
+    The persisted summary stands in for everything up to
+    summary_through_sequence_no. After it come the newest messages, each
+    capped at MAX_MESSAGE_TOKENS, for as long as they fit. Older messages
+    that did not fit are reported through `summarize_through` so the caller
+    can fold them into the summary in the background; until that lands they
+    are simply left out.
+    """
+    budget = budget or context_token_budget()
+    through = conversation.summary_through_sequence_no
+    candidates = load_history_rows(conversation, after=through, limit=max_messages + 1)
+    overflowed = len(candidates) > max_messages
+    candidates = candidates[:max_messages]
+
+    summary_message = None
+    used = 0
+    if conversation.context_summary:
+        summary_message = ContextMessage(Message.Role.SYSTEM, f"{SUMMARY_HEADER}\n{conversation.context_summary}")
+        used = count_tokens(summary_message.content_text, model) + MESSAGE_OVERHEAD_TOKENS
+
+    kept = []
+    for sequence_no, role, content_text in candidates:
+        text = truncate_tokens(content_text, model, MAX_MESSAGE_TOKENS)
+        cost = count_tokens(text, model) + MESSAGE_OVERHEAD_TOKENS
+        if kept and used + cost > budget:
+            overflowed = True
+            break
+        kept.append((sequence_no, ContextMessage(role, text)))
+        used += cost
+
+    summarize_through = None
+    if overflowed and kept:
+        summarize_through = kept[-1][0] - 1
+
+    messages = [summary_message] if summary_message else []
+    messages.extend(entry for _, entry in reversed(kept))
+    return ContextWindow(conversation.id, messages, used, summarize_through)
+
+
+# ────────────────────────────────────────────────
+# Rolling summary
+# ────────────────────────────────────────────────
+
+def get_summary_model():
+    return get_model_client(SUMMARY_MODEL, lambda: init_chat_model(
+        SUMMARY_MODEL,
+        model_provider="openai",
+        api_key=os.getenv("OPENROUTER_API_KEY"),
+        base_url="https://openrouter.ai/api/v1",
+        streaming=True,
+        stream_usage=True,
+    ))
+
+
+def _load_summary_inputs(conversation_id, through: int):
+    conversation = Conversation.objects.only("context_summary", "summary_through_sequence_no").get(pk=conversation_id)
+    start = conversation.summary_through_sequence_no
+    if start >= through:
+        return None
+    messages = list(
+        Message.objects.filter(
+            conversation_id=conversation_id,
+            status=Message.Status.COMPLETED,
+            role__in=[Message.Role.USER, Message.Role.ASSISTANT],
+            sequence_no__gt=start,
+            sequence_no__lte=through,
+        )
+        .exclude(content_text="")
+        .order_by("sequence_no")
+        .only("role", "content_text")
+    )
+    return conversation.context_summary, start, messages
+
+
+def _save_summary(conversation_id, previous_through: int, through: int, summary: str) -> bool:
+    # Compare-and-set on the old boundary, so a concurrent fold is never overwritten.
+    return Conversation.objects.filter(
+        pk=conversation_id,
+        summary_through_sequence_no=previous_through,
+    ).update(context_summary=summary, summary_through_sequence_no=through) == 1
+
+
+async def summarize_messages(summary: str, messages) -> str:
+    transcript = "\n".join(
+        f"{message.role}: {truncate_tokens(message.content_text, SUMMARY_MODEL, SUMMARY_INPUT_MESSAGE_TOKENS)}"
+        for message in messages
+    )
+    chain = summary_prompt | get_summary_model()
+    response = await chain.ainvoke({"summary": summary or "(none yet)", "transcript": transcript})
+    return (response.content or "").strip()
+
+
+async def refresh_conversation_summary(conversation_id, through: int):
+    """Fold messages up to `through` into the conversation's persisted summary."""
+    lock_key = f"context_summary_lock:{conversation_id}"
+    if not await cache.aadd(lock_key, True, timeout=SUMMARY_LOCK_TIMEOUT):
+        return
+    try:
+        inputs = await sync_to_async(_load_summary_inputs)(conversation_id, through)
+        if inputs is None:
+            return
+        summary, previous_through, messages = inputs
+        if messages:
+            summary = await summarize_messages(summary, messages) or summary
+        await sync_to_async(_save_summary)(conversation_id, previous_through, through, summary)
+    except Exception as exc:
+        print(f"[WARN] Conversation summary refresh failed for {conversation_id}: {exc}")
+    finally:
+        await cache.adelete(lock_key)
+
+
+def schedule_summary_refresh(window: ContextWindow):
+    """Start the summary fold for `window` in the background, if it needs one."""
+    if window.summarize_through is None:
+        return
+    task = asyncio.create_task(refresh_conversation_summary(window.conversation_id, window.summarize_through))
+    _summary_tasks.add(task)
+    task.add_done_callback(_summary_tasks.discard)
+
+
+async def aget_context_window(conversation: Conversation, *, model: str = "") -> ContextWindow:
+    """Build the context window for a request and schedule any summary fold it needs."""
+    window = await sync_to_async(build_context_window)(conversation, model=model)
+    schedule_summary_refresh(window)
+    return window
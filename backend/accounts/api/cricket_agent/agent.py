@@ -3,11 +3,10 @@ import os
 import re
 from datetime import datetime
 
+from asgiref.sync import sync_to_async
 from langchain_openai import ChatOpenAI
 from langchain.agents import create_openai_tools_agent, AgentExecutor
-from langchain_community.callbacks.manager import get_openai_callback
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import AIMessage, HumanMessage
 from django.core.cache import cache
 from .tools import livescore6_specific_match, cricket_search_tool
 
@@ -17,7 +16,10 @@ from .tools import (
     livescore6_specific_tool,
     tavily_cricket
 )
-from accounts.api.billing.services import extract_token_usage, get_or_create_billing_profile, record_token_usage
+from accounts.api.billing.services import get_cached_billing_profile, record_token_usage
+from accounts.api.history import build_chat_history
+from accounts.api.llm_streaming import ainvoke_agent
+from accounts.api.response_cache import alookup_response, astore_response, build_cache_key, response_cache_enabled
 
 # ────────────────────────────────────────────────
 # LLM — grok-4.1-fast via OpenRouter
@@ -148,61 +150,51 @@ agent_executor = AgentExecutor(
     early_stopping_method="force"
 )
 
-# ────────────────────────────────────────────────
-# Chat history (unchanged)
-# ────────────────────────────────────────────────
-
-def build_chat_history(history_messages=None):
-    built_messages = []
-    for message in history_messages or []:
-        text = getattr(message, "content_text", "") or ""
-        role = getattr(message, "role", "")
-        if not text:
-            continue
-        if role == "user":
-            built_messages.append(HumanMessage(content=text))
-        elif role == "assistant":
-            built_messages.append(AIMessage(content=text))
-    return built_messages
-
-
 # backend/accounts/api/cricket_agent/agent.py
 
-def get_cricket_response(query: str, thread_id="cricket_agent_chat", history_messages=None, user=None, track_tokens=False):
+async def get_cricket_response(query: str, thread_id="cricket_agent_chat", history_messages=None, user=None, track_tokens=False):
     q = query.lower().strip()
     chat_history = build_chat_history(history_messages)
 
     # For live update requests, use direct API for speed
-    if "live update" in q and cache.get(f"cricket_live_update_active_{thread_id}"):
+    if "live update" in q and await cache.aget(f"cricket_live_update_active_{thread_id}"):
         match_key = f"cricket_live_update_match_{thread_id}"
-        match_query = cache.get(match_key)
+        match_query = await cache.aget(match_key)
         
         if match_query:
             print(f"Getting live update for {match_query} (thread: {thread_id})")
             # Direct API call for speed
-            update = livescore6_specific_match(match_query)
+            update = await sync_to_async(livescore6_specific_match, thread_sensitive=False)(match_query)
             
             # If no match data, try Tavily
             if "no matching match" in update.lower() or "error" in update.lower():
-                update = tavily_cricket(f"{match_query} latest live score OR current result OR update")
+                update = await tavily_cricket.ainvoke(f"{match_query} latest live score OR current result OR update")
             
             return update, None
 
     # Normal agent flow for regular queries
+    cache_key = None
+    if response_cache_enabled():
+        cache_key = build_cache_key("cricket", llm.model_name, SYSTEM_PROMPT, query, history_messages)
+        cached_answer = await alookup_response(cache_key)
+        if cached_answer is not None:
+            # Served without a model call, so there is no usage to bill.
+            return cached_answer, None
+
     try:
-        with get_openai_callback() as callback:
-            result = agent_executor.invoke({
-                "input": query,
-                "chat_history": chat_history
-            })
+        result, usage = await ainvoke_agent(agent_executor, {
+            "input": query,
+            "chat_history": chat_history
+        }, bill_user=user if track_tokens else None, label="cricket")
 
         answer = result["output"].strip()
-        usage = extract_token_usage(callback)
+        if cache_key:
+            await astore_response(cache_key, answer)
 
         if track_tokens and user:
             try:
-                profile = get_or_create_billing_profile(user)
-                record_token_usage(profile, **usage)
+                profile = await sync_to_async(get_cached_billing_profile)(user)
+                await sync_to_async(record_token_usage)(profile, **usage)
             except Exception as usage_error:
                 print(f"[WARN] Cricket token usage recording failed: {usage_error}")
 
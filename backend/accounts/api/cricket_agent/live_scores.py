@@ -0,0 +1,153 @@
+# backend/accounts/api/cricket_agent/live_scores.py
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
+
+from .tools import find_match_event, get_match_snapshot, match_key_for_teams, parse_match_query, render_match_event
+
+POLL_INTERVAL = 10        # seconds between snapshot refreshes
+DATE_FORMAT = "%Y%m%d"
+
+# ────────────────────────────────────────────────
+# One poller shared by every live-update stream in this process. The date
+# is taken afresh on every cycle, so a stream left open past midnight moves
+# on to the new day's matches; a match that started the day before is still
+# looked up in that day's snapshot. Across processes the upstream call is
+# deduplicated by the shared Redis snapshot, which only one process
+# refreshes at a time.
+# ────────────────────────────────────────────────
+
+
+class MatchSubscription:
+    """Receives rendered updates for one match, only when they change."""
+
+    def __init__(self, match_key, team1, team2):
+        self.match_key = match_key
+        self.team1 = team1
+        self.team2 = team2
+        # Only the latest state matters; a slow client skips stale updates.
+        self.queue = asyncio.Queue(maxsize=1)
+
+    def offer(self, update: str):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(update)
+
+    async def get(self, timeout=None):
+        """Wait for the next update; returns None when `timeout` elapses."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LiveScorePoller:
+    def __init__(self):
+        self.subscriptions = {}     # match_key -> set[MatchSubscription]
+        self.last_rendered = {}     # match_key -> last published text
+        self.last_etags = ()
+        self.task = None
+
+    def add(self, subscription: MatchSubscription):
+        self.subscriptions.setdefault(subscription.match_key, set()).add(subscription)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    def remove(self, subscription: MatchSubscription):
+        subscribers = self.subscriptions.get(subscription.match_key)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            self.subscriptions.pop(subscription.match_key, None)
+            self.last_rendered.pop(subscription.match_key, None)
+
+    def find(self, snapshots: list, match_key):
+        sample = next(iter(self.subscriptions.get(match_key) or ()), None)
+        if sample is None:
+            return None
+        for snapshot in snapshots:
+            match = find_match_event(snapshot, sample.team1, sample.team2)
+            if match:
+                return match
+        return None
+
+    async def fetch(self) -> list:
+        """Today's snapshot, plus yesterday's while a subscribed match is missing from it."""
+        now = datetime.now()
+        snapshots = [await sync_to_async(get_match_snapshot, thread_sensitive=False)(
+            now.strftime(DATE_FORMAT), max_age=POLL_INTERVAL
+        )]
+        if any(self.find(snapshots, match_key) is None for match_key in list(self.subscriptions)):
+            snapshots.append(await sync_to_async(get_match_snapshot, thread_sensitive=False)(
+                (now - timedelta(days=1)).strftime(DATE_FORMAT), max_age=POLL_INTERVAL
+            ))
+        return snapshots
+
+    def publish(self, snapshots: list):
+        for match_key in list(self.subscriptions):
+            subscribers = self.subscriptions.get(match_key)
+            if not subscribers:
+                continue
+            match = self.find(snapshots, match_key)
+            update = render_match_event(match) if match else "no matching match found"
+            if update == self.last_rendered.get(match_key):
+                continue
+            self.last_rendered[match_key] = update
+            for subscription in list(subscribers):
+                subscription.offer(update)
+
+    async def run(self):
+        global _poller
+        try:
+            while self.subscriptions:
+                await asyncio.sleep(POLL_INTERVAL)
+                if not self.subscriptions:
+                    break
+                try:
+                    snapshots = await self.fetch()
+                except Exception as exc:
+                    print(f"Live score poll failed: {exc}")
+                    continue
+                # Unchanged snapshots cannot change any subscriber's view.
+                etags = tuple(snapshot["etag"] for snapshot in snapshots)
+                if etags == self.last_etags:
+                    continue
+                self.last_etags = etags
+                self.publish(snapshots)
+        finally:
+            if _poller is self and not self.subscriptions:
+                _poller = None
+
+
+_poller = None
+
+
+@asynccontextmanager
+async def subscribe_to_match(match_query: str, initial_update: str = ""):
+    """
+    Yield a MatchSubscription fed by the shared score poller.
+
+    `initial_update` is what the caller already showed the client; it seeds
+    the diff so the first poll does not repeat it.
+    """
+    global _poller
+    parsed = parse_match_query(match_query)
+    if not parsed:
+        raise ValueError("Match query must look like 'team1 vs team2'.")
+
+    team1, team2 = parsed
+    poller = _poller
+    if poller is None:
+        poller = _poller = LiveScorePoller()
+
+    subscription = MatchSubscription(match_key_for_teams(team1, team2), team1, team2)
+    if initial_update and subscription.match_key not in poller.last_rendered:
+        poller.last_rendered[subscription.match_key] = initial_update
+    poller.add(subscription)
+    try:
+        yield subscription
+    finally:
+        poller.remove(subscription)
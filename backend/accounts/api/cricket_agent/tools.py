@@ -3,7 +3,11 @@ from langchain.tools import Tool
 from langchain_community.tools.tavily_search import TavilySearchResults
 import requests
 from datetime import datetime
+from functools import lru_cache
+import hashlib
+import json
 import os, re
+import time
 from django.core.cache import cache  # ← Django cache (Redis backend)
 from dotenv import load_dotenv
 
@@ -20,11 +24,6 @@ HEADERS = {
     "X-RapidAPI-Host": RAPIDAPI_HOST
 }
 
-# Cache TTLs (in seconds)
-DAILY_CACHE_TTL = 60      # 1 minute — good for daily overview
-LIVE_CACHE_TTL = 30       # 30 seconds — live data changes fast
-SPECIFIC_CACHE_TTL = 120   # 1 minute — per-query cache
-
 # ────────────────────────────────────────────────
 # Formatting helpers (unchanged)
 # ────────────────────────────────────────────────
@@ -158,255 +157,342 @@ search = TavilySearchResults(
     include_raw_content=False,
 )
 
-def livescore6_daily(query: str) -> str:
-    cache_key = f"cricket:daily:{datetime.now().strftime('%Y%m%d')}"
+MATCH_QUERY_FILLER_RE = re.compile(r'\b(keep|sending|updates|for|live|automatic|every|minute|second|please|now|the)\b')
+
+
+# Canonical team name → aliases seen in queries and in LiveScore6 names
+TEAM_ALIASES = {
+    # International men
+    "australia": ["australia", "aus"],
+    "india": ["india", "ind"],
+    "pakistan": ["pakistan", "pak"],
+    "england": ["england", "eng"],
+    "south africa": ["south africa", "sa", "rsa"],
+    "new zealand": ["new zealand", "nz"],
+    "sri lanka": ["sri lanka", "sl"],
+    "west indies": ["west indies", "wi"],
+    "bangladesh": ["bangladesh", "ban"],
+    "afghanistan": ["afghanistan", "afg"],
+    "zimbabwe": ["zimbabwe", "zim"],
+    "ireland": ["ireland", "ire"],
+    "scotland": ["scotland", "sco"],
+    "netherlands": ["netherlands", "ned"],
+
+    # Women
+    "australia women": ["australia women", "aus w", "australia w"],
+    "india women": ["india women", "ind w", "india w"],
+    "england women": ["england women", "eng w", "england w"],
+    "new zealand women": ["new zealand women", "nz w", "new zealand w"],
+
+    # New Zealand domestic
+    "auckland aces": ["auckland aces", "auckland", "aces"],
+    "canterbury kings": ["canterbury kings", "canterbury", "kings"],
+    "wellington firebirds": ["wellington firebirds", "wellington", "firebirds"],
+    "otago volts": ["otago volts", "otago", "volts"],
+    "northern districts": ["northern districts", "northern"],
+    "central districts": ["central districts", "central"],
+
+    # South Africa domestic
+    "eastern cape iinyathi": ["eastern cape iinyathi", "eastern cape", "iinyathi"],
+    "eastern storm": ["eastern storm", "storm"],
+    "limpopo impalas": ["limpopo impalas", "limpopo", "impalas"],
+    "mpumalanga rhinos": ["mpumalanga rhinos", "mpumalanga", "rhinos"],
+    "knights": ["knights", "free state"],
+    "dolphins": ["dolphins", "kzn"],
+    "lions": ["lions", "gauteng"],
+    "titans": ["titans", "northerns"],
+    "warriors": ["warriors", "border"],
+    "western province": ["western province", "wp"],
+}
+
+TEAM_ALIAS_LOOKUP = {
+    alias: standard
+    for standard, aliases in TEAM_ALIASES.items()
+    for alias in aliases
+}
+
+# One alternation over every alias, longest first, so the leftmost match is
+# also the most specific one ("australia women" wins over "australia").
+TEAM_ALIAS_RE = re.compile(
+    r'\b(' + '|'.join(re.escape(alias) for alias in sorted(TEAM_ALIAS_LOOKUP, key=len, reverse=True)) + r')\b'
+)
+
+
+@lru_cache(maxsize=2048)
+def normalize_team(team_name: str) -> str:
+    """Convert a team name to its canonical form using whole-word alias matching."""
+    team_lower = team_name.lower()
+    match = TEAM_ALIAS_RE.search(team_lower)
+    if match:
+        return TEAM_ALIAS_LOOKUP[match.group(1)]
+    return team_lower  # fallback: return as-is
+
+
+# ────────────────────────────────────────────────
+# LiveScore6 snapshot — one list-by-date fetch, normalized once and shared
+# through Redis by the daily, live and specific-match tools.
+# ────────────────────────────────────────────────
+
+SNAPSHOT_TTL = 30             # seconds a snapshot is served without revalidating
+SNAPSHOT_RETENTION = 6 * 3600  # stale snapshots are kept for conditional refetches
+SNAPSHOT_LOCK_TTL = 15
+
+LIVE_STATUS_WORDS = ("live", "progress", "stump", "innings", "rain", "delay")
+
+
+class LiveScoreAPIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"API returned status {status_code}")
+        self.status_code = status_code
+
+
+def is_live_status(status: str) -> bool:
+    status = (status or "").lower()
+    return any(word in status for word in LIVE_STATUS_WORDS)
+
+
+def _normalize_team_entry(teams):
+    team = (teams or [{}])[0]
+    name = team.get("Nm", "")
+    return {
+        "name": name,
+        "short": team.get("Snm", "").lower(),
+        "canonical": normalize_team(name),
+    }
+
+
+def _normalize_event(event: dict) -> dict:
+    return {
+        "name": event.get("Esnm") or "",
+        "status": event.get("EpsL") or "",
+        "result": event.get("ECo") or "",
+        "team1": _normalize_team_entry(event.get("T1")),
+        "team2": _normalize_team_entry(event.get("T2")),
+        "score1": [event.get("Tr1C1"), event.get("Tr1CW1"), event.get("Tr1CO1")],
+        "score2": [event.get("Tr2C1"), event.get("Tr2CW1"), event.get("Tr2CO1")],
+    }
+
+
+def _pair_key(team1_norm: str, team2_norm: str) -> str:
+    return "|".join(sorted((team1_norm, team2_norm)))
+
+
+def build_match_snapshot(data: dict, date_str: str, upstream_etag: str = "") -> dict:
+    """
+    Reduce a list-by-date payload to the fields the tools render, plus a
+    canonical-team-pair index so specific-match lookups are a dict hit.
+    """
+    stages = []
+    pairs = {}
+    for stage in data.get("Stages", []):
+        matches = [_normalize_event(event) for event in stage.get("Events", [])]
+        if not matches:
+            continue
+        stage_index = len(stages)
+        stages.append({"name": stage.get("name") or "Cricket", "matches": matches})
+        for match_index, match in enumerate(matches):
+            key = _pair_key(match["team1"]["canonical"], match["team2"]["canonical"])
+            pairs.setdefault(key, [stage_index, match_index])
+
+    body = json.dumps(stages, sort_keys=True, separators=(",", ":"))
+    return {
+        "date": date_str,
+        "fetched_at": time.time(),
+        "upstream_etag": upstream_etag,
+        "etag": hashlib.sha1(body.encode("utf-8")).hexdigest()[:16],
+        "stages": stages,
+        "pairs": pairs,
+    }
+
+
+def fetch_matches_by_date(date_str: str, upstream_etag: str = ""):
+    """
+    Fetch the raw list-by-date payload. Returns (status_code, data, etag);
+    data is None on 304 Not Modified.
+    """
+    headers = dict(HEADERS)
+    if upstream_etag:
+        headers["If-None-Match"] = upstream_etag
+    resp = requests.get(
+        f"https://{RAPIDAPI_HOST}/matches/v2/list-by-date",
+        headers=headers,
+        params={"Category": "cricket", "Date": date_str},
+        timeout=12
+    )
+    if resp.status_code != 200:
+        return resp.status_code, None, upstream_etag
+    return resp.status_code, resp.json(), resp.headers.get("ETag", "")
+
+
+def get_match_snapshot(date_str: str = None, max_age: int = SNAPSHOT_TTL) -> dict:
+    """
+    Return the normalized snapshot for `date_str` (today by default).
+
+    A snapshot younger than `max_age` is served from Redis. Older ones are
+    revalidated with the upstream ETag; only one process refetches at a time
+    and the rest keep serving the stale copy meanwhile. If the refetch fails
+    (rate limit, timeout), the stale copy is returned too; the error is only
+    raised when nothing was cached.
+    """
+    date_str = date_str or datetime.now().strftime("%Y%m%d")
+    snapshot_key = f"cricket:snapshot:{date_str}"
+    lock_key = f"cricket:snapshot:lock:{date_str}"
+
+    snapshot = cache.get(snapshot_key)
+    if snapshot and time.time() - snapshot["fetched_at"] < max_age:
+        return snapshot
+
+    locked = cache.add(lock_key, True, timeout=SNAPSHOT_LOCK_TTL)
+    if snapshot and not locked:
+        print(f"Snapshot refresh in progress - serving stale cricket:{date_str}")
+        return snapshot
+
+    failed = False
+    try:
+        upstream_etag = snapshot.get("upstream_etag", "") if snapshot else ""
+        try:
+            status_code, data, etag = fetch_matches_by_date(date_str, upstream_etag)
+            if status_code == 304 and snapshot:
+                snapshot["fetched_at"] = time.time()
+            elif status_code == 200:
+                snapshot = build_match_snapshot(data, date_str, etag)
+            else:
+                raise LiveScoreAPIError(status_code)
+        except Exception as exc:
+            if not snapshot:
+                raise
+            failed = True
+            print(f"Snapshot refresh failed ({exc}) - serving stale cricket:{date_str}")
+            return snapshot
+
+        cache.set(snapshot_key, snapshot, timeout=SNAPSHOT_RETENTION)
+        return snapshot
+    finally:
+        # After a failure the lock is left to expire, so for SNAPSHOT_LOCK_TTL
+        # everyone serves the stale copy instead of retrying the upstream.
+        if locked and not failed:
+            cache.delete(lock_key)
+
+
+def parse_match_query(query: str):
+    """Split a 'team1 vs team2' query into cleaned team names, or None."""
+    vs_parts = re.split(r'\s+vs?\s+', query.lower())
+    if len(vs_parts) != 2:
+        return None
+
+    team1_clean = MATCH_QUERY_FILLER_RE.sub('', vs_parts[0].strip()).strip()
+    team2_clean = MATCH_QUERY_FILLER_RE.sub('', vs_parts[1].strip()).strip()
+    return team1_clean, team2_clean
+
+
+def match_key_for_teams(team1_clean: str, team2_clean: str) -> str:
+    # Sort team names to ensure a consistent key regardless of order
+    teams = sorted([team1_clean, team2_clean])
+    return f"{teams[0]}:{teams[1]}"
+
+
+def find_match_event(snapshot: dict, team1_clean: str, team2_clean: str):
+    """Return the snapshot match for the two teams, or None."""
+    team1_norm = normalize_team(team1_clean)
+    team2_norm = normalize_team(team2_clean)
     
-    cached = cache.get(cache_key)
-    if cached:
-        print("Cache HIT - daily matches")
-        return cached + "\n*(cached — updated recently)*"
+    print(f"Normalized: '{team1_norm}' vs '{team2_norm}'")
+
+    position = snapshot["pairs"].get(_pair_key(team1_norm, team2_norm))
+    if position:
+        stage_index, match_index = position
+        return snapshot["stages"][stage_index]["matches"][match_index]
+    
+    # Fall back to short names when the full names did not line up
+    for stage in snapshot["stages"]:
+        for match in stage["matches"]:
+            t1, t2 = match["team1"], match["team2"]
+            if (team1_norm in t1["short"] and team2_norm in t2["short"]) or \
+               (team1_norm in t2["short"] and team2_norm in t1["short"]):
+                # Verify it's the same teams by checking full names
+                if (team1_norm in t1["canonical"] or team1_norm in t2["canonical"]) and \
+                   (team2_norm in t1["canonical"] or team2_norm in t2["canonical"]):
+                    print(f"✓ Found via short names: {t1['name']} vs {t2['name']}")
+                    return match
+    return None
+
+
+def _score_value(value):
+    return "?" if value is None else value
+
+
+def render_match_event(match: dict) -> str:
+    """Render a single snapshot match as the specific-match Markdown block."""
+    t1_name = match["team1"]["name"] or "Team 1"
+    t2_name = match["team2"]["name"] or "Team 2"
+
+    # Check if match is live
+    status = match["status"].lower()
+    if not is_live_status(status):
+        print(f"Match found but not live: {status}")
+        return f"no matching match found - {t1_name.lower()} vs {t2_name.lower()} is not currently live (Status: {status})"
+    
+    # Get scores
+    t1_runs, t1_wickets, t1_overs = (_score_value(v) for v in match["score1"])
+    t2_runs, t2_wickets, t2_overs = (_score_value(v) for v in match["score2"])
+    
+    # Format scores nicely
+    t1_score = f"{t1_runs}/{t1_wickets}" if t1_wickets != '?' else t1_runs
+    t2_score = f"{t2_runs}/{t2_wickets}" if t2_wickets != '?' else t2_runs
     
+    result_text = match["result"]
+    
+    content = f"# 🏏 **{t1_name} vs {t2_name}**\n\n"
+    content += f"**{t1_name}:** {t1_score} ({t1_overs} ov)\n"
+    content += f"**{t2_name}:** {t2_score} ({t2_overs} ov)\n"
+    content += f"**Status:** *{status}*\n"
+    if result_text:
+        content += f"**Result:** {result_text}\n"
+    return content
+
+
+def livescore6_daily(query: str) -> str:
     try:
-        today_str = datetime.now().strftime("%Y%m%d")
-        resp = requests.get(
-            f"https://{RAPIDAPI_HOST}/matches/v2/list-by-date",
-            headers=HEADERS,
-            params={"Category": "cricket", "Date": today_str},
-            timeout=12
-        )
-        
-        if resp.status_code == 200:
-            content = format_livescore6_matches(resp.json(), query)
-            if not content or not content.strip():
-                content = "No cricket matches found today or data was empty."
-        else:
-            content = f"API returned status {resp.status_code}. No match data available."
-        
-        cache.set(cache_key, content, timeout=120)  # 1 minute
+        content = format_livescore6_matches(get_match_snapshot(), query)
+        if not content or not content.strip():
+            content = "No cricket matches found today or data was empty."
         return content
-    
+    except LiveScoreAPIError as e:
+        return f"API returned status {e.status_code}. No match data available."
     except Exception as e:
         return f"livescore6_daily failed: {str(e)[:300]}"
 
 def livescore6_live(query: str) -> str:
-    cache_key = "cricket:live:current"
-    
-    cached = cache.get(cache_key)
-    if cached:
-        print("Cache HIT - live matches")
-        return cached + "\n*(cached — updated recently)*"
-    
     try:
-        resp = requests.get(
-            f"https://{RAPIDAPI_HOST}/matches/v2/list-live",
-            headers=HEADERS,
-            params={"Category": "cricket"},
-            timeout=12
-        )
-        
-        if resp.status_code == 200:
-            content = format_livescore6_matches(resp.json(), query, live_only=True)
-            if not content or not content.strip():
-                content = "No live cricket matches right now."
-        else:
-            content = f"API returned status {resp.status_code}. No live data."
-        
-        cache.set(cache_key, content, timeout=120)  # 30 seconds for live
+        content = format_livescore6_matches(get_match_snapshot(), query, live_only=True)
+        if not content or not content.strip():
+            content = "No live cricket matches right now."
         return content
-    
+    except LiveScoreAPIError as e:
+        return f"API returned status {e.status_code}. No live data."
     except Exception as e:
         return f"livescore6_live failed: {str(e)[:300]}"
 
-# backend/accounts/api/cricket_agent/tools.py
-
 def livescore6_specific_match(query: str) -> str:
     """Get live score for a specific match - ONLY returns exact match, no fallbacks"""
     
-    # First, extract clean team names from query
-    query_lower = query.lower()
-    
     # Parse the "team1 vs team2" pattern
-    vs_parts = re.split(r'\s+vs?\s+', query_lower)
-    if len(vs_parts) != 2:
+    parsed = parse_match_query(query)
+    if not parsed:
         return "no matching match found - invalid query format"
-    
-    team1_raw = vs_parts[0].strip()
-    team2_raw = vs_parts[1].strip()
-    
-    # Remove common words
-    team1_clean = re.sub(r'\b(keep|sending|updates|for|live|automatic|every|minute|second|please|now|the)\b', '', team1_raw).strip()
-    team2_clean = re.sub(r'\b(keep|sending|updates|for|live|automatic|every|minute|second|please|now|the)\b', '', team2_raw).strip()
-    
-    # Sort team names to ensure consistent cache key regardless of order
-    teams = sorted([team1_clean, team2_clean])
-    cache_key = f"cricket:match:{teams[0]}:{teams[1]}:{datetime.now().strftime('%Y%m%d')}"
-    
-    print(f"🔑 Cache key: {cache_key}")
-
-    # Check cache
-    cached = cache.get(cache_key)
-    if cached:
-        if cached.startswith("no matching match"):
-            print(f"Cache contained 'no match' for {query}, ignoring cache")
-            cache.delete(cache_key)
-        else:
-            print(f"Cache HIT - specific match: {query}")
-            return cached
+    team1_clean, team2_clean = parsed
 
     try:
-        today_str = datetime.now().strftime("%Y%m%d")
-        resp = requests.get(
-            f"https://{RAPIDAPI_HOST}/matches/v2/list-by-date",
-            headers=HEADERS,
-            params={"Category": "cricket", "Date": today_str},
-            timeout=12
-        )
-        
-        if resp.status_code != 200:
-            return f"API error: {resp.status_code}"
-        
-        data = resp.json()
-        stages = data.get("Stages", [])
-        
-        # Comprehensive team map (full name → possible variations)
-        # Order matters: more specific entries first
-        team_map = {
-            # International men
-            "australia": ["australia", "aus"],
-            "india": ["india", "ind"],
-            "pakistan": ["pakistan", "pak"],
-            "england": ["england", "eng"],
-            "south africa": ["south africa", "sa", "rsa"],
-            "new zealand": ["new zealand", "nz"],
-            "sri lanka": ["sri lanka", "sl"],
-            "west indies": ["west indies", "wi"],
-            "bangladesh": ["bangladesh", "ban"],
-            "afghanistan": ["afghanistan", "afg"],
-            "zimbabwe": ["zimbabwe", "zim"],
-            "ireland": ["ireland", "ire"],
-            "scotland": ["scotland", "sco"],
-            "netherlands": ["netherlands", "ned"],
-            
-            # Women
-            "australia women": ["australia women", "aus w", "australia w"],
-            "india women": ["india women", "ind w", "india w"],
-            "england women": ["england women", "eng w", "england w"],
-            "new zealand women": ["new zealand women", "nz w", "new zealand w"],
-            
-            # New Zealand domestic
-            "auckland aces": ["auckland aces", "auckland", "aces"],
-            "canterbury kings": ["canterbury kings", "canterbury", "kings"],
-            "wellington firebirds": ["wellington firebirds", "wellington", "firebirds"],
-            "otago volts": ["otago volts", "otago", "volts"],
-            "northern districts": ["northern districts", "northern"],
-            "central districts": ["central districts", "central"],
-            
-            # South Africa domestic
-            "eastern cape iinyathi": ["eastern cape iinyathi", "eastern cape", "iinyathi"],
-            "eastern storm": ["eastern storm", "storm"],
-            "limpopo impalas": ["limpopo impalas", "limpopo", "impalas"],
-            "mpumalanga rhinos": ["mpumalanga rhinos", "mpumalanga", "rhinos"],
-            "knights": ["knights", "free state"],
-            "dolphins": ["dolphins", "kzn"],
-            "lions": ["lions", "gauteng"],
-            "titans": ["titans", "northerns"],
-            "warriors": ["warriors", "border"],
-            "western province": ["western province", "wp"],
-        }
-        
-        def normalize_team(team_name):
-            """Convert team name to standard form using whole-word matching"""
-            team_lower = team_name.lower()
-            for standard, variations in team_map.items():
-                for var in variations:
-                    # Use word boundaries to avoid substring false positives
-                    pattern = r'\b' + re.escape(var) + r'\b'
-                    if re.search(pattern, team_lower):
-                        return standard
-            return team_lower  # fallback: return as-is
-        
-        team1_norm = normalize_team(team1_clean)
-        team2_norm = normalize_team(team2_clean)
-        
-        print(f"Normalized: '{team1_norm}' vs '{team2_norm}'")
-        
-        exact_match = None
-        
-        # Search through all events
-        for stage in stages:
-            for event in stage.get("Events", []):
-                # Get team names from API
-                t1_full = event.get("T1", [{}])[0].get("Nm", "").lower()
-                t2_full = event.get("T2", [{}])[0].get("Nm", "").lower()
-                t1_short = event.get("T1", [{}])[0].get("Snm", "").lower()
-                t2_short = event.get("T2", [{}])[0].get("Snm", "").lower()
-                
-                # Normalize API team names as well
-                event_team1_norm = normalize_team(t1_full)
-                event_team2_norm = normalize_team(t2_full)
-                
-                # Check if this match matches the query (in either order)
-                if (team1_norm == event_team1_norm and team2_norm == event_team2_norm) or \
-                   (team1_norm == event_team2_norm and team2_norm == event_team1_norm):
-                    # Found exact match
-                    exact_match = event
-                    print(f"✓ Found exact match: {t1_full} vs {t2_full}")
-                    break
-                
-                # Also try short names if exact match not found
-                if (team1_norm in t1_short and team2_norm in t2_short) or \
-                   (team1_norm in t2_short and team2_norm in t1_short):
-                    # Verify it's the same teams by checking full names
-                    if (team1_norm in event_team1_norm or team1_norm in event_team2_norm) and \
-                       (team2_norm in event_team1_norm or team2_norm in event_team2_norm):
-                        exact_match = event
-                        print(f"✓ Found via short names: {t1_full} vs {t2_full}")
-                        break
-            if exact_match:
-                break
-        
+        exact_match = find_match_event(get_match_snapshot(), team1_clean, team2_clean)
         if exact_match:
-            # Check if match is live
-            status = exact_match.get("EpsL", "").lower()
-            is_live = any(word in status for word in ["live", "progress", "stump", "innings", "rain", "delay"])
-            
-            if not is_live:
-                print(f"Match found but not live: {status}")
-                return f"no matching match found - {t1_full} vs {t2_full} is not currently live (Status: {status})"
-            
-            # Format the response
-            t1_name = exact_match.get("T1", [{}])[0].get("Nm", "Team 1")
-            t2_name = exact_match.get("T2", [{}])[0].get("Nm", "Team 2")
-            
-            # Get scores
-            t1_runs = exact_match.get('Tr1C1', '?')
-            t1_wickets = exact_match.get('Tr1CW1', '?')
-            t1_overs = exact_match.get('Tr1CO1', '?')
-            t2_runs = exact_match.get('Tr2C1', '?')
-            t2_wickets = exact_match.get('Tr2CW1', '?')
-            t2_overs = exact_match.get('Tr2CO1', '?')
-            
-            # Format scores nicely
-            t1_score = f"{t1_runs}/{t1_wickets}" if t1_wickets != '?' else t1_runs
-            t2_score = f"{t2_runs}/{t2_wickets}" if t2_wickets != '?' else t2_runs
-            
-            result_text = exact_match.get("ECo", "")
-            
-            content = f"# 🏏 **{t1_name} vs {t2_name}**\n\n"
-            content += f"**{t1_name}:** {t1_score} ({t1_overs} ov)\n"
-            content += f"**{t2_name}:** {t2_score} ({t2_overs} ov)\n"
-            content += f"**Status:** *{status}*\n"
-            if result_text:
-                content += f"**Result:** {result_text}\n"
-            
-            
-            cache.set(cache_key, content, timeout=10)
-            return content
+            return render_match_event(exact_match)
         
         # No match found
         print(f"❌ No match found for {team1_clean} vs {team2_clean}")
         return "no matching match found"
-        
+
+    except LiveScoreAPIError as e:
+        return f"API error: {e.status_code}"
     except Exception as e:
         print(f"Error in livescore6_specific_match: {str(e)}")
         return f"Error fetching match details"
@@ -457,10 +543,10 @@ def cricket_search_tool(query: str) -> str:
     except Exception as e:
         return f"cricket_search tool failed: {str(e)[:200]}"
 
-def format_livescore6_matches(data: dict, query: str, live_only: bool = False) -> str:
+def format_livescore6_matches(snapshot: dict, query: str, live_only: bool = False) -> str:
     lines = [f"# 🏏 Cricket Update – {TODAY_STR}\n"]
 
-    stages = data.get("Stages", [])
+    stages = snapshot.get("stages", [])
     if not stages:
         return "No cricket matches found today."
 
@@ -469,21 +555,25 @@ def format_livescore6_matches(data: dict, query: str, live_only: bool = False) -
     else:
         lines.append("## Today's Matches\n")
 
+    has_matches = False
     for stage in stages:
-        stage_name = stage.get("name") or "Cricket"
-        events = stage.get("Events", [])
-        if not events:
+        matches = stage["matches"]
+        if live_only:
+            matches = [match for match in matches if is_live_status(match["status"])]
+        if not matches:
             continue
 
-        lines.append(f"### {stage_name}")
-        for event in events[:5]:
-            name = event.get("Esnm") or "Match"
-            status = event.get("EpsL") or "N/A"
-            result = event.get("ECo") or ""
-            t1 = event.get("T1", [{}])[0].get("Nm", "T1")
-            t2 = event.get("T2", [{}])[0].get("Nm", "T2")
-            score1 = f"{event.get('Tr1C1', '?')}/{event.get('Tr1CW1', '?')} ({event.get('Tr1CO1', '?')})"
-            score2 = f"{event.get('Tr2C1', '?')}/{event.get('Tr2CW1', '?')} ({event.get('Tr2CO1', '?')})"
+        has_matches = True
+        lines.append(f"### {stage['name']}")
+        for match in matches[:5]:
+            status = match["status"] or "N/A"
+            result = match["result"]
+            t1 = match["team1"]["name"] or "T1"
+            t2 = match["team2"]["name"] or "T2"
+            runs1, wickets1, overs1 = (_score_value(v) for v in match["score1"])
+            runs2, wickets2, overs2 = (_score_value(v) for v in match["score2"])
+            score1 = f"{runs1}/{wickets1} ({overs1})"
+            score2 = f"{runs2}/{wickets2} ({overs2})"
 
             lines.append(f"**{t1}** {score1} vs **{t2}** {score2}")
             lines.append(f"Status: {status}")
@@ -491,6 +581,9 @@ def format_livescore6_matches(data: dict, query: str, live_only: bool = False) -
                 lines.append(f"Result: {result}")
             lines.append("")
 
+    if live_only and not has_matches:
+        return "No live cricket matches right now."
+
     lines.append("---\n*Live cricket data* 🏏")
     return "\n".join(lines)
 
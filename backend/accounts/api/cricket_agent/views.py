@@ -1,9 +1,10 @@
+import asyncio
 import time
 from datetime import datetime
 
-from django.conf import settings
+from asgiref.sync import sync_to_async
 from django.core.cache import cache
-from django.http import JsonResponse, StreamingHttpResponse
+from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST
 
@@ -13,15 +14,20 @@ from accounts.api.access import (
     sse_error_response,
     sse_token_limit_response,
 )
+from accounts.api.billing.services import token_quota_reached
+from accounts.api.context_window import aget_context_window
+from accounts.api.live_control import LIVE_STREAM_MAX_SECONDS, asend_stop_signal, live_stop_event, next_update
 from accounts.api.persistence import (
     assign_agent_to_conversation,
     create_message,
     get_builtin_agent,
-    get_recent_context_messages,
     get_user_conversation,
+    save_streaming_text,
     update_message,
 )
+from accounts.api.sse import EventWriter, resume_frames, sse_response
 from .agent import get_cricket_response, reset_cricket_chat
+from .live_scores import subscribe_to_match
 from .tools import livescore6_specific_match
 
 
@@ -78,40 +84,48 @@ def is_live_update_request(query: str) -> bool:
 
 @csrf_exempt
 @require_GET
-def cricket_stream(request):
-    user = authenticate_request_user(request, allow_query_token=True)
+async def cricket_stream(request):
+    user = await sync_to_async(authenticate_request_user)(request, allow_query_token=True)
     if not user:
         return sse_error_response("Authentication required. Please sign in again.")
-    billing_profile = get_user_billing_profile(user, sync_remote=True)
+    billing_profile = await sync_to_async(get_user_billing_profile)(user)
     if not billing_profile or not billing_profile.is_paid:
         return sse_error_response("Upgrade to Pro to use domain agents.")
 
     query = request.GET.get("text", "").strip()
     chat_id = request.GET.get("chat_id", "").strip()
-    conversation = get_user_conversation(user, chat_id)
+    conversation = await sync_to_async(get_user_conversation)(user, chat_id)
     if not conversation:
         return sse_error_response("Conversation not found.")
+    resumed = await sync_to_async(resume_frames)(request, conversation)
+    if resumed is not None:
+        return sse_response(resumed)
 
-    builtin_agent = get_builtin_agent("builtin-cricket")
+    builtin_agent = await sync_to_async(get_builtin_agent)("builtin-cricket")
     if builtin_agent:
-        assign_agent_to_conversation(conversation, builtin_agent, conversation_type="domain_agent")
+        await sync_to_async(assign_agent_to_conversation)(conversation, builtin_agent, conversation_type="domain_agent")
 
     if not query:
         return JsonResponse({"error": "Query is required"}, status=400)
-    if not is_live_update_request(query) and billing_profile.token_total_used >= settings.PAID_MONTHLY_TOKEN_QUOTA:
+    if not is_live_update_request(query) and await sync_to_async(token_quota_reached)(billing_profile):
         return sse_token_limit_response("Token limit reached. Please wait until subscription renewal.")
 
-    previous_context = get_recent_context_messages(conversation, limit=10)
-    user_message = create_message(conversation, role="user", user=user, content_text=query)
+    previous_context = (await aget_context_window(conversation, model="x-ai/grok-4.1-fast")).messages
+    await sync_to_async(create_message)(conversation, role="user", user=user, content_text=query)
 
     q_lower = query.lower().strip()
     flag_key = f"cricket_live_update_active_{chat_id}"
     match_key = f"cricket_live_update_match_{chat_id}"
-    stop_signal_key = f"cricket_stop_signal_{chat_id}"
 
     if q_lower in ["stop", "stop updates", "end updates"]:
-        cache.set(stop_signal_key, True, timeout=60)
-        assistant_message = create_message(
+        was_active = bool(await cache.aget(flag_key))
+        await asend_stop_signal("cricket", chat_id)
+        if was_active:
+            # The live stream clears these itself; this covers a stream that
+            # is already gone.
+            await cache.adelete(flag_key)
+            await cache.adelete(match_key)
+        assistant_message = await sync_to_async(create_message)(
             conversation,
             role="assistant",
             content_text="Stopping live updates...",
@@ -119,21 +133,16 @@ def cricket_stream(request):
             message_type="normal",
         )
 
-        def stop_stream():
-            text = "Stopping live updates..." if cache.get(flag_key) else "No active live updates to stop."
-            if not cache.get(flag_key):
-                cache.delete(stop_signal_key)
-            update_message(assistant_message, content_text=text, status="completed")
-            for word in text.split(" "):
-                yield f"data: {word.replace(chr(10), '\\n')} \n\n"
-                time.sleep(0.02)
-            yield "data: [DONE]\n\n"
-
-        response = StreamingHttpResponse(stop_stream(), content_type='text/event-stream')
-        response['Cache-Control'] = 'no-cache'
-        response['X-Accel-Buffering'] = 'no'
-        response['Access-Control-Allow-Origin'] = '*'
-        return response
+        events = EventWriter(assistant_message.id)
+
+        async def stop_stream():
+            text = "Stopping live updates..." if was_active else "No active live updates to stop."
+            await sync_to_async(update_message)(assistant_message, content_text=text, status="completed")
+            for frame in events.text(text):
+                yield frame
+            yield events.done()
+
+        return sse_response(stop_stream())
 
     trigger_phrases = [
         "keep sending updates for",
@@ -163,28 +172,25 @@ def cricket_stream(request):
             if match_query.endswith(word):
                 match_query = match_query[:-len(word)].strip()
 
-        initial_check = livescore6_specific_match(match_query)
+        initial_check = await sync_to_async(livescore6_specific_match, thread_sensitive=False)(match_query)
         if initial_check.startswith("no matching match found"):
             message_text = (
                 f"{match_query} exists but is not currently live. Only live matches can get updates."
                 if "not currently live" in initial_check.lower()
                 else f"Sorry, no live match found for {match_query} right now."
             )
-            assistant_message = create_message(conversation, role="assistant", content_text=message_text, status="completed")
+            assistant_message = await sync_to_async(create_message)(conversation, role="assistant", content_text=message_text, status="completed")
+
+            events = EventWriter(assistant_message.id)
 
-            def error_stream():
-                for word in message_text.split(" "):
-                    yield f"data: {word.replace(chr(10), '\\n')} \n\n"
-                    time.sleep(0.02)
-                yield "data: [DONE]\n\n"
+            async def error_stream():
+                for frame in events.text(message_text):
+                    yield frame
+                yield events.done()
 
-            response = StreamingHttpResponse(error_stream(), content_type='text/event-stream')
-            response['Cache-Control'] = 'no-cache'
-            response['X-Accel-Buffering'] = 'no'
-            response['Access-Control-Allow-Origin'] = '*'
-            return response
+            return sse_response(error_stream())
 
-        assistant_message = create_message(
+        assistant_message = await sync_to_async(create_message)(
             conversation,
             role="assistant",
             content_text="",
@@ -192,78 +198,86 @@ def cricket_stream(request):
             message_type="live_update",
         )
 
-        cache.delete(stop_signal_key)
-        cache.set(flag_key, True, timeout=3600)
-        cache.set(match_key, match_query, timeout=3600)
+        await cache.aset(flag_key, True, timeout=3600)
+        await cache.aset(match_key, match_query, timeout=3600)
 
-        def live_stream():
+        events = EventWriter(assistant_message.id)
+
+        async def live_stream():
             accumulated = ""
             try:
-                start_text = f"Starting live updates for **{match_query}**. Updates every 10 seconds. Say 'stop' to end."
+                start_text = f"Starting live updates for **{match_query}**. Updates arrive as the score changes. Say 'stop' to end."
                 accumulated += start_text + "\n\n"
-                for word in start_text.split(" "):
-                    yield f"data: {word.replace(chr(10), '\\n')} \n\n"
-                    time.sleep(0.02)
+                yield events.live(True)
+                for frame in events.text(start_text):
+                    yield frame
 
                 initial_with_dashes = format_initial_update(initial_check)
                 accumulated += initial_with_dashes + "\n\n"
-                for word in initial_with_dashes.split(" "):
-                    yield f"data: {word.replace(chr(10), '\\n')} \n\n"
-                    time.sleep(0.02)
-
-                while cache.get(flag_key):
-                    stopped = False
-                    for _ in range(10):
-                        if cache.get(stop_signal_key):
-                            cache.delete(stop_signal_key)
-                            cache.delete(flag_key)
-                            cache.delete(match_key)
+                await sync_to_async(save_streaming_text)(assistant_message, accumulated)
+                for frame in events.text(initial_with_dashes):
+                    yield frame
+
+                # Scores come from the shared score poller and stops from the
+                # stream's stop channel; this stream only wakes up for either.
+                deadline = time.monotonic() + LIVE_STREAM_MAX_SECONDS
+                async with live_stop_event("cricket", chat_id) as stopped, \
+                        subscribe_to_match(match_query, initial_update=initial_check) as updates:
+                    # A stop sent before the channel was joined only cleared the flag.
+                    if not await cache.aget(flag_key):
+                        stopped.set()
+                    while True:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            await cache.adelete(flag_key)
+                            await cache.adelete(match_key)
+                            break
+
+                        update = await next_update(updates.get(), stopped, timeout=remaining)
+                        if stopped.is_set():
+                            await cache.adelete(flag_key)
+                            await cache.adelete(match_key)
                             stop_text = "\n\nLive updates stopped."
                             accumulated += stop_text
-                            for word in stop_text.split(" "):
-                                yield f"data: {word.replace(chr(10), '\\n')} \n\n"
-                                time.sleep(0.02)
-                            stopped = True
+                            for frame in events.text(stop_text):
+                                yield frame
                             break
-                        time.sleep(1)
-                    if stopped:
-                        break
-
-                    update = livescore6_specific_match(match_query)
-                    timestamp = datetime.now().strftime('%I:%M %p')
-                    if update.startswith("no matching match found") or "not currently live" in update.lower():
-                        cache.delete(flag_key)
-                        cache.delete(match_key)
-                        end_text = f"\n\n--- Match Ended ({timestamp}) ---\n\nThe match has finished or is no longer live. Live updates stopped."
-                        accumulated += end_text
-                        for word in end_text.split(" "):
-                            yield f"data: {word.replace(chr(10), '\\n')} \n\n"
-                            time.sleep(0.02)
-                        break
-
-                    concise = extract_concise_update(update)
-                    block = f"\n\nLive Update ({timestamp})\n\n{concise}"
-                    accumulated += block
-                    for word in block.split(" "):
-                        yield f"data: {word.replace(chr(10), '\\n')} \n\n"
-                        time.sleep(0.02)
-
-                update_message(assistant_message, content_text=accumulated.strip(), status="completed")
+                        if update is None:
+                            continue
+
+                        timestamp = datetime.now().strftime('%I:%M %p')
+                        if update.startswith("no matching match found") or "not currently live" in update.lower():
+                            await cache.adelete(flag_key)
+                            await cache.adelete(match_key)
+                            end_text = f"\n\n--- Match Ended ({timestamp}) ---\n\nThe match has finished or is no longer live. Live updates stopped."
+                            accumulated += end_text
+                            for frame in events.text(end_text):
+                                yield frame
+                            break
+
+                        concise = extract_concise_update(update)
+                        block = f"\n\nLive Update ({timestamp})\n\n{concise}"
+                        accumulated += block
+                        await sync_to_async(save_streaming_text)(assistant_message, accumulated)
+                        for frame in events.text(block):
+                            yield frame
+
+                yield events.live(False)
+                await sync_to_async(update_message)(assistant_message, content_text=accumulated.strip(), status="completed")
+            except (asyncio.CancelledError, GeneratorExit):
+                # The client disconnected: end the live session and keep the updates sent so far.
+                await cache.adelete(flag_key)
+                await cache.adelete(match_key)
+                await sync_to_async(update_message)(assistant_message, content_text=accumulated.strip(), status="interrupted")
+                raise
             except Exception as exc:
-                update_message(assistant_message, content_text=accumulated.strip(), status="failed")
-                error_text = f"[ERROR] {str(exc)}"
-                for word in error_text.split(" "):
-                    yield f"data: {word.replace(chr(10), '\\n')} \n\n"
-                    time.sleep(0.02)
-            yield "data: [DONE]\n\n"
-
-        response = StreamingHttpResponse(live_stream(), content_type='text/event-stream')
-        response['Cache-Control'] = 'no-cache'
-        response['X-Accel-Buffering'] = 'no'
-        response['Access-Control-Allow-Origin'] = '*'
-        return response
-
-    assistant_message = create_message(
+                await sync_to_async(update_message)(assistant_message, content_text=accumulated.strip(), status="failed")
+                yield events.error(str(exc))
+            yield events.done()
+
+        return sse_response(live_stream())
+
+    assistant_message = await sync_to_async(create_message)(
         conversation,
         role="assistant",
         content_text="",
@@ -272,30 +286,28 @@ def cricket_stream(request):
         model_used="x-ai/grok-4.1-fast",
     )
 
-    def regular_stream():
+    events = EventWriter(assistant_message.id)
+
+    async def regular_stream():
         accumulated = ""
         try:
-            response_text = get_cricket_response(query, thread_id=chat_id, history_messages=previous_context, user=user, track_tokens=True)
+            response_text = await get_cricket_response(query, thread_id=chat_id, history_messages=previous_context, user=user, track_tokens=True)
             if isinstance(response_text, tuple):
                 response_text, _ = response_text
             accumulated = response_text
-            for word in response_text.split(" "):
-                yield f"data: {word.replace(chr(10), '\\n')} \n\n"
-                time.sleep(0.02)
-            update_message(assistant_message, content_text=accumulated.strip(), status="completed")
+            for frame in events.text(response_text):
+                yield frame
+            await sync_to_async(update_message)(assistant_message, content_text=accumulated.strip(), status="completed")
+        except (asyncio.CancelledError, GeneratorExit):
+            # The client disconnected: keep what was generated so far.
+            await sync_to_async(update_message)(assistant_message, content_text=accumulated.strip(), status="interrupted")
+            raise
         except Exception as exc:
-            update_message(assistant_message, content_text=accumulated.strip(), status="failed")
-            error_text = f"[ERROR] {str(exc)}"
-            for word in error_text.split(" "):
-                yield f"data: {word.replace(chr(10), '\\n')} \n\n"
-                time.sleep(0.02)
-        yield "data: [DONE]\n\n"
-
-    response = StreamingHttpResponse(regular_stream(), content_type='text/event-stream')
-    response['Cache-Control'] = 'no-cache'
-    response['X-Accel-Buffering'] = 'no'
-    response['Access-Control-Allow-Origin'] = '*'
-    return response
+            await sync_to_async(update_message)(assistant_message, content_text=accumulated.strip(), status="failed")
+            yield events.error(str(exc))
+        yield events.done()
+
+    return sse_response(regular_stream())
 
 
 @csrf_exempt
@@ -1,15 +1,15 @@
 import os
 import re
+from asgiref.sync import sync_to_async
 from dotenv import load_dotenv
 from langchain.chat_models import init_chat_model
-from langchain_community.callbacks.manager import get_openai_callback
 from langchain_tavily import TavilySearch
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.agents import AgentExecutor, create_openai_tools_agent
-from langchain.tools import Tool
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from accounts.api.chat.documents import load_vectorstore
-from accounts.api.billing.services import extract_token_usage, get_or_create_billing_profile, record_token_usage
+from accounts.api.agent_registry import get_agent_executor, get_model_client
+from accounts.api.chat.retrieval import build_document_search_tool
+from accounts.api.billing.services import get_cached_billing_profile, record_token_usage
+from accounts.api.history import build_chat_history
+from accounts.api.llm_streaming import AgentTextStream
+from accounts.api.response_cache import alookup_response, aresponse_cache_applies, astore_response, build_cache_key
 
 load_dotenv()
 
@@ -193,20 +193,6 @@ DOCUMENT RULES:
     for purpose, role_prompt in ROLE_PROMPTS.items()
 }
 
-def build_chat_history(history_messages=None):
-    chat_history = []
-    for message in history_messages or []:
-        text = getattr(message, "content_text", "") or ""
-        role = getattr(message, "role", "")
-        if not text:
-            continue
-        if role == "user":
-            chat_history.append(HumanMessage(content=text))
-        elif role == "assistant":
-            chat_history.append(AIMessage(content=text))
-        elif role == "system":
-            chat_history.append(SystemMessage(content=text))
-    return chat_history
 
 #Initialize Model
 def init_custom_agent_model(model_id):
@@ -214,13 +200,15 @@ def init_custom_agent_model(model_id):
     if model_id not in MODEL_MAP:
         model_id = "gemini-flashlite"
     
-    return init_chat_model(
-        MODEL_MAP[model_id],
+    provider_model = MODEL_MAP[model_id]
+    return get_model_client(provider_model, lambda: init_chat_model(
+        provider_model,
         model_provider="openai",
         api_key=os.getenv("OPENROUTER_API_KEY"),
         base_url="https://openrouter.ai/api/v1",
-        streaming=True
-    )
+        streaming=True,
+        stream_usage=True,
+    ))
 
 #Build Final System Prompt
 def build_final_system_prompt(purpose, custom_prompt=""):
@@ -244,35 +232,11 @@ def get_agent_model(model_selection, purpose, is_auto_selected):
         return model_selection if model_selection in MODEL_MAP else "gemini-flashlite"
 
 
-# -------------------- Document Search Tool --------------------
-def document_search(query: str) -> str:
-    """Search uploaded PDF documents for relevant information."""
-    vectorstore = load_vectorstore()
-    if not vectorstore:
-        return "No documents have been uploaded in this conversation."
-    
-    results = vectorstore.similarity_search_with_score(query, k=3)  # increased to k=3
-    if not results:
-        return "No relevant documents found for your query."
-    
-    relevant = []
-    for doc, score in results:
-        if score > 0.65:  # slightly lower threshold for better recall
-            relevant.append(doc.page_content.strip())
-    
-    if relevant:
-        return "Relevant document content:\n" + "\n\n".join(relevant)
-    
-    return "No sufficiently relevant document content found."
+# -------------------- Tools --------------------
+search_tool = TavilySearch(max_results=3)
 
-document_search_tool = Tool.from_function(
-    func=document_search,
-    name="document_search",
-    description="Search uploaded PDF documents for relevant information. Use when query relates to document content."
-)
 
-
-def get_custom_agent_response(
+async def get_custom_agent_response(
     user_input,
     agent_id,
     purpose,
@@ -282,29 +246,34 @@ def get_custom_agent_response(
     history_messages=None,
     user=None,
     track_tokens=False,
+    conversation_id=None,
 ):
     try:
         model_to_use = get_agent_model(model_selection, purpose, is_auto_selected)
         system_prompt = build_final_system_prompt(purpose, custom_prompt)
-        model = init_custom_agent_model(model_to_use)
         chat_history = build_chat_history(history_messages)
+        provider_model = MODEL_MAP.get(model_to_use, MODEL_MAP["gemini-flashlite"])
+
+        cache_key = None
+        if await aresponse_cache_applies(conversation_id):
+            cache_key = build_cache_key("custom_agent", provider_model, system_prompt, user_input, history_messages)
+            cached_answer = await alookup_response(cache_key)
+            if cached_answer is not None:
+                # Served without a model call, so there is no usage to bill.
+                yield cached_answer
+                return
         
-        search_tool = TavilySearch(max_results=3)
-        tools = [search_tool, document_search_tool]
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("human", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad")
-        ])
+        tools = [search_tool]
+        request_tools = [build_document_search_tool(conversation_id)] if conversation_id else []
         
-        agent = create_openai_tools_agent(model, tools, prompt)
-        agent_executor = AgentExecutor(
-            agent=agent,
-            tools=tools,
+        agent_executor = get_agent_executor(
+            provider_model,
+            lambda: init_custom_agent_model(model_to_use),
+            system_prompt,
+            tools,
+            request_tools=request_tools,
             verbose=True,
-            handle_parsing_errors=True
+            handle_parsing_errors=True,
         )
         
         print(f"=== CUSTOM AGENT CHAT ===")
@@ -313,21 +282,26 @@ def get_custom_agent_response(
         print(f"Purpose: {purpose}")
         print(f"Custom prompt: {custom_prompt}")
         
-        # Run agent (tools are called here)
-        with get_openai_callback() as callback:
-            result = agent_executor.invoke({
-                "input": user_input,
-                "chat_history": chat_history,
-                "agent_scratchpad": []
-            })
-        
-        final_answer = result["output"]
-        usage = extract_token_usage(callback)
+        # Stream model deltas as they arrive (tools are called in between)
+        stream = AgentTextStream(agent_executor, {
+            "input": user_input,
+            "chat_history": chat_history,
+            "agent_scratchpad": []
+        }, bill_user=user if track_tokens else None, label=f"custom agent {agent_id}")
+        answer_parts = []
+        async for chunk in stream:
+            answer_parts.append(chunk)
+            yield chunk
+
+        if cache_key:
+            await astore_response(cache_key, "".join(answer_parts), stream.tools_used)
+
+        usage = stream.usage
 
         if track_tokens and user:
             try:
-                profile = get_or_create_billing_profile(user)
-                record_token_usage(profile, **usage)
+                profile = await sync_to_async(get_cached_billing_profile)(user)
+                await sync_to_async(record_token_usage)(profile, **usage)
                 print(
                     f"Token usage recorded for custom agent {agent_id}: "
                     f"in={usage['input_tokens']} out={usage['output_tokens']} total={usage['total_tokens']}"
@@ -335,13 +309,6 @@ def get_custom_agent_response(
             except Exception as usage_error:
                 print(f"[WARN] Token usage recording failed for custom agent {agent_id}: {usage_error}")
         
-        # Stream the final answer word-by-word
-        words = final_answer.split(" ")
-        for i, word in enumerate(words):
-            yield word + " "
-            import time
-            time.sleep(0.004) 
-        
     except Exception as e:
         print(f"[ERROR] Custom agent {agent_id} failed: {str(e)}")
         yield f"Error: {str(e)}"
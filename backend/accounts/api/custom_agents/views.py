@@ -1,7 +1,8 @@
+import asyncio
 import json
 
-from django.conf import settings
-from django.http import JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 
 from accounts.api.access import (
@@ -13,6 +14,8 @@ from accounts.api.access import (
     sse_error_response,
     sse_token_limit_response,
 )
+from accounts.api.billing.services import token_quota_reached
+from accounts.api.context_window import aget_context_window
 from accounts.api.persistence import (
     archive_custom_agent,
     attach_pending_assets_to_message,
@@ -20,21 +23,21 @@ from accounts.api.persistence import (
     create_custom_agent,
     create_message,
     get_or_create_custom_agent_conversation,
-    get_recent_context_messages,
     get_user_conversation,
     get_user_custom_agent,
     serialize_agent,
     update_custom_agent,
     update_message,
 )
+from accounts.api.sse import EventWriter, StreamingText, coalesce_chunks, resume_frames, sse_response
 from .custom_agent_chat import get_custom_agent_response
 
 
 def _has_paid_custom_agent_access(user):
-    billing_profile = get_user_billing_profile(user, sync_remote=True)
+    billing_profile = get_user_billing_profile(user)
     if not billing_profile or not billing_profile.is_paid:
         return None, json_pro_required_response("Upgrade to Pro to use custom agents.")
-    if billing_profile.token_total_used >= settings.PAID_MONTHLY_TOKEN_QUOTA:
+    if token_quota_reached(billing_profile):
         return None, json_token_limit_response("Token limit reached. Please wait until subscription renewal.")
     return billing_profile, None
 
@@ -172,18 +175,18 @@ def get_or_create_custom_agent_chat_view(request):
 
 
 @csrf_exempt
-def custom_agent_chat_view(request):
+async def custom_agent_chat_view(request):
     if request.method != "GET":
         return JsonResponse({"error": "GET required for streaming"}, status=405)
 
-    user = authenticate_request_user(request, allow_query_token=True)
+    user = await sync_to_async(authenticate_request_user)(request, allow_query_token=True)
     if not user:
         return sse_error_response("Authentication required. Please sign in again.")
 
-    billing_profile = get_user_billing_profile(user, sync_remote=True)
+    billing_profile = await sync_to_async(get_user_billing_profile)(user)
     if not billing_profile or not billing_profile.is_paid:
         return sse_error_response("Upgrade to Pro to use custom agents.")
-    if billing_profile.token_total_used >= settings.PAID_MONTHLY_TOKEN_QUOTA:
+    if await sync_to_async(token_quota_reached)(billing_profile):
         return sse_token_limit_response("Token limit reached. Please wait until subscription renewal.")
 
     agent_id = request.GET.get("agent_id", "").strip()
@@ -197,23 +200,26 @@ def custom_agent_chat_view(request):
     if not query:
         return JsonResponse({"error": "Message is required"}, status=400)
 
-    conversation = get_user_conversation(user, chat_id)
+    conversation = await sync_to_async(get_user_conversation)(user, chat_id)
     if not conversation:
         return sse_error_response("Conversation not found.")
+    resumed = await sync_to_async(resume_frames)(request, conversation)
+    if resumed is not None:
+        return sse_response(resumed)
 
-    agent = get_user_custom_agent(user, agent_id)
+    agent = await sync_to_async(get_user_custom_agent)(user, agent_id)
     if not agent:
         return sse_error_response("Custom agent not found.")
 
-    previous_context = get_recent_context_messages(conversation, limit=10)
-    user_message = create_message(
+    previous_context = (await aget_context_window(conversation, model=model_selection or agent.model_preference)).messages
+    user_message = await sync_to_async(create_message)(
         conversation,
         role="user",
         user=user,
         content_text=query,
     )
-    attach_pending_assets_to_message(conversation, user_message)
-    assistant_message = create_message(
+    await sync_to_async(attach_pending_assets_to_message)(conversation, user_message)
+    assistant_message = await sync_to_async(create_message)(
         conversation,
         role="assistant",
         content_text="",
@@ -221,10 +227,12 @@ def custom_agent_chat_view(request):
         model_used=model_selection or agent.model_preference,
     )
 
-    def event_stream():
-        accumulated_text = ""
+    events = EventWriter(assistant_message.id)
+
+    async def event_stream():
+        streamed = StreamingText(assistant_message)
         try:
-            for chunk in get_custom_agent_response(
+            async for chunk in coalesce_chunks(get_custom_agent_response(
                 user_input=query,
                 agent_id=agent.id,
                 purpose=purpose,
@@ -234,32 +242,37 @@ def custom_agent_chat_view(request):
                 history_messages=previous_context,
                 user=user,
                 track_tokens=True,
-            ):
-                if chunk:
-                    accumulated_text += chunk
-                    yield f"data: {chunk.replace(chr(10), '\\n')}\n\n"
+                conversation_id=conversation.id,
+            )):
+                await streamed.add(chunk)
+                yield events.token(chunk)
 
-            update_message(
+            await sync_to_async(update_message)(
                 assistant_message,
-                content_text=accumulated_text.strip(),
+                content_text=streamed.text.strip(),
                 status="completed",
                 model_used=model_selection or agent.model_preference,
             )
+        except (asyncio.CancelledError, GeneratorExit):
+            # The client disconnected: keep what was generated so far.
+            await sync_to_async(update_message)(
+                assistant_message,
+                content_text=streamed.text.strip(),
+                status="interrupted",
+                model_used=model_selection or agent.model_preference,
+            )
+            raise
         except Exception as exc:
-            update_message(
+            await sync_to_async(update_message)(
                 assistant_message,
-                content_text=accumulated_text.strip(),
+                content_text=streamed.text.strip(),
                 status="failed",
                 model_used=model_selection or agent.model_preference,
             )
-            yield f"data: [ERROR]{str(exc)}\n\n"
-        yield "data: [DONE]\n\n"
-
-    response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
-    response["Cache-Control"] = "no-cache"
-    response["X-Accel-Buffering"] = "no"
-    response["Access-Control-Allow-Origin"] = "*"
-    return response
+            yield events.error(str(exc))
+        yield events.done()
+
+    return sse_response(event_stream())
 
 
 @csrf_exempt
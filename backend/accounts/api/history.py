@@ -0,0 +1,38 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from accounts.models import Conversation, Message
+
+HISTORY_STATUSES = (Message.Status.COMPLETED, Message.Status.STREAMING, Message.Status.INTERRUPTED)
+
+MESSAGE_CLASSES = {
+    "user": HumanMessage,
+    "assistant": AIMessage,
+    "system": SystemMessage,
+}
+
+
+def load_history_rows(conversation: Conversation, *, after: int = 0, limit: int = 20) -> list[tuple]:
+    """
+    Newest-first (sequence_no, role, content_text) rows after `after`, at most `limit`.
+
+    Only those three columns are read, through the (conversation,
+    sequence_no) index. Every turn appends a message, so this is not cached:
+    an entry would be stale by the next request.
+    """
+    return list(
+        Message.objects.filter(conversation=conversation, status__in=HISTORY_STATUSES, sequence_no__gt=after)
+        .exclude(content_text="")
+        .order_by("-sequence_no")
+        .values_list("sequence_no", "role", "content_text")[:limit]
+    )
+
+
+def build_chat_history(history_messages=None) -> list:
+    """Convert history entries (anything with `role` and `content_text`) into LangChain messages."""
+    built_messages = []
+    for message in history_messages or []:
+        text = getattr(message, "content_text", "") or ""
+        message_class = MESSAGE_CLASSES.get(getattr(message, "role", ""))
+        if text and message_class:
+            built_messages.append(message_class(content=text))
+    return built_messages
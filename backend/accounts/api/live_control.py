@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from asgiref.sync import sync_to_async
+from django_redis import get_redis_connection
+
+STOP_CHANNEL_PREFIX = "live_stop:"
+LIVE_STREAM_MAX_SECONDS = 3600    # same lifetime the live-update flags get
+
+# ────────────────────────────────────────────────
+# Stop signals for live-update streams.
+#
+# A stop request publishes on the stream's Redis channel. Each process keeps
+# one pattern subscription, read by a background thread, and sets the
+# matching asyncio.Event of every local stream waiting on that channel. An
+# idle live stream therefore makes no Redis calls at all, and a stop wakes
+# it immediately, whichever process serves it.
+# ────────────────────────────────────────────────
+
+_waiters = {}       # channel -> set[(loop, asyncio.Event)]
+_waiters_lock = threading.Lock()
+_listener = None
+
+
+def stop_channel(kind: str, chat_id) -> str:
+    return f"{STOP_CHANNEL_PREFIX}{kind}:{chat_id}"
+
+
+def _dispatch(channel: str):
+    with _waiters_lock:
+        waiters = list(_waiters.get(channel, ()))
+    for loop, event in waiters:
+        loop.call_soon_threadsafe(event.set)
+
+
+def _listen():
+    while True:
+        pubsub = None
+        try:
+            pubsub = get_redis_connection("default").pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe(f"{STOP_CHANNEL_PREFIX}*")
+            for message in pubsub.listen():
+                if message.get("type") != "pmessage":
+                    continue
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode("utf-8")
+                _dispatch(channel)
+        except Exception as exc:
+            print(f"[WARN] Live stop listener reconnecting: {exc}")
+            time.sleep(1)
+        finally:
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+
+def _ensure_listener():
+    global _listener
+    with _waiters_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = threading.Thread(target=_listen, name="live-stop-listener", daemon=True)
+            _listener.start()
+
+
+@asynccontextmanager
+async def live_stop_event(kind: str, chat_id):
+    """Yield an asyncio.Event that is set when a stop is sent for this stream."""
+    _ensure_listener()
+    channel = stop_channel(kind, chat_id)
+    waiter = (asyncio.get_running_loop(), asyncio.Event())
+    with _waiters_lock:
+        _waiters.setdefault(channel, set()).add(waiter)
+    try:
+        yield waiter[1]
+    finally:
+        with _waiters_lock:
+            waiters = _waiters.get(channel)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    _waiters.pop(channel, None)
+
+
+def send_stop_signal(kind: str, chat_id) -> int:
+    """Publish a stop for this stream; returns how many processes received it."""
+    return get_redis_connection("default").publish(stop_channel(kind, chat_id), "stop")
+
+
+async def asend_stop_signal(kind: str, chat_id) -> int:
+    return await sync_to_async(send_stop_signal, thread_sensitive=False)(kind, chat_id)
+
+
+async def next_update(update, stop: asyncio.Event, timeout=None):
+    """
+    Await `update` until it finishes, `stop` is set or `timeout` elapses.
+
+    Returns the update's result, or None on stop or timeout (check
+    `stop.is_set()` to tell them apart).
+    """
+    update_task = asyncio.ensure_future(update)
+    stop_task = asyncio.ensure_future(stop.wait())
+    try:
+        done, _ = await asyncio.wait({update_task, stop_task}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (update_task, stop_task):
+            if not task.done():
+                task.cancel()
+    if update_task in done and not stop.is_set():
+        return update_task.result()
+    return None
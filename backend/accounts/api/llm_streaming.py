@@ -0,0 +1,99 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from langchain_community.callbacks.openai_info import OpenAICallbackHandler
+
+from accounts.api.billing.services import extract_token_usage, get_cached_billing_profile, record_token_usage
+from accounts.api.context_window import count_tokens
+
+
+async def arecord_interrupted_usage(user, usage, label: str):
+    """Bill the tokens a request used before its client went away."""
+    if not user or not usage.get("total_tokens"):
+        return
+    try:
+        profile = await sync_to_async(get_cached_billing_profile)(user)
+        await sync_to_async(record_token_usage)(profile, **usage)
+        print(
+            f"Token usage recorded for interrupted {label}: "
+            f"in={usage['input_tokens']} out={usage['output_tokens']} total={usage['total_tokens']}"
+        )
+    except Exception as usage_error:
+        print(f"[WARN] Token usage recording failed for interrupted {label}: {usage_error}")
+
+
+class AgentTextStream:
+    """
+    Stream the text an AgentExecutor produces as the model generates it.
+
+    Deltas are taken from `on_chat_model_stream` events, so answer tokens
+    reach the caller while the agent is still running, including the rounds
+    that follow tool calls. Token usage is collected through an explicit
+    callback handler and is available on `usage` once iteration finishes,
+    as are the names of the tools the agent called on `tools_used`.
+
+    If the stream is cancelled or closed early (the client disconnected),
+    the usage so far is billed to `bill_user`: completed model calls as
+    reported, plus the streamed output of the call that was cut off.
+    """
+
+    def __init__(self, agent_executor, inputs, *, bill_user=None, label: str = "chat"):
+        self.agent_executor = agent_executor
+        self.inputs = inputs
+        self.usage_handler = OpenAICallbackHandler()
+        self.tools_used = []
+        self.bill_user = bill_user
+        self.label = label
+        self._pending_output = []   # text of the model call still in flight
+
+    @property
+    def usage(self):
+        return extract_token_usage(self.usage_handler)
+
+    def interrupted_usage(self):
+        usage = self.usage
+        estimated = count_tokens("".join(self._pending_output))
+        usage["output_tokens"] += estimated
+        usage["total_tokens"] += estimated
+        return usage
+
+    async def __aiter__(self):
+        events = self.agent_executor.astream_events(
+            self.inputs,
+            config={"callbacks": [self.usage_handler]},
+            version="v2",
+        )
+        try:
+            async for event in events:
+                if event["event"] == "on_tool_start":
+                    self.tools_used.append(event.get("name", ""))
+                    continue
+                if event["event"] == "on_chat_model_end":
+                    self._pending_output = []
+                    continue
+                if event["event"] != "on_chat_model_stream":
+                    continue
+                chunk = event["data"].get("chunk")
+                text = getattr(chunk, "content", "") if chunk is not None else ""
+                if isinstance(text, str) and text:
+                    self._pending_output.append(text)
+                    yield text
+        except (asyncio.CancelledError, GeneratorExit):
+            await arecord_interrupted_usage(self.bill_user, self.interrupted_usage(), self.label)
+            raise
+
+
+async def ainvoke_agent(agent_executor, inputs, *, bill_user=None, label: str = "agent"):
+    """
+    Run an AgentExecutor on the async client and return (result, usage).
+
+    When the call is cancelled, the usage of the model calls that already
+    finished is billed to `bill_user` before the cancellation propagates.
+    """
+    usage_handler = OpenAICallbackHandler()
+    try:
+        result = await agent_executor.ainvoke(inputs, config={"callbacks": [usage_handler]})
+    except asyncio.CancelledError:
+        await arecord_interrupted_usage(bill_user, extract_token_usage(usage_handler), label)
+        raise
+    return result, extract_token_usage(usage_handler)
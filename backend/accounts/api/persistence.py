@@ -1,5 +1,6 @@
 import base64
 import binascii
+import json
 import mimetypes
 import os
 import uuid
@@ -7,10 +8,12 @@ from typing import Iterable, Optional
 
 import requests
 from django.core.files.base import ContentFile
-from django.db import transaction
+from django.db import connection
 from django.db import models
-from django.db.models import Max
+from django.db.models import F, Prefetch, Q
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from accounts.models import Agent, ChatAsset, Conversation, EmailRecord, Message
 
@@ -162,7 +165,10 @@ def serialize_conversation(conversation: Conversation, request=None, include_mes
         "updatedAt": conversation.updated_at.isoformat() if conversation.updated_at else None,
     }
     if include_messages:
-        payload["messages"] = [serialize_message(message, request=request) for message in conversation.messages.all()]
+        payload["messages"] = [
+            serialize_message(message, request=request)
+            for message in conversation.messages.prefetch_related(*message_prefetches())
+        ]
     return payload
 
 
@@ -185,7 +191,10 @@ def serialize_message(message: Message, request=None) -> dict:
                 "url": asset_url,
             })
 
-    sent_record = message.email_records.filter(status=EmailRecord.Status.SENT).order_by("-created_at").first()
+    if hasattr(message, "sent_email_records"):
+        sent_record = message.sent_email_records[0] if message.sent_email_records else None
+    else:
+        sent_record = message.email_records.filter(status=EmailRecord.Status.SENT).order_by("-created_at").first()
     email_draft = content_json.get("email_draft")
 
     payload = {
@@ -284,16 +293,110 @@ def get_user_conversation(user, conversation_id) -> Optional[Conversation]:
     return Conversation.objects.filter(user=user, id=conversation_id, status=Conversation.Status.ACTIVE).first()
 
 
-def list_user_conversations(user):
+CONVERSATION_PAGE_SIZE = 30
+MAX_CONVERSATION_PAGE_SIZE = 100
+MESSAGE_PAGE_SIZE = 50
+MAX_MESSAGE_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def clamp_page_size(value, default: int, maximum: int) -> int:
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def encode_conversation_cursor(conversation: Conversation) -> str:
+    raw = json.dumps({"at": conversation.activity_at.isoformat(), "id": str(conversation.id)})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_conversation_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        activity_at = parse_datetime(data["at"])
+        conversation_id = uuid.UUID(data["id"])
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor("Invalid cursor.") from exc
+    if activity_at is None:
+        raise InvalidCursor("Invalid cursor.")
+    return activity_at, conversation_id
+
+
+def list_user_conversations(user, cursor: str = "", limit: int = CONVERSATION_PAGE_SIZE):
+    """
+    Return one page of the user's active conversations, newest activity first.
+
+    Only conversation rows are loaded; messages are fetched per conversation
+    through `list_conversation_messages`. Returns (conversations, next_cursor),
+    where next_cursor is None on the last page.
+    """
     ensure_default_custom_agents_for_user(user)
-    return (
+    queryset = (
         Conversation.objects.filter(user=user, status=Conversation.Status.ACTIVE)
-        .select_related("agent")
-        .prefetch_related("messages__assets", "messages__email_records")
-        .order_by("-last_message_at", "-created_at")
+        .annotate(activity_at=Coalesce("last_message_at", "created_at"))
+        .order_by(F("activity_at").desc(), F("id").desc())
+    )
+    if cursor:
+        activity_at, conversation_id = decode_conversation_cursor(cursor)
+        queryset = queryset.filter(
+            Q(activity_at__lt=activity_at) | Q(activity_at=activity_at, id__lt=conversation_id)
+        )
+
+    page = list(queryset[:limit + 1])
+    next_cursor = encode_conversation_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
+
+
+def list_user_agent_conversations(user) -> list[Conversation]:
+    """
+    Latest active conversation per agent, so agent chats resolve to their
+    existing thread even when it is not on the first index page.
+    """
+    return list(
+        Conversation.objects.filter(user=user, status=Conversation.Status.ACTIVE, agent__isnull=False)
+        .annotate(activity_at=Coalesce("last_message_at", "created_at"))
+        .order_by("agent_id", F("activity_at").desc())
+        .distinct("agent_id")
     )
 
 
+def message_prefetches():
+    return (
+        "assets",
+        Prefetch(
+            "email_records",
+            queryset=EmailRecord.objects.filter(status=EmailRecord.Status.SENT).order_by("-created_at"),
+            to_attr="sent_email_records",
+        ),
+    )
+
+
+def list_conversation_messages(conversation: Conversation, before: Optional[int] = None, limit: int = MESSAGE_PAGE_SIZE):
+    """
+    Return the newest `limit` messages older than sequence number `before`.
+
+    Messages come back in chronological order. The cursor for the next
+    (older) page is the sequence_no of the oldest message returned, or None
+    once the start of the conversation is reached.
+    """
+    queryset = conversation.messages.prefetch_related(*message_prefetches()).order_by("-sequence_no")
+    if before is not None:
+        queryset = queryset.filter(sequence_no__lt=before)
+
+    page = list(queryset[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit][::-1]
+    next_cursor = page[0].sequence_no if has_more and page else None
+    return page, next_cursor
+
+
 def create_conversation(user, *, conversation_type=Conversation.ConversationType.NORMAL, agent: Agent = None, title: str = "New Chat") -> Conversation:
     return Conversation.objects.create(
         user=user,
@@ -351,14 +454,31 @@ def soft_delete_conversation(conversation: Conversation):
     conversation.save(update_fields=["status", "updated_at"])
 
 
-def get_recent_context_messages(conversation: Conversation, limit: int = 10) -> list[Message]:
-    return list(
-        conversation.messages.filter(status__in=[Message.Status.COMPLETED, Message.Status.STREAMING])
-        .order_by("-sequence_no")[:limit]
-    )[::-1]
+def allocate_sequence_no(conversation: Conversation, now=None) -> int:
+    """
+    Reserve the next message number for `conversation` in one statement.
+
+    The row lock taken by the UPDATE serializes concurrent writers, and the
+    same statement bumps last_message_at, so no separate conversation save
+    is needed.
+    """
+    now = now or timezone.now()
+    table = connection.ops.quote_name(Conversation._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} "
+            "SET next_sequence_no = next_sequence_no + 1, last_message_at = %s, updated_at = %s "
+            "WHERE id = %s RETURNING next_sequence_no - 1",
+            [now, now, conversation.pk],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        raise Conversation.DoesNotExist(f"Conversation {conversation.pk} does not exist.")
+    conversation.next_sequence_no = row[0] + 1
+    conversation.last_message_at = now
+    return row[0]
 
 
-@transaction.atomic
 def create_message(
     conversation: Conversation,
     *,
@@ -373,13 +493,7 @@ def create_message(
     output_tokens: int = 0,
     total_tokens: int = 0,
 ) -> Message:
-    current_max = (
-        Message.objects.select_for_update()
-        .filter(conversation=conversation)
-        .aggregate(max_sequence=Max("sequence_no"))
-        .get("max_sequence")
-        or 0
-    )
+    now = timezone.now()
     message = Message.objects.create(
         conversation=conversation,
         user=user,
@@ -387,15 +501,14 @@ def create_message(
         content_text=content_text,
         content_json=content_json or {},
         message_type=message_type,
-        sequence_no=current_max + 1,
+        sequence_no=allocate_sequence_no(conversation, now),
         model_used=model_used,
         status=status,
         input_tokens=input_tokens,
         output_tokens=output_tokens,
         total_tokens=total_tokens,
+        created_at=now,
     )
-    conversation.last_message_at = message.created_at
-    conversation.save(update_fields=["last_message_at", "updated_at"])
     return message
 
 
@@ -435,9 +548,20 @@ def update_message(
     if fields:
         fields.append("updated_at")
         message.save(update_fields=fields)
-        conversation = message.conversation
-        conversation.last_message_at = timezone.now()
-        conversation.save(update_fields=["last_message_at", "updated_at"])
+        now = timezone.now()
+        Conversation.objects.filter(pk=message.conversation_id).update(last_message_at=now, updated_at=now)
+    return message
+
+
+def save_streaming_text(message: Message, content_text: str):
+    """
+    Store the text generated so far for a message that is still streaming.
+
+    Only the message row is written: the conversation's activity time is
+    left alone until the final `update_message`.
+    """
+    message.content_text = content_text
+    Message.objects.filter(pk=message.pk).update(content_text=content_text, updated_at=timezone.now())
     return message
 
 
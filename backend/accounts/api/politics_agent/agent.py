@@ -2,16 +2,18 @@
 import os
 from datetime import datetime
 
+from asgiref.sync import sync_to_async
 from langchain_openai import ChatOpenAI
 from langchain.agents import create_openai_tools_agent, AgentExecutor
-from langchain_community.callbacks.manager import get_openai_callback
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import AIMessage, HumanMessage
 from django.core.cache import cache
 
 from .tools import real_time_news_search, real_time_news_cycle
 from .tools import real_time_news_search_tool, tavily_politics_search_tool
-from accounts.api.billing.services import extract_token_usage, get_or_create_billing_profile, record_token_usage
+from accounts.api.billing.services import get_cached_billing_profile, record_token_usage
+from accounts.api.history import build_chat_history
+from accounts.api.llm_streaming import ainvoke_agent
+from accounts.api.response_cache import alookup_response, astore_response, build_cache_key, response_cache_enabled
 
 # ── LLM ────────────────────────────────────────────────────────────────────────
 
@@ -114,48 +116,43 @@ agent_executor = AgentExecutor(
     early_stopping_method="force",
 )
 
-def build_chat_history(history_messages=None):
-    built_messages = []
-    for message in history_messages or []:
-        text = getattr(message, "content_text", "") or ""
-        role = getattr(message, "role", "")
-        if not text:
-            continue
-        if role == "user":
-            built_messages.append(HumanMessage(content=text))
-        elif role == "assistant":
-            built_messages.append(AIMessage(content=text))
-    return built_messages
-
-
-def get_politics_response(query: str, thread_id: str = "politics_agent_chat", history_messages=None, user=None, track_tokens=False):
+
+async def get_politics_response(query: str, thread_id: str = "politics_agent_chat", history_messages=None, user=None, track_tokens=False):
     q = query.lower().strip()
     chat_history = build_chat_history(history_messages)
 
     # Fast path — live loop calls this; skip the heavy agent invocation
-    if "live update" in q and cache.get(f"politics_news_active_{thread_id}"):
-        topic     = cache.get(f"politics_news_topic_{thread_id}")
-        counter   = cache.get(f"politics_news_counter_{thread_id}", 1)
+    if "live update" in q and await cache.aget(f"politics_news_active_{thread_id}"):
+        topic     = await cache.aget(f"politics_news_topic_{thread_id}")
+        counter   = await cache.aget(f"politics_news_counter_{thread_id}", 1)
         if topic:
             print(f"🔴 Live news fast-path — topic: {topic} update #{counter}")
-            result = real_time_news_cycle(topic, counter)
-            cache.set(f"politics_news_counter_{thread_id}", counter + 1, timeout=3600)
+            result = await sync_to_async(real_time_news_cycle, thread_sensitive=False)(topic, counter)
+            await cache.aset(f"politics_news_counter_{thread_id}", counter + 1, timeout=3600)
             return result, None
 
+    cache_key = None
+    if response_cache_enabled():
+        cache_key = build_cache_key("politics", llm.model_name, SYSTEM_PROMPT, query, history_messages)
+        cached_answer = await alookup_response(cache_key)
+        if cached_answer is not None:
+            # Served without a model call, so there is no usage to bill.
+            return cached_answer, None
+
     try:
-        with get_openai_callback() as callback:
-            result = agent_executor.invoke({
-                "input": query,
-                "chat_history": chat_history,
-            })
+        result, usage = await ainvoke_agent(agent_executor, {
+            "input": query,
+            "chat_history": chat_history,
+        }, bill_user=user if track_tokens else None, label="politics")
 
         answer = result["output"].strip()
-        usage = extract_token_usage(callback)
+        if cache_key:
+            await astore_response(cache_key, answer)
 
         if track_tokens and user:
             try:
-                profile = get_or_create_billing_profile(user)
-                record_token_usage(profile, **usage)
+                profile = await sync_to_async(get_cached_billing_profile)(user)
+                await sync_to_async(record_token_usage)(profile, **usage)
             except Exception as usage_error:
                 print(f"[WARN] Politics token usage recording failed: {usage_error}")
 
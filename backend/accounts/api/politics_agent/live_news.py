@@ -0,0 +1,155 @@
+# backend/accounts/api/politics_agent/live_news.py
+import asyncio
+import hashlib
+import re
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from .scraping import enrich_with_scraped_text
+from .tools import article_identity, fetch_article_list
+
+POLL_INTERVAL = 10        # seconds between article list refreshes per topic
+ARTICLES_PER_POLL = 4
+SEEN_LIMIT = 500          # article ids remembered per topic
+
+# ────────────────────────────────────────────────
+# One poller per normalized topic, shared by every live-news stream in this
+# process. Each cycle fetches only the article list; articles already seen
+# are dropped before any scraping, and a cycle with nothing new publishes
+# nothing. Across processes the upstream call is deduplicated by the shared
+# Redis article list.
+# ────────────────────────────────────────────────
+
+
+def normalize_topic(topic: str) -> str:
+    return re.sub(r"\s+", " ", (topic or "").lower()).strip()
+
+
+def topic_articles_key(topic: str) -> str:
+    digest = hashlib.sha256(topic.encode("utf-8")).hexdigest()
+    return f"politics:live_articles:{digest}"
+
+
+def get_topic_articles(topic: str, max_age: int = POLL_INTERVAL) -> list:
+    """Article list for `topic`, shared through Redis for `max_age` seconds."""
+    key = topic_articles_key(topic)
+    articles = cache.get(key)
+    if articles is None:
+        articles = fetch_article_list(topic, ARTICLES_PER_POLL)
+        cache.set(key, articles, timeout=max_age)
+    return articles
+
+
+class TopicSubscription:
+    """Receives batches of new articles for one topic."""
+
+    def __init__(self, topic, shown_articles=None):
+        self.topic = topic
+        self.queue = asyncio.Queue()
+        # Articles this client was already shown before subscribing. Kept
+        # per subscription: other subscribers have not seen them yet.
+        self.shown = {article_identity(art) for art in shown_articles or []} - {""}
+
+    def offer(self, articles: list):
+        articles = [art for art in articles if article_identity(art) not in self.shown]
+        if articles:
+            self.queue.put_nowait(articles)
+
+    async def get(self, timeout=None):
+        """Wait for the next batch; returns None when `timeout` elapses."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class TopicNewsPoller:
+    def __init__(self, topic: str):
+        self.topic = topic
+        self.subscriptions = set()
+        self.seen = OrderedDict()   # article id -> None, oldest first
+        self.task = None
+
+    def add(self, subscription: TopicSubscription):
+        self.subscriptions.add(subscription)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    def remove(self, subscription: TopicSubscription):
+        self.subscriptions.discard(subscription)
+
+    def mark_seen(self, articles: list):
+        for art in articles:
+            identity = article_identity(art)
+            if not identity:
+                continue
+            self.seen[identity] = None
+            self.seen.move_to_end(identity)
+        while len(self.seen) > SEEN_LIMIT:
+            self.seen.popitem(last=False)
+
+    def unseen(self, articles: list) -> list:
+        fresh = []
+        identities = set()
+        for art in articles:
+            identity = article_identity(art)
+            if identity and identity not in self.seen and identity not in identities:
+                identities.add(identity)
+                fresh.append(art)
+        return fresh
+
+    def publish(self, articles: list):
+        for subscription in list(self.subscriptions):
+            subscription.offer(articles)
+
+    async def run(self):
+        try:
+            while self.subscriptions:
+                await asyncio.sleep(POLL_INTERVAL)
+                if not self.subscriptions:
+                    break
+                try:
+                    articles = await sync_to_async(get_topic_articles, thread_sensitive=False)(self.topic)
+                    fresh = self.unseen(articles)
+                    # Nothing new: no scraping, nothing sent.
+                    if not fresh:
+                        continue
+                    self.mark_seen(fresh)
+                    fresh = await sync_to_async(enrich_with_scraped_text, thread_sensitive=False)(fresh)
+                except Exception as exc:
+                    print(f"Live news poll for '{self.topic}' failed: {exc}")
+                    continue
+                self.publish(fresh)
+        finally:
+            if _pollers.get(self.topic) is self and not self.subscriptions:
+                _pollers.pop(self.topic, None)
+
+
+_pollers = {}
+
+
+@asynccontextmanager
+async def subscribe_to_topic(topic: str, seen_articles=None):
+    """
+    Yield a TopicSubscription fed by the shared poller for `topic`.
+
+    `seen_articles` are what the caller already showed the client; this
+    subscription skips them when the poller later finds them new.
+    """
+    key = normalize_topic(topic)
+    if not key:
+        raise ValueError("A topic is required for live news.")
+
+    poller = _pollers.get(key)
+    if poller is None:
+        poller = _pollers[key] = TopicNewsPoller(key)
+
+    subscription = TopicSubscription(key, seen_articles)
+    poller.add(subscription)
+    try:
+        yield subscription
+    finally:
+        poller.remove(subscription)
@@ -0,0 +1,252 @@
+# backend/accounts/api/politics_agent/scraping.py
+import concurrent.futures
+import hashlib
+import re
+from html.parser import HTMLParser
+from threading import Lock
+from urllib.parse import urlparse
+
+import requests
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+ARTICLE_TEXT_LIMIT = 800           # characters of prose kept per article
+ARTICLE_CACHE_TTL = 6 * 60 * 60    # extracted text per URL
+EMPTY_ARTICLE_CACHE_TTL = 30 * 60  # pages that yielded nothing are retried sooner
+MAX_HTML_BYTES = 2 * 1024 * 1024   # stop downloading past this point
+READ_CHUNK_SIZE = 16 * 1024
+SCRAPE_WORKERS = 8
+ENRICH_TIMEOUT = 6
+
+# Known paywalled / JS-rendered domains
+BLOCKED_DOMAINS = (
+    "bloomberg.com", "nytimes.com", "ft.com", "wsj.com",
+    "washingtonpost.com", "economist.com", "thetimes.co.uk",
+    "telegraph.co.uk", "theathletic.com",
+)
+
+BROWSER_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,*/*",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+# Everything inside these is never article prose.
+SKIP_TAGS = frozenset({
+    "style", "script", "head", "nav", "header", "footer",
+    "aside", "figure", "noscript", "iframe", "svg",
+    "form", "button", "select", "textarea", "template",
+})
+# Closing one of these also ends an unclosed <p>.
+BLOCK_TAGS = frozenset({"div", "article", "section", "main", "li", "td", "blockquote", "body"})
+
+SENTENCE_RE = re.compile(
+    r"\b(is|are|was|were|has|have|said|says|will|told|found|shows|warns|calls|urges|strikes"
+    r"|attacks|launched|threatened|agreed|signed|voted|confirmed)\b",
+    re.IGNORECASE,
+)
+JUNK_RE = re.compile(
+    r"^https?://"                               # raw URLs
+    r"|font-family|font-face|@media|@charset"   # leaked CSS
+    r"|function\s*\(|var\s+\w+\s*="             # leaked JS
+    r"|^\s*{.*}\s*$"                            # JSON blobs
+    r"|Ad Feedback|Video Ad|play video"         # video widgets
+    r"|Source:\s*\w+",                          # "Source: CNN" labels
+    re.IGNORECASE,
+)
+JUNK_SUBSTRINGS = (
+    "cookie", "subscribe", "sign in", "sign up", "advertisement",
+    "javascript", "privacy policy", "terms of service",
+    "all rights reserved", "follow us", "share this", "read more",
+    "click here", "loading", "newsletter", "getty images",
+    "associated press", "© 20", "copyright 20",
+    "skip to content", "skip to main", "font-face", ":root{",
+)
+WHITESPACE_RE = re.compile(r"\s+")
+
+_session = None
+_session_lock = Lock()
+_scrape_executor = concurrent.futures.ThreadPoolExecutor(max_workers=SCRAPE_WORKERS, thread_name_prefix="article-scrape")
+
+
+def get_http_session() -> requests.Session:
+    """Process-wide session, so article and news API requests reuse pooled connections."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=32, pool_maxsize=SCRAPE_WORKERS * 2)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def is_prose(paragraph: str) -> bool:
+    if len(paragraph) < 45 or not SENTENCE_RE.search(paragraph):
+        return False
+    lowered = paragraph.lower()
+    if any(junk in lowered for junk in JUNK_SUBSTRINGS):
+        return False
+    return not JUNK_RE.search(paragraph)
+
+
+class ArticleTextExtractor(HTMLParser):
+    """
+    Incremental <p> extractor.
+
+    Feed it HTML as it downloads. Text inside SKIP_TAGS is ignored, each
+    finished paragraph is filtered with `is_prose`, and `done` turns true as
+    soon as `limit` characters of prose were collected, so the caller can
+    stop reading the response there.
+    """
+
+    def __init__(self, limit: int = ARTICLE_TEXT_LIMIT):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.paragraphs = []
+        self.collected = 0
+        self.done = False
+        self._skip_depth = 0
+        self._buffer = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "p" and not self._skip_depth:
+            self._flush()
+            self._buffer = []
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            if self._skip_depth:
+                self._skip_depth -= 1
+        elif tag == "p" or tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if self._buffer is not None and not self._skip_depth:
+            self._buffer.append(data)
+
+    def _flush(self):
+        if self._buffer is None:
+            return
+        paragraph = WHITESPACE_RE.sub(" ", "".join(self._buffer)).strip()
+        self._buffer = None
+        if self.done or not is_prose(paragraph):
+            return
+        self.paragraphs.append(paragraph)
+        self.collected += len(paragraph)
+        if self.collected >= self.limit:
+            self.done = True
+
+    def text(self) -> str:
+        self._flush()
+        return " ".join(self.paragraphs)[:self.limit]
+
+
+def extract_article_text(chunks, limit: int = ARTICLE_TEXT_LIMIT) -> str:
+    """Extract prose from an HTML string or an iterable of HTML chunks."""
+    if isinstance(chunks, str):
+        chunks = [chunks]
+    extractor = ArticleTextExtractor(limit=limit)
+    for chunk in chunks:
+        extractor.feed(chunk)
+        if extractor.done:
+            break
+    return extractor.text()
+
+
+def _is_blocked(url: str) -> bool:
+    domain = (urlparse(url).netloc or "").lower()
+    return any(blocked in domain for blocked in BLOCKED_DOMAINS)
+
+
+def _download_chunks(response):
+    received = 0
+    for chunk in response.iter_content(chunk_size=READ_CHUNK_SIZE, decode_unicode=True):
+        if not chunk:
+            continue
+        yield chunk
+        received += len(chunk)
+        if received >= MAX_HTML_BYTES:
+            return
+
+
+def fetch_article_text(url: str, timeout: int = 4) -> str:
+    """Download `url` and extract its prose, reading only as much HTML as needed."""
+    try:
+        with get_http_session().get(url, timeout=timeout, headers=BROWSER_HEADERS, allow_redirects=True, stream=True) as resp:
+            if resp.status_code != 200:
+                return ""
+            if resp.encoding is None:
+                resp.encoding = resp.apparent_encoding or "utf-8"
+            return extract_article_text(_download_chunks(resp))
+    except Exception:
+        return ""
+
+
+def article_cache_key(url: str) -> str:
+    return f"politics:article:{hashlib.sha256(url.encode('utf-8')).hexdigest()}"
+
+
+def scrape_article_text(url: str, timeout: int = 4) -> str:
+    """
+    Clean prose for an article URL, cached per URL.
+    Returns empty string on any failure — always safe to call.
+    """
+    if not url or url == "#" or _is_blocked(url):
+        return ""
+
+    key = article_cache_key(url)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    text = fetch_article_text(url, timeout=timeout)
+    cache.set(key, text, timeout=ARTICLE_CACHE_TTL if text else EMPTY_ARTICLE_CACHE_TTL)
+    return text
+
+
+def enrich_with_scraped_text(articles: list, timeout: float = ENRICH_TIMEOUT) -> list:
+    """
+    Store each article's scraped prose in art['scraped_text'].
+
+    Cached URLs are served in one round trip; the rest are scraped on the
+    shared pool. Articles still pending after `timeout` seconds go out
+    without scraped text (their scrape keeps running and fills the cache).
+    """
+    urls = {}
+    for art in articles:
+        url = art.get("link") or art.get("url", "")
+        if url and url != "#" and not _is_blocked(url):
+            urls[article_cache_key(url)] = url
+
+    try:
+        texts = {urls[key]: text for key, text in cache.get_many(list(urls)).items()}
+    except Exception:
+        texts = {}
+
+    futures = {
+        _scrape_executor.submit(scrape_article_text, url): url
+        for url in urls.values()
+        if url not in texts
+    }
+    if futures:
+        done, _ = concurrent.futures.wait(futures, timeout=timeout)
+        for future in done:
+            try:
+                texts[futures[future]] = future.result()
+            except Exception:
+                pass
+
+    for art in articles:
+        scraped = texts.get(art.get("link") or art.get("url", ""))
+        if scraped:
+            art["scraped_text"] = scraped
+    return articles
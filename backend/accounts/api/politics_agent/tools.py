@@ -1,8 +1,6 @@
 # backend/accounts/api/politics_agent/tools.py
 import re
-import requests
 import os
-import concurrent.futures
 from datetime import datetime
 from urllib.parse import urlparse
 
@@ -10,6 +8,8 @@ from langchain.tools import Tool
 from langchain_community.tools.tavily_search import TavilySearchResults
 from django.core.cache import cache
 
+from .scraping import enrich_with_scraped_text, get_http_session
+
 RAPIDAPI_KEY  = os.getenv("RAPIDAPI_KEY")
 RAPIDAPI_HOST = "real-time-news-data.p.rapidapi.com"
 
@@ -172,144 +172,6 @@ def _clean_snippet(text: str) -> str:
     return text
 
 
-def _scrape_article_text(url: str, timeout: int = 5) -> str:
-    """
-    Scrape the article URL and return clean prose sentences.
-    Returns empty string on any failure — always safe to call.
-    """
-    if not url or url == "#":
-        return ""
-
-    # Skip known paywalled / JS-rendered domains
-    BLOCKED = {
-        "bloomberg.com", "nytimes.com", "ft.com", "wsj.com",
-        "washingtonpost.com", "economist.com", "thetimes.co.uk",
-        "telegraph.co.uk", "theathletic.com",
-    }
-    try:
-        domain = _domain_from_url(url)
-        if any(b in domain for b in BLOCKED):
-            return ""
-    except Exception:
-        return ""
-
-    try:
-        resp = requests.get(
-            url,
-            timeout=timeout,
-            headers={
-                "User-Agent": (
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/120.0.0.0 Safari/537.36"
-                ),
-                "Accept": "text/html,application/xhtml+xml,*/*",
-                "Accept-Language": "en-US,en;q=0.9",
-            },
-            allow_redirects=True,
-        )
-        if resp.status_code != 200:
-            return ""
-
-        html = resp.text
-
-        # ── Step 1: Nuke entire non-content blocks before touching <p> tags ──
-        # Remove <style>, <script>, <head>, <nav>, <header>, <footer>,
-        # <aside>, <figure>, <noscript>, comments, and inline CSS/JS blobs
-        for tag in ["style", "script", "head", "nav", "header", "footer",
-                    "aside", "figure", "noscript", "iframe", "svg",
-                    "form", "button", "select", "textarea"]:
-            html = re.sub(
-                rf'<{tag}[\s>].*?</{tag}>',
-                ' ', html, flags=re.DOTALL | re.IGNORECASE
-            )
-        # Remove HTML comments
-        html = re.sub(r'<!--.*?-->', ' ', html, flags=re.DOTALL)
-        # Remove CSS @font-face / :root / @media blocks that leak into body
-        html = re.sub(r'[@:][a-zA-Z\-]+\s*[{(][^}]*[})]', ' ', html)
-
-        # ── Step 2: Extract <p> tag text only ────────────────────────────────
-        raw_paras = re.findall(r'<p[^>]*>(.*?)</p>', html, re.DOTALL | re.IGNORECASE)
-
-        def _strip(text: str) -> str:
-            text = re.sub(r'<[^>]+>', '', text)          # strip all tags
-            text = re.sub(r'&nbsp;', ' ', text)
-            text = re.sub(r'&amp;', '&', text)
-            text = re.sub(r'&lt;', '<', text)
-            text = re.sub(r'&gt;', '>', text)
-            text = re.sub(r'&#\d+;', '', text)
-            text = re.sub(r'&[a-z]+;', '', text)         # remaining entities
-            text = re.sub(r'\s+', ' ', text).strip()
-            return text
-
-        clean_paras = [_strip(p) for p in raw_paras]
-
-        # ── Step 3: Filter to real prose sentences ────────────────────────────
-        JUNK_PATTERNS = [
-            r'^https?://',                              # raw URLs
-            r'font-family|font-face|@media|@charset',  # leaked CSS
-            r'function\s*\(|var\s+\w+\s*=',           # leaked JS
-            r'^\s*{.*}\s*$',                           # JSON blobs
-            r'Ad Feedback|Video Ad|play video',        # video widgets
-            r'Source:\s*\w+',                          # "Source: CNN" labels
-        ]
-        JUNK_SUBSTRINGS = {
-            "cookie", "subscribe", "sign in", "sign up", "advertisement",
-            "javascript", "privacy policy", "terms of service",
-            "all rights reserved", "follow us", "share this", "read more",
-            "click here", "loading", "newsletter", "getty images",
-            "associated press", "© 20", "copyright 20",
-            "skip to content", "skip to main", "font-face", ":root{",
-        }
-
-        meaningful = []
-        for p in clean_paras:
-            if len(p) < 45:
-                continue
-            # Must contain at least one verb-like word to be a real sentence
-            if not re.search(r'\b(is|are|was|were|has|have|said|says|will|told|found|shows|warns|calls|urges|strikes|attacks|launched|threatened|agreed|signed|voted|confirmed)\b', p, re.IGNORECASE):
-                continue
-            p_lower = p.lower()
-            if any(b in p_lower for b in JUNK_SUBSTRINGS):
-                continue
-            if any(re.search(pat, p, re.IGNORECASE) for pat in JUNK_PATTERNS):
-                continue
-            meaningful.append(p)
-            if sum(len(m) for m in meaningful) >= 800:
-                break
-
-        return " ".join(meaningful)[:800]
-
-    except Exception:
-        return ""
-
-
-def _enrich_with_scraped_text(articles: list) -> list:
-    """
-    For each article, attempt to scrape full text in parallel (max 4 threads).
-    Stores result in art['scraped_text']. Never blocks more than 6s total.
-    """
-    def _enrich_one(art: dict) -> dict:
-        url = art.get("link") or art.get("url", "")
-        scraped = _scrape_article_text(url, timeout=4)
-        if scraped:
-            art["scraped_text"] = scraped
-        return art
-
-    try:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as ex:
-            futures = {ex.submit(_enrich_one, art): art for art in articles}
-            enriched = []
-            for fut in concurrent.futures.as_completed(futures, timeout=6):
-                try:
-                    enriched.append(fut.result())
-                except Exception:
-                    enriched.append(futures[fut])
-        return enriched
-    except Exception:
-        return articles
-
-
 def _build_description(art: dict) -> str:
     """
     Build a rich 3-5 sentence description.
@@ -435,13 +297,11 @@ def _render_update_block(articles: list, topic: str, timestamp: str,
 
 # ── Core fetch ─────────────────────────────────────────────────────────────────
 
-def _fetch_articles_raw(query: str, limit: int = 4) -> list:
-    """
-    Fetch articles from RapidAPI, then enrich each one by scraping
-    the actual article URL for full paragraph text in parallel.
-    """
+def fetch_article_list(query: str, limit: int = 4) -> list:
+    """Fetch article metadata from RapidAPI, without scraping the articles."""
+    session = get_http_session()
     try:
-        resp = requests.get(
+        resp = session.get(
             f"https://{RAPIDAPI_HOST}/search",
             headers=HEADERS,
             params={"query": query, "lang": "EN", "limit": limit},
@@ -449,22 +309,40 @@ def _fetch_articles_raw(query: str, limit: int = 4) -> list:
         )
         articles = resp.json().get("data", []) if resp.status_code == 200 else []
         if not articles:
-            fb = requests.get(
+            fb = session.get(
                 f"https://{RAPIDAPI_HOST}/top-headlines",
                 headers=HEADERS,
                 params={"country": "US", "lang": "EN", "limit": limit},
                 timeout=12,
             )
             articles = fb.json().get("data", []) if fb.status_code == 200 else []
-
-        if articles:
-            articles = _enrich_with_scraped_text(articles)
-
         return articles
     except Exception:
         return []
 
 
+def article_identity(art: dict) -> str:
+    """Stable id for de-duplicating articles across polls."""
+    return str(art.get("article_id") or art.get("link") or art.get("url") or art.get("title") or "")
+
+
+def _fetch_articles_raw(query: str, limit: int = 4) -> list:
+    """
+    Fetch articles from RapidAPI, then enrich each one by scraping
+    the actual article URL for full paragraph text in parallel.
+    """
+    articles = fetch_article_list(query, limit)
+    if articles:
+        articles = enrich_with_scraped_text(articles)
+    return articles
+
+
+def render_live_update(articles: list, topic: str, update_number: int = None) -> str:
+    """Numbered 🔴 LIVE UPDATE block for articles the poller already enriched."""
+    timestamp = datetime.now().strftime('%I:%M %p')
+    return _render_update_block(articles, topic, timestamp, update_number=update_number)
+
+
 def real_time_news_search(query: str = "politics", language: str = "EN",
                            limit: int = 4, for_live_update: bool = False,
                            update_number: int = None) -> str:
@@ -508,15 +386,20 @@ def real_time_news_search(query: str = "politics", language: str = "EN",
         return f"Failed to fetch news: {str(e)[:200]}"
 
 
-def real_time_news_first(topic: str) -> str:
-    """First update — distinct 'FIRST UPDATE' label."""
+def real_time_news_first(topic: str, with_articles: bool = False):
+    """
+    First update — distinct 'FIRST UPDATE' label.
+    With `with_articles`, returns (block, articles) so a live stream can
+    mark the shown articles as seen.
+    """
     articles  = _fetch_articles_raw(topic)
     timestamp = datetime.now().strftime('%I:%M %p')
-    return _render_update_block(
+    block = _render_update_block(
         articles, topic, timestamp,
         header_emoji="📰", label="FIRST UPDATE",
         update_number=None
     )
+    return (block, articles) if with_articles else block
 
 
 def real_time_news_cycle(topic: str, update_number: int) -> str:
@@ -1,8 +1,9 @@
+import asyncio
 import time
 
-from django.conf import settings
+from asgiref.sync import sync_to_async
 from django.core.cache import cache
-from django.http import JsonResponse, StreamingHttpResponse
+from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST
 
@@ -12,25 +13,21 @@ from accounts.api.access import (
     sse_error_response,
     sse_token_limit_response,
 )
+from accounts.api.billing.services import token_quota_reached
+from accounts.api.context_window import aget_context_window
+from accounts.api.live_control import LIVE_STREAM_MAX_SECONDS, asend_stop_signal, live_stop_event, next_update
 from accounts.api.persistence import (
     assign_agent_to_conversation,
     create_message,
     get_builtin_agent,
-    get_recent_context_messages,
     get_user_conversation,
+    save_streaming_text,
     update_message,
 )
+from accounts.api.sse import EventWriter, resume_frames, sse_response
 from .agent import get_politics_response, reset_politics_chat
-from .tools import classify_topic_relevance, real_time_news_cycle, real_time_news_first, real_time_news_search
-
-UPDATE_INTERVAL = 10
-
-
-def _stream_text(text: str):
-    escaped = text.replace('\n', '\\n')
-    for word in escaped.split(' '):
-        yield f"data: {word} \n\n"
-        time.sleep(0.02)
+from .live_news import POLL_INTERVAL, subscribe_to_topic
+from .tools import classify_topic_relevance, real_time_news_first, real_time_news_search, render_live_update
 
 
 def is_live_news_request(query: str) -> bool:
@@ -64,54 +61,60 @@ def is_live_news_request(query: str) -> bool:
 
 @csrf_exempt
 @require_GET
-def politics_stream(request):
-    user = authenticate_request_user(request, allow_query_token=True)
+async def politics_stream(request):
+    user = await sync_to_async(authenticate_request_user)(request, allow_query_token=True)
     if not user:
         return sse_error_response("Authentication required. Please sign in again.")
-    billing_profile = get_user_billing_profile(user, sync_remote=True)
+    billing_profile = await sync_to_async(get_user_billing_profile)(user)
     if not billing_profile or not billing_profile.is_paid:
         return sse_error_response("Upgrade to Pro to use domain agents.")
 
     query = request.GET.get("text", "").strip()
     chat_id = request.GET.get("chat_id", "").strip()
-    conversation = get_user_conversation(user, chat_id)
+    conversation = await sync_to_async(get_user_conversation)(user, chat_id)
     if not conversation:
         return sse_error_response("Conversation not found.")
+    resumed = await sync_to_async(resume_frames)(request, conversation)
+    if resumed is not None:
+        return sse_response(resumed)
 
-    builtin_agent = get_builtin_agent("builtin-politics")
+    builtin_agent = await sync_to_async(get_builtin_agent)("builtin-politics")
     if builtin_agent:
-        assign_agent_to_conversation(conversation, builtin_agent, conversation_type="domain_agent")
+        await sync_to_async(assign_agent_to_conversation)(conversation, builtin_agent, conversation_type="domain_agent")
 
     if not query:
         return JsonResponse({"error": "Query is required"}, status=400)
-    if not is_live_news_request(query) and billing_profile.token_total_used >= settings.PAID_MONTHLY_TOKEN_QUOTA:
+    if not is_live_news_request(query) and await sync_to_async(token_quota_reached)(billing_profile):
         return sse_token_limit_response("Token limit reached. Please wait until subscription renewal.")
 
-    previous_context = get_recent_context_messages(conversation, limit=10)
-    create_message(conversation, role="user", user=user, content_text=query)
+    previous_context = (await aget_context_window(conversation, model="x-ai/grok-4.1-fast")).messages
+    await sync_to_async(create_message)(conversation, role="user", user=user, content_text=query)
 
     flag_key = f"politics_news_active_{chat_id}"
     topic_key = f"politics_news_topic_{chat_id}"
-    signal_key = f"politics_news_signal_{chat_id}"
     counter_key = f"politics_news_counter_{chat_id}"
 
     if query.lower() in ["stop", "stop news", "stop updates", "end news"]:
-        cache.set(signal_key, True, timeout=60)
-        assistant_message = create_message(conversation, role="assistant", content_text="Stopping live updates...", status="streaming")
-
-        def stop_stream():
-            text = "Stopping live updates..." if cache.get(flag_key) else "No active news updates to stop."
-            if not cache.get(flag_key):
-                cache.delete(signal_key)
-            update_message(assistant_message, content_text=text, status="completed")
-            yield from _stream_text(text)
-            yield "data: [DONE]\n\n"
-
-        response = StreamingHttpResponse(stop_stream(), content_type="text/event-stream")
-        response["Cache-Control"] = "no-cache"
-        response["X-Accel-Buffering"] = "no"
-        response["Access-Control-Allow-Origin"] = "*"
-        return response
+        was_active = bool(await cache.aget(flag_key))
+        await asend_stop_signal("politics", chat_id)
+        if was_active:
+            # The live stream clears these itself; this covers a stream that
+            # is already gone.
+            await cache.adelete(flag_key)
+            await cache.adelete(topic_key)
+            await cache.adelete(counter_key)
+        assistant_message = await sync_to_async(create_message)(conversation, role="assistant", content_text="Stopping live updates...", status="streaming")
+
+        events = EventWriter(assistant_message.id)
+
+        async def stop_stream():
+            text = "Stopping live updates..." if was_active else "No active news updates to stop."
+            await sync_to_async(update_message)(assistant_message, content_text=text, status="completed")
+            for frame in events.text(text):
+                yield frame
+            yield events.done()
+
+        return sse_response(stop_stream())
 
     q_lower = query.lower()
     special_phrase = "live politics news"
@@ -156,101 +159,125 @@ def politics_stream(request):
                 break
 
     if topic is not None:
-        relevance = classify_topic_relevance(topic)
+        relevance = await sync_to_async(classify_topic_relevance, thread_sensitive=False)(topic)
         if not relevance["relevant"]:
-            assistant_message = create_message(conversation, role="assistant", content_text=relevance["reason"], status="completed")
+            assistant_message = await sync_to_async(create_message)(conversation, role="assistant", content_text=relevance["reason"], status="completed")
+
+            events = EventWriter(assistant_message.id)
 
-            def reject_stream():
-                yield from _stream_text(relevance["reason"])
-                yield "data: [DONE]\n\n"
+            async def reject_stream():
+                for frame in events.text(relevance["reason"]):
+                    yield frame
+                yield events.done()
 
-            response = StreamingHttpResponse(reject_stream(), content_type="text/event-stream")
-            response["Cache-Control"] = "no-cache"
-            response["X-Accel-Buffering"] = "no"
-            response["Access-Control-Allow-Origin"] = "*"
-            return response
+            return sse_response(reject_stream())
 
         refined_topic = relevance["refined_query"]
-        news_check = real_time_news_search(refined_topic, limit=2)
+        news_check = await sync_to_async(real_time_news_search, thread_sensitive=False)(refined_topic, limit=2)
         if "No recent political news found" in news_check or news_check.startswith("Failed"):
             text = (
                 f"Sorry, I couldn't find recent political news for **{topic}**. "
                 f"Please try a more specific topic."
             )
-            assistant_message = create_message(conversation, role="assistant", content_text=text, status="completed")
+            assistant_message = await sync_to_async(create_message)(conversation, role="assistant", content_text=text, status="completed")
 
-            def no_news_stream():
-                yield from _stream_text(text)
-                yield "data: [DONE]\n\n"
+            events = EventWriter(assistant_message.id)
 
-            response = StreamingHttpResponse(no_news_stream(), content_type="text/event-stream")
-            response["Cache-Control"] = "no-cache"
-            response["X-Accel-Buffering"] = "no"
-            response["Access-Control-Allow-Origin"] = "*"
-            return response
+            async def no_news_stream():
+                for frame in events.text(text):
+                    yield frame
+                yield events.done()
 
-        assistant_message = create_message(
+            return sse_response(no_news_stream())
+
+        assistant_message = await sync_to_async(create_message)(
             conversation,
             role="assistant",
             content_text="",
             status="streaming",
             message_type="live_update",
         )
-        cache.delete(signal_key)
-        cache.set(flag_key, True, timeout=3600)
-        cache.set(topic_key, refined_topic, timeout=3600)
-        cache.set(counter_key, 2, timeout=3600)
+        await cache.aset(flag_key, True, timeout=3600)
+        await cache.aset(topic_key, refined_topic, timeout=3600)
+        await cache.aset(counter_key, 2, timeout=3600)
+
+        events = EventWriter(assistant_message.id)
 
-        def live_stream():
+        async def live_stream():
             accumulated = ""
             try:
                 start_msg = (
                     f"Starting live politics news for **{topic.title()}**.\n"
-                    f"Updates every {UPDATE_INTERVAL} seconds. Press Stop to end."
+                    f"Checking for new articles every {POLL_INTERVAL} seconds. Press Stop to end."
                 )
                 accumulated += start_msg + "\n\n"
-                yield from _stream_text(start_msg)
+                yield events.live(True)
+                for frame in events.text(start_msg):
+                    yield frame
 
-                first_block = real_time_news_first(refined_topic)
+                first_block, first_articles = await sync_to_async(real_time_news_first, thread_sensitive=False)(
+                    refined_topic, with_articles=True
+                )
                 accumulated += first_block + "\n\n"
-                yield from _stream_text(first_block)
-
-                while cache.get(flag_key):
-                    stopped = False
-                    for _ in range(UPDATE_INTERVAL):
-                        if cache.get(signal_key):
-                            cache.delete(signal_key)
-                            cache.delete(flag_key)
-                            cache.delete(topic_key)
-                            cache.delete(counter_key)
+                await sync_to_async(save_streaming_text)(assistant_message, accumulated)
+                for frame in events.text(first_block):
+                    yield frame
+
+                # The shared topic poller only hands over articles this stream
+                # has not shown yet, and stops arrive on the stream's stop
+                # channel; quiet cycles send nothing and touch no cache keys.
+                deadline = time.monotonic() + LIVE_STREAM_MAX_SECONDS
+                async with live_stop_event("politics", chat_id) as stopped, \
+                        subscribe_to_topic(refined_topic, first_articles) as updates:
+                    # A stop sent before the channel was joined only cleared the flag.
+                    if not await cache.aget(flag_key):
+                        stopped.set()
+                    while True:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            await cache.adelete(flag_key)
+                            await cache.adelete(topic_key)
+                            await cache.adelete(counter_key)
+                            break
+
+                        articles = await next_update(updates.get(), stopped, timeout=remaining)
+                        if stopped.is_set():
+                            await cache.adelete(flag_key)
+                            await cache.adelete(topic_key)
+                            await cache.adelete(counter_key)
                             stop_text = "\n\nLive updates stopped. Ask me anything else!"
                             accumulated += stop_text
-                            yield from _stream_text(stop_text)
-                            stopped = True
+                            for frame in events.text(stop_text):
+                                yield frame
                             break
-                        time.sleep(1)
-                    if stopped:
-                        break
-
-                    counter = cache.get(counter_key, 2)
-                    payload = real_time_news_cycle(refined_topic, counter)
-                    cache.set(counter_key, counter + 1, timeout=3600)
-                    accumulated += payload + "\n\n"
-                    yield from _stream_text(payload)
-
-                update_message(assistant_message, content_text=accumulated.strip(), status="completed")
+                        if not articles:
+                            continue
+
+                        counter = await cache.aget(counter_key, 2)
+                        payload = render_live_update(articles, refined_topic, counter)
+                        await cache.aset(counter_key, counter + 1, timeout=3600)
+                        accumulated += payload + "\n\n"
+                        await sync_to_async(save_streaming_text)(assistant_message, accumulated)
+                        for frame in events.text(payload):
+                            yield frame
+
+                yield events.live(False)
+                await sync_to_async(update_message)(assistant_message, content_text=accumulated.strip(), status="completed")
+            except (asyncio.CancelledError, GeneratorExit):
+                # The client disconnected: end the live session and keep the updates sent so far.
+                await cache.adelete(flag_key)
+                await cache.adelete(topic_key)
+                await cache.adelete(counter_key)
+                await sync_to_async(update_message)(assistant_message, content_text=accumulated.strip(), status="interrupted")
+                raise
             except Exception as exc:
-                update_message(assistant_message, content_text=accumulated.strip(), status="failed")
-                yield from _stream_text(f"[ERROR] {str(exc)}")
-            yield "data: [DONE]\n\n"
+                await sync_to_async(update_message)(assistant_message, content_text=accumulated.strip(), status="failed")
+                yield events.error(str(exc))
+            yield events.done()
 
-        response = StreamingHttpResponse(live_stream(), content_type="text/event-stream")
-        response["Cache-Control"] = "no-cache"
-        response["X-Accel-Buffering"] = "no"
-        response["Access-Control-Allow-Origin"] = "*"
-        return response
+        return sse_response(live_stream())
 
-    assistant_message = create_message(
+    assistant_message = await sync_to_async(create_message)(
         conversation,
         role="assistant",
         content_text="",
@@ -258,25 +285,28 @@ def politics_stream(request):
         model_used="x-ai/grok-4.1-fast",
     )
 
-    def regular_stream():
+    events = EventWriter(assistant_message.id)
+
+    async def regular_stream():
         accumulated = ""
         try:
-            response_text = get_politics_response(query, thread_id=chat_id, history_messages=previous_context, user=user, track_tokens=True)
+            response_text = await get_politics_response(query, thread_id=chat_id, history_messages=previous_context, user=user, track_tokens=True)
             if isinstance(response_text, tuple):
                 response_text, _ = response_text
             accumulated = response_text
-            yield from _stream_text(response_text)
-            update_message(assistant_message, content_text=accumulated.strip(), status="completed", model_used="x-ai/grok-4.1-fast")
+            for frame in events.text(response_text):
+                yield frame
+            await sync_to_async(update_message)(assistant_message, content_text=accumulated.strip(), status="completed", model_used="x-ai/grok-4.1-fast")
+        except (asyncio.CancelledError, GeneratorExit):
+            # The client disconnected: keep what was generated so far.
+            await sync_to_async(update_message)(assistant_message, content_text=accumulated.strip(), status="interrupted", model_used="x-ai/grok-4.1-fast")
+            raise
         except Exception as exc:
-            update_message(assistant_message, content_text=accumulated.strip(), status="failed", model_used="x-ai/grok-4.1-fast")
-            yield from _stream_text(f"[ERROR] {str(exc)}")
-        yield "data: [DONE]\n\n"
-
-    response = StreamingHttpResponse(regular_stream(), content_type="text/event-stream")
-    response["Cache-Control"] = "no-cache"
-    response["X-Accel-Buffering"] = "no"
-    response["Access-Control-Allow-Origin"] = "*"
-    return response
+            await sync_to_async(update_message)(assistant_message, content_text=accumulated.strip(), status="failed", model_used="x-ai/grok-4.1-fast")
+            yield events.error(str(exc))
+        yield events.done()
+
+    return sse_response(regular_stream())
 
 
 @csrf_exempt
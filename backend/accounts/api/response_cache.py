@@ -0,0 +1,259 @@
+import hashlib
+import json
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from accounts.api.agent_registry import prompt_fingerprint
+from accounts.api.chat.embeddings import get_embedding_client, pack_vector, unpack_vector
+from accounts.models import ChatAsset
+
+CACHE_PREFIX = "response_cache:v1"
+METRICS_KEY = f"{CACHE_PREFIX}:metrics"
+CONTEXT_MESSAGES = 4           # trailing history messages folded into the key
+MAX_SEMANTIC_CANDIDATES = 200  # vectors compared per semantic lookup
+
+# Seconds an answer stays valid, per route. Cricket and politics answers
+# come from live scores and news, so they expire quickly.
+ROUTE_TTLS = {
+    "chat": 3600,
+    "custom_agent": 3600,
+    "cricket": 60,
+    "politics": 300,
+}
+
+# A streamed answer that used one of these tools expires as fast as the
+# tool's data. The cricket and politics routes are short-lived as a whole.
+TOOL_TTLS = {
+    "tavily_search": 300,
+}
+
+# Answers built from these tools are specific to one conversation. A
+# conversation with uploaded documents is not cached at all (see
+# response_cache_applies): a cached answer would skip the document search.
+UNCACHEABLE_TOOLS = frozenset({"document_search"})
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION_RE = re.compile(r"[\s?!.]+$")
+
+_embedding_client = None
+_embedding_lock = Lock()
+
+
+def response_cache_enabled() -> bool:
+    return getattr(settings, "RESPONSE_CACHE_ENABLED", False)
+
+
+def conversation_has_documents(conversation_id) -> bool:
+    """Whether document_search has anything to find in this conversation (every ingestion job has its asset)."""
+    if not conversation_id:
+        return False
+    return ChatAsset.objects.filter(
+        conversation_id=conversation_id,
+        asset_type=ChatAsset.AssetType.UPLOADED_PDF,
+    ).exists()
+
+
+async def aresponse_cache_applies(conversation_id=None) -> bool:
+    """
+    Whether a request may be answered from, and stored in, the shared cache.
+
+    Keys are shared across users and conversations, so a conversation with
+    uploaded documents never uses it: an answer cached elsewhere without a
+    document search would stand in for searching this conversation's files.
+    """
+    if not response_cache_enabled():
+        return False
+    return not await sync_to_async(conversation_has_documents)(conversation_id)
+
+
+def similarity_threshold() -> float:
+    """Cosine similarity needed for a semantic hit; 0 disables semantic lookup."""
+    return getattr(settings, "RESPONSE_CACHE_SIMILARITY", 0.0)
+
+
+def normalize_prompt(text: str) -> str:
+    text = _WHITESPACE_RE.sub(" ", (text or "").strip().lower())
+    return _TRAILING_PUNCTUATION_RE.sub("", text)
+
+
+def context_digest(history_messages, limit: int = CONTEXT_MESSAGES) -> str:
+    """Digest of the last `limit` messages, so follow-ups only match the same thread state."""
+    turns = [
+        [getattr(message, "role", ""), getattr(message, "content_text", "") or ""]
+        for message in list(history_messages or [])[-limit:]
+    ]
+    turns = [turn for turn in turns if turn[1]]
+    if not turns:
+        return "none"
+    return hashlib.sha256(json.dumps(turns).encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class ResponseCacheKey:
+    route: str
+    model: str
+    prompt_fp: str
+    context: str
+    text: str
+    vector: Optional[list] = field(default=None, repr=False)
+
+    @property
+    def bucket(self) -> str:
+        return f"{CACHE_PREFIX}:{self.route}:{self.model}:{self.prompt_fp}:{self.context}"
+
+    @property
+    def text_digest(self) -> str:
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+    @property
+    def entry_key(self) -> str:
+        return f"{self.bucket}:{self.text_digest}"
+
+    @property
+    def index_key(self) -> str:
+        return f"{self.bucket}:vectors"
+
+
+def build_cache_key(route: str, model: str, system_prompt: str, user_input: str, history_messages=None) -> ResponseCacheKey:
+    return ResponseCacheKey(
+        route=route,
+        model=model,
+        prompt_fp=prompt_fingerprint(system_prompt),
+        context=context_digest(history_messages),
+        text=normalize_prompt(user_input),
+    )
+
+
+def entry_ttl(route: str, tools_used=()) -> Optional[int]:
+    """TTL for an answer, or None when it must not be cached."""
+    if UNCACHEABLE_TOOLS.intersection(tools_used):
+        return None
+    ttls = [ROUTE_TTLS.get(route, 0)]
+    ttls.extend(TOOL_TTLS[tool] for tool in tools_used if tool in TOOL_TTLS)
+    ttl = min(ttls)
+    return ttl if ttl > 0 else None
+
+
+# ────────────────────────────────────────────────
+# Metrics
+# ────────────────────────────────────────────────
+
+def record_metric(route: str, outcome: str):
+    try:
+        get_redis_connection("default").hincrby(METRICS_KEY, f"{route}:{outcome}", 1)
+    except Exception as exc:
+        print(f"[WARN] Response cache metric failed: {exc}")
+
+
+def get_response_cache_metrics() -> dict:
+    """{route: {"hit": n, "semantic_hit": n, "miss": n, "store": n}}"""
+    metrics = {}
+    for raw_field, raw_value in get_redis_connection("default").hgetall(METRICS_KEY).items():
+        route, outcome = raw_field.decode("utf-8").split(":", 1)
+        metrics.setdefault(route, {})[outcome] = int(raw_value)
+    return metrics
+
+
+def reset_response_cache_metrics():
+    get_redis_connection("default").delete(METRICS_KEY)
+
+
+# ────────────────────────────────────────────────
+# Lookup and store
+# ────────────────────────────────────────────────
+
+def _embed(text: str) -> list[float]:
+    global _embedding_client
+    if _embedding_client is None:
+        with _embedding_lock:
+            if _embedding_client is None:
+                _embedding_client = get_embedding_client()
+    return _embedding_client.embed_query(text)
+
+
+def _cosine(left, right) -> float:
+    dot = sum(a * b for a, b in zip(left, right))
+    norm = math.sqrt(sum(a * a for a in left)) * math.sqrt(sum(b * b for b in right))
+    return dot / norm if norm else 0.0
+
+
+def _semantic_lookup(key: ResponseCacheKey, threshold: float):
+    connection = get_redis_connection("default")
+    candidates = connection.hgetall(key.index_key)
+    if not candidates:
+        return None
+
+    key.vector = _embed(key.text)
+    best_digest, best_score = None, threshold
+    for raw_digest, data in candidates.items():
+        score = _cosine(key.vector, unpack_vector(data))
+        if score >= best_score:
+            best_digest, best_score = raw_digest.decode("utf-8"), score
+    if best_digest is None:
+        return None
+
+    entry = cache.get(f"{key.bucket}:{best_digest}")
+    if entry is None:
+        # The answer expired before its vector; drop the vector too.
+        connection.hdel(key.index_key, best_digest)
+        return None
+    return entry["text"]
+
+
+def lookup_response(key: ResponseCacheKey) -> Optional[str]:
+    try:
+        entry = cache.get(key.entry_key)
+        if entry is not None:
+            record_metric(key.route, "hit")
+            return entry["text"]
+
+        threshold = similarity_threshold()
+        if threshold > 0:
+            text = _semantic_lookup(key, threshold)
+            if text is not None:
+                record_metric(key.route, "semantic_hit")
+                return text
+    except Exception as exc:
+        print(f"[WARN] Response cache lookup failed: {exc}")
+        return None
+
+    record_metric(key.route, "miss")
+    return None
+
+
+def store_response(key: ResponseCacheKey, text: str, tools_used=()):
+    text = (text or "").strip()
+    ttl = entry_ttl(key.route, tools_used)
+    if not text or ttl is None:
+        return
+
+    try:
+        cache.set(key.entry_key, {"text": text, "stored_at": int(time.time())}, timeout=ttl)
+        if similarity_threshold() > 0:
+            connection = get_redis_connection("default")
+            if connection.hlen(key.index_key) < MAX_SEMANTIC_CANDIDATES:
+                vector = key.vector or _embed(key.text)
+                pipe = connection.pipeline()
+                pipe.hset(key.index_key, key.text_digest, pack_vector(vector))
+                pipe.expire(key.index_key, max(ttl, connection.ttl(key.index_key)))
+                pipe.execute()
+        record_metric(key.route, "store")
+    except Exception as exc:
+        print(f"[WARN] Response cache store failed: {exc}")
+
+
+async def alookup_response(key: ResponseCacheKey) -> Optional[str]:
+    return await sync_to_async(lookup_response, thread_sensitive=False)(key)
+
+
+async def astore_response(key: ResponseCacheKey, text: str, tools_used=()):
+    await sync_to_async(store_response, thread_sensitive=False)(key, text, tools_used)
@@ -0,0 +1,233 @@
+import asyncio
+import json
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+
+from accounts.api.persistence import save_streaming_text
+from accounts.models import Message
+
+COALESCE_INTERVAL = 0.03     # seconds a chunk may wait for followers before it is sent
+COALESCE_MAX_CHARS = 2048    # flush as soon as this much text is buffered
+HEARTBEAT_INTERVAL = 15      # seconds of silence before a keep-alive comment
+HEARTBEAT = ": ping\n\n"
+PARTIAL_SAVE_INTERVAL = 2    # seconds between saves of a message that is still streaming
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "Cache-Control, Last-Event-ID",
+}
+
+# ────────────────────────────────────────────────
+# Stream protocol
+#
+# Every frame is a typed event with a JSON payload:
+#
+#   token        {"text"}                 answer text, appended in order
+#   title        {"title"}                generated conversation title
+#   image        {"url"}                  generated image
+#   email_draft  {"draft"}                draft the user can confirm and send
+#   live         {"active"}               live updates started / stopped
+#   snapshot     {"text", "status"}       persisted message, sent on resume
+#   error        {"message", ...}         terminal failure
+#   done         {}                       end of stream
+#
+# Ids are "<assistant message id>:<sequence>". A reconnect carrying
+# Last-Event-ID gets the persisted message instead of a new generation;
+# streams save their text as they go (StreamingText) so that snapshot
+# is current, and the client replaces what it rendered with it.
+# ────────────────────────────────────────────────
+
+
+class EventWriter:
+    """Formats and numbers the events of one stream."""
+
+    def __init__(self, stream_id="", sequence: int = 0):
+        self.stream_id = str(stream_id or "")
+        self.sequence = sequence
+
+    def event(self, name: str, **data) -> str:
+        self.sequence += 1
+        event_id = f"{self.stream_id}:{self.sequence}" if self.stream_id else str(self.sequence)
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        return f"id: {event_id}\nevent: {name}\ndata: {payload}\n\n"
+
+    def token(self, text: str) -> str:
+        return self.event("token", text=text)
+
+    def text(self, text: str, max_chars: int = COALESCE_MAX_CHARS):
+        """Token events for text that is already complete, at most `max_chars` each."""
+        for start in range(0, len(text or ""), max_chars):
+            yield self.token(text[start:start + max_chars])
+
+    def title(self, title: str) -> str:
+        return self.event("title", title=title)
+
+    def image(self, url: str) -> str:
+        return self.event("image", url=url)
+
+    def email_draft(self, draft: dict) -> str:
+        return self.event("email_draft", draft=draft)
+
+    def live(self, active: bool) -> str:
+        return self.event("live", active=active)
+
+    def snapshot(self, text: str, status: str) -> str:
+        return self.event("snapshot", text=text, status=status)
+
+    def error(self, message: str, **extra) -> str:
+        return self.event("error", message=message, **extra)
+
+    def done(self) -> str:
+        return self.event("done")
+
+
+class StreamingText:
+    """
+    Text of a message being streamed, saved every `interval` seconds.
+
+    The saved text is what a reconnecting client gets as its snapshot.
+    """
+
+    def __init__(self, message, interval: float = PARTIAL_SAVE_INTERVAL):
+        self.message = message
+        self.interval = interval
+        self.text = ""
+        self._saved_at = time.monotonic()
+        self._saved_length = 0
+
+    async def add(self, text: str):
+        self.text += text
+        if time.monotonic() - self._saved_at >= self.interval:
+            await self.save()
+
+    async def save(self):
+        if len(self.text) != self._saved_length:
+            await sync_to_async(save_streaming_text)(self.message, self.text)
+            self._saved_length = len(self.text)
+        self._saved_at = time.monotonic()
+
+
+async def coalesce_chunks(chunks, interval: float = COALESCE_INTERVAL, max_chars: int = COALESCE_MAX_CHARS):
+    """
+    Merge an async iterable of text chunks into fewer, larger ones.
+
+    Buffered text goes out once `max_chars` are pending or `interval`
+    seconds after its first chunk arrived, whichever comes first, so a pause
+    in generation never holds text back for longer than `interval`. Nothing
+    is delayed on purpose: the stream ends as soon as `chunks` does.
+    """
+    iterator = chunks.__aiter__()
+    loop = asyncio.get_running_loop()
+    buffer = []
+    buffered = 0
+    deadline = None
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield "".join(buffer)
+                buffer, buffered, deadline = [], 0, None
+                continue
+
+            task, pending = pending, None
+            try:
+                chunk = task.result()
+            except StopAsyncIteration:
+                break
+            if not chunk:
+                continue
+            if deadline is None:
+                deadline = loop.time() + interval
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= max_chars:
+                yield "".join(buffer)
+                buffer, buffered, deadline = [], 0, None
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+
+
+async def _static_frames(frames):
+    for frame in frames:
+        yield frame
+
+
+async def _with_heartbeats(frames, interval: float):
+    """
+    Pass `frames` through, adding a heartbeat comment after `interval` idle seconds.
+
+    When the client goes away the server cancels this generator; the frame
+    being produced is cancelled and the source generator closed, so the
+    model call behind it stops instead of running to the end unseen.
+    """
+    iterator = frames.__aiter__()
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield HEARTBEAT
+                continue
+
+            task, pending = pending, None
+            try:
+                frame = task.result()
+            except StopAsyncIteration:
+                return
+            yield frame
+    except (asyncio.CancelledError, GeneratorExit):
+        print("[INFO] SSE client disconnected; stopping the stream")
+        raise
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def sse_response(frames, heartbeat: float = HEARTBEAT_INTERVAL) -> StreamingHttpResponse:
+    """Event-stream response for an async generator (or a list) of frames."""
+    if not hasattr(frames, "__aiter__"):
+        frames = _static_frames(frames)
+    response = StreamingHttpResponse(_with_heartbeats(frames, heartbeat), content_type="text/event-stream")
+    for header, value in SSE_HEADERS.items():
+        response[header] = value
+    return response
+
+
+def resume_frames(request, conversation):
+    """
+    Frames answering a reconnect, or None for a fresh request.
+
+    A browser that lost the stream reconnects with the same URL plus the
+    Last-Event-ID header. Running the prompt again would duplicate the
+    exchange, so the client gets what was persisted for that message.
+    """
+    last_event_id = request.headers.get("Last-Event-ID", "")
+    message_id, _, sequence = last_event_id.partition(":")
+    if not message_id:
+        return None
+
+    writer = EventWriter(message_id, int(sequence) if sequence.isdigit() else 0)
+    try:
+        message = Message.objects.only("content_text", "status").get(pk=uuid.UUID(message_id), conversation=conversation)
+    except (ValueError, Message.DoesNotExist):
+        return [writer.error("This response can no longer be resumed."), writer.done()]
+    return [writer.snapshot(message.content_text, message.status), writer.done()]
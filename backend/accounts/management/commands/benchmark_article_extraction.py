@@ -0,0 +1,111 @@
+import re
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.api.politics_agent.scraping import READ_CHUNK_SIZE, extract_article_text
+
+DEFAULT_FIXTURES = Path(__file__).resolve().parents[2] / "api" / "politics_agent" / "benchmarks" / "fixtures"
+
+REGEX_SKIP_TAGS = (
+    "style", "script", "head", "nav", "header", "footer",
+    "aside", "figure", "noscript", "iframe", "svg",
+    "form", "button", "select", "textarea",
+)
+REGEX_JUNK_PATTERNS = (
+    r"^https?://",
+    r"font-family|font-face|@media|@charset",
+    r"function\s*\(|var\s+\w+\s*=",
+    r"^\s*{.*}\s*$",
+    r"Ad Feedback|Video Ad|play video",
+    r"Source:\s*\w+",
+)
+REGEX_JUNK_SUBSTRINGS = (
+    "cookie", "subscribe", "sign in", "sign up", "advertisement",
+    "javascript", "privacy policy", "terms of service",
+    "all rights reserved", "follow us", "share this", "read more",
+    "click here", "loading", "newsletter", "getty images",
+    "associated press", "© 20", "copyright 20",
+    "skip to content", "skip to main", "font-face", ":root{",
+)
+
+
+def regex_extract(html: str) -> str:
+    """The previous whole-document regex extractor, kept as the baseline."""
+    for tag in REGEX_SKIP_TAGS:
+        html = re.sub(rf"<{tag}[\s>].*?</{tag}>", " ", html, flags=re.DOTALL | re.IGNORECASE)
+    html = re.sub(r"<!--.*?-->", " ", html, flags=re.DOTALL)
+    html = re.sub(r"[@:][a-zA-Z\-]+\s*[{(][^}]*[})]", " ", html)
+    raw_paras = re.findall(r"<p[^>]*>(.*?)</p>", html, re.DOTALL | re.IGNORECASE)
+
+    def _strip(text):
+        text = re.sub(r"<[^>]+>", "", text)
+        text = re.sub(r"&nbsp;", " ", text)
+        text = re.sub(r"&amp;", "&", text)
+        text = re.sub(r"&lt;", "<", text)
+        text = re.sub(r"&gt;", ">", text)
+        text = re.sub(r"&#\d+;", "", text)
+        text = re.sub(r"&[a-z]+;", "", text)
+        return re.sub(r"\s+", " ", text).strip()
+
+    meaningful = []
+    for p in (_strip(p) for p in raw_paras):
+        if len(p) < 45:
+            continue
+        if not re.search(r"\b(is|are|was|were|has|have|said|says|will|told|found|shows|warns|calls|urges|strikes|attacks|launched|threatened|agreed|signed|voted|confirmed)\b", p, re.IGNORECASE):
+            continue
+        if any(junk in p.lower() for junk in REGEX_JUNK_SUBSTRINGS):
+            continue
+        if any(re.search(pattern, p, re.IGNORECASE) for pattern in REGEX_JUNK_PATTERNS):
+            continue
+        meaningful.append(p)
+        if sum(len(m) for m in meaningful) >= 800:
+            break
+    return " ".join(meaningful)[:800]
+
+
+def streamed_extract(html: str) -> str:
+    """Feed the page in download-sized chunks, as the scraper does."""
+    return extract_article_text(html[start:start + READ_CHUNK_SIZE] for start in range(0, len(html), READ_CHUNK_SIZE))
+
+
+class Command(BaseCommand):
+    help = "Compare the regex article extractor with the streaming HTML extractor on stored pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fixtures", default=str(DEFAULT_FIXTURES), help="Directory of .html pages.")
+        parser.add_argument("--repeat", type=int, default=50, help="Timed runs per page and extractor.")
+
+    def handle(self, *args, **options):
+        pages = sorted(Path(options["fixtures"]).glob("*.html"))
+        if not pages:
+            raise CommandError(f"No .html fixtures in {options['fixtures']}")
+
+        extractors = (("regex", regex_extract), ("streaming", streamed_extract))
+        self.stdout.write(f"{'page':<28}{'KB':>6}" + "".join(f"{name + ' ms':>14}{'chars':>7}" for name, _ in extractors) + f"{'same':>6}")
+
+        totals = {name: [] for name, _ in extractors}
+        for page in pages:
+            html = page.read_text(encoding="utf-8")
+            row = f"{page.stem[:27]:<28}{len(html) / 1024:>6.0f}"
+            outputs = []
+            for name, extract in extractors:
+                timings = []
+                text = ""
+                for _ in range(max(1, options["repeat"])):
+                    started = time.perf_counter()
+                    text = extract(html)
+                    timings.append((time.perf_counter() - started) * 1000)
+                median = statistics.median(timings)
+                totals[name].append(median)
+                outputs.append(text)
+                row += f"{median:>14.2f}{len(text):>7}"
+            row += f"{'yes' if outputs[0] == outputs[1] else 'no':>6}"
+            self.stdout.write(row)
+
+        self.stdout.write(
+            "median per page: "
+            + ", ".join(f"{name} {statistics.median(values):.2f} ms" for name, values in totals.items())
+        )
@@ -0,0 +1,80 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.api.chat.gemini import MODEL_ROUTER
+from accounts.api.chat.model_router import TfidfRouteClassifier
+
+DEFAULT_PROMPTS = Path(__file__).resolve().parents[2] / "api" / "chat" / "benchmarks" / "router_prompts.json"
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure accuracy and per-call latency of the auto model router on a "
+        "labelled prompt set, with and without the TF-IDF classifier."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prompts", default=str(DEFAULT_PROMPTS), help="JSON file with labelled prompts.")
+        parser.add_argument("--repeat", type=int, default=200, help="Timed routing calls per prompt.")
+        parser.add_argument("--min-score", type=float, default=0.3, help="Classifier confidence threshold.")
+
+    def handle(self, *args, **options):
+        try:
+            samples = [
+                (item["prompt"], item["route"])
+                for item in json.loads(Path(options["prompts"]).read_text(encoding="utf-8"))["prompts"]
+            ]
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Could not read prompts: {exc}")
+        if len(samples) < 2:
+            raise CommandError("At least two labelled prompts are required.")
+
+        self.stdout.write(f"{len(samples)} prompts, {options['repeat']} calls each")
+        self.stdout.write(f"{'router':<20}{'accuracy':>10}{'p50 us':>10}{'p95 us':>10}")
+
+        self._report("rules", [(MODEL_ROUTER, samples)], options["repeat"])
+
+        # Two folds, so the classifier is never scored on prompts it was fit on.
+        folds = [samples[0::2], samples[1::2]]
+        runs = []
+        for index, held_out in enumerate(folds):
+            classifier = TfidfRouteClassifier(min_score=options["min_score"]).fit(folds[1 - index])
+            runs.append((MODEL_ROUTER.with_classifier(classifier), held_out))
+        misses = self._report("rules+classifier", runs, options["repeat"])
+
+        for prompt, expected, actual in misses:
+            self.stdout.write(f"  miss: {expected:<10} -> {actual:<10} {prompt}")
+
+    def _report(self, label, runs, repeat):
+        correct = 0
+        total = 0
+        timings = []
+        misses = []
+        for router, samples in runs:
+            for prompt, expected in samples:
+                decision = None
+                started = time.perf_counter()
+                for _ in range(max(1, repeat)):
+                    decision = router.route(prompt, "auto")
+                timings.append((time.perf_counter() - started) * 1_000_000 / max(1, repeat))
+
+                actual = decision.rule if decision.rule in router.rule_models else "default"
+                total += 1
+                if actual == expected:
+                    correct += 1
+                else:
+                    misses.append((prompt, expected, actual))
+
+        self.stdout.write(
+            f"{label:<20}{correct / total:>10.2f}"
+            f"{percentile(timings, 0.5):>10.1f}{percentile(timings, 0.95):>10.1f}"
+        )
+        return misses
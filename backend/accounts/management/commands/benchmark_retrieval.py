@@ -0,0 +1,128 @@
+import hashlib
+import json
+import math
+import re
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from langchain_core.embeddings import Embeddings
+
+from accounts.api.chat.documents import EMBEDDING_DIMENSIONS, build_vectorstore
+from accounts.api.chat.embeddings import CachedEmbeddings
+from accounts.api.chat.retrieval import HybridRetriever, get_default_reranker
+
+DEFAULT_CORPUS = Path(__file__).resolve().parents[2] / "api" / "chat" / "benchmarks" / "retrieval_corpus.json"
+BENCHMARK_COLLECTION = "retrieval_benchmark"
+BENCHMARK_CONVERSATION = "retrieval-benchmark"
+
+MODES = (
+    ("vector", "vector", False),
+    ("lexical", "lexical", False),
+    ("hybrid", "hybrid", False),
+    ("hybrid+rerank", "hybrid", True),
+)
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings so the benchmark runs without an API key."""
+
+    def __init__(self, dimensions=EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _embed(self, text):
+        vector = [0.0] * self.dimensions
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure recall@k and latency of vector, lexical and hybrid document "
+        "retrieval on a fixed local corpus."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="JSON file with documents and labelled queries.")
+        parser.add_argument("--k", type=int, default=3, help="Results returned per query.")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query and mode.")
+        parser.add_argument(
+            "--provider",
+            choices=("hashing", "cohere"),
+            default="hashing",
+            help="hashing runs offline; cohere uses the production embedding model.",
+        )
+        parser.add_argument("--max-distance", type=float, default=None, help="Override the vector distance cutoff.")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark collection afterwards.")
+
+    def handle(self, *args, **options):
+        try:
+            corpus = json.loads(Path(options["corpus"]).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Could not read corpus: {exc}")
+
+        embeddings = HashingEmbeddings() if options["provider"] == "hashing" else CachedEmbeddings()
+        vectorstore = build_vectorstore(embeddings, collection_name=BENCHMARK_COLLECTION)
+        vectorstore.delete_collection()
+        vectorstore.create_collection()
+        vectorstore.add_texts(
+            [doc["text"] for doc in corpus["documents"]],
+            metadatas=[
+                {"conversation_id": BENCHMARK_CONVERSATION, "asset_id": doc["id"], "doc_id": doc["id"]}
+                for doc in corpus["documents"]
+            ],
+        )
+
+        retriever_options = {"collection_name": BENCHMARK_COLLECTION, "reranker": get_default_reranker()}
+        if options["max_distance"] is not None:
+            retriever_options["max_vector_distance"] = options["max_distance"]
+        retriever = HybridRetriever(vectorstore, **retriever_options)
+
+        k = options["k"]
+        queries = corpus["queries"]
+        self.stdout.write(f"{len(corpus['documents'])} documents, {len(queries)} queries, k={k}, provider={options['provider']}")
+        self.stdout.write(f"{'mode':<15}{'recall@' + str(k):>10}{'p50 ms':>10}{'p95 ms':>10}")
+
+        try:
+            for label, mode, rerank in MODES:
+                recalls = []
+                timings = []
+                for item in queries:
+                    results = []
+                    for _ in range(max(1, options["repeat"])):
+                        started = time.perf_counter()
+                        results = retriever.search(
+                            item["query"],
+                            conversation_id=BENCHMARK_CONVERSATION,
+                            k=k,
+                            mode=mode,
+                            rerank=rerank,
+                        )
+                        timings.append((time.perf_counter() - started) * 1000)
+                    found = {doc.metadata.get("doc_id") for doc in results}
+                    relevant = set(item["relevant"])
+                    recalls.append(len(found & relevant) / len(relevant))
+
+                self.stdout.write(
+                    f"{label:<15}{statistics.mean(recalls):>10.2f}"
+                    f"{percentile(timings, 0.5):>10.1f}{percentile(timings, 0.95):>10.1f}"
+                )
+        finally:
+            if not options["keep"]:
+                vectorstore.delete_collection()
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from accounts.api.billing.services import flush_token_usage_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the Redis token usage counters into BillingProfile rows. "
+        "Run periodically (e.g. every minute from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Counters to pop from the dirty set per round.")
+
+    def handle(self, *args, **options):
+        flushed = flush_token_usage_counters(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Flushed token usage for {flushed} billing profile(s)."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from accounts.api.chat.documents import backfill_chunk_scope, prepare_vector_indexes
+from accounts.models import ChatAsset
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the scope and full-text indexes on the document vector store and tag "
+        "chunks stored before per-conversation scoping with their conversation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--skip-backfill", action="store_true", help="Only create the indexes.")
+
+    def handle(self, *args, **options):
+        if not options["skip_backfill"]:
+            assets = ChatAsset.objects.filter(asset_type=ChatAsset.AssetType.UPLOADED_PDF).exclude(file="")
+            updated = backfill_chunk_scope(assets.iterator())
+            self.stdout.write(f"Tagged {updated} existing chunk(s) with their conversation.")
+
+        prepare_vector_indexes()
+        self.stdout.write(self.style.SUCCESS("Vector store indexes are in place."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from accounts.api.billing.services import (
+    StripeServiceError,
+    profiles_due_for_reconciliation,
+    stripe_is_configured,
+    sync_subscription_from_stripe,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-sync billing profiles with Stripe when a webhook may have been missed. "
+        "Run periodically (e.g. every 15 minutes from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=500, help="Maximum profiles to sync in one run.")
+
+    def handle(self, *args, **options):
+        if not stripe_is_configured():
+            self.stdout.write("Stripe is not configured; nothing to reconcile.")
+            return
+
+        synced = failed = 0
+        for profile in profiles_due_for_reconciliation().order_by("last_verified_at")[:options["limit"]]:
+            try:
+                sync_subscription_from_stripe(profile)
+                synced += 1
+            except StripeServiceError as exc:
+                failed += 1
+                self.stderr.write(f"Billing profile {profile.pk}: {exc}")
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {synced} billing profile(s), {failed} failed."))
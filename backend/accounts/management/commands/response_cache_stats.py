@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from accounts.api.response_cache import get_response_cache_metrics, reset_response_cache_metrics
+
+OUTCOMES = ("hit", "semantic_hit", "miss", "store")
+
+
+class Command(BaseCommand):
+    help = "Print response cache hit/miss counters per route."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", help="Print the counters as JSON for scraping.")
+        parser.add_argument("--reset", action="store_true", help="Clear the counters after printing them.")
+
+    def handle(self, *args, **options):
+        metrics = get_response_cache_metrics()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(metrics, sort_keys=True))
+        else:
+            self.stdout.write(f"{'route':<15}" + "".join(f"{outcome:>14}" for outcome in OUTCOMES) + f"{'hit rate':>10}")
+            for route in sorted(metrics):
+                counts = metrics[route]
+                lookups = counts.get("hit", 0) + counts.get("semantic_hit", 0) + counts.get("miss", 0)
+                hit_rate = (counts.get("hit", 0) + counts.get("semantic_hit", 0)) / lookups if lookups else 0.0
+                self.stdout.write(
+                    f"{route:<15}" + "".join(f"{counts.get(outcome, 0):>14}" for outcome in OUTCOMES) + f"{hit_rate:>10.2f}"
+                )
+
+        if options["reset"]:
+            reset_response_cache_metrics()
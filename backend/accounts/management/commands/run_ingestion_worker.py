@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from accounts.api.chat.ingestion import EMBED_WORKERS, PARSE_WORKERS, STAGE_QUEUE_SIZE, IngestionPipeline
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the document ingestion worker: parse uploaded PDFs, embed their "
+        "chunks and store them in the vector store. Run one or more alongside the web server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--parse-workers", type=int, default=PARSE_WORKERS, help="Documents parsed in parallel.")
+        parser.add_argument("--embed-workers", type=int, default=EMBED_WORKERS, help="Embedding batches in flight at once.")
+        parser.add_argument("--queue-size", type=int, default=STAGE_QUEUE_SIZE, help="Batches buffered between stages.")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit once no queued jobs remain.")
+
+    def handle(self, *args, **options):
+        pipeline = IngestionPipeline(
+            parse_workers=max(1, options["parse_workers"]),
+            embed_workers=max(1, options["embed_workers"]),
+            queue_size=max(1, options["queue_size"]),
+        )
+        self.stdout.write("Ingestion worker started.")
+        pipeline.run(once=options["once"], poll_interval=options["poll_interval"])
+        self.stdout.write(self.style.SUCCESS("Ingestion worker stopped."))
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_next_sequence_no(apps, schema_editor):
+    Conversation = apps.get_model("accounts", "Conversation")
+    Message = apps.get_model("accounts", "Message")
+
+    max_sequence = (
+        Message.objects.filter(conversation=OuterRef("pk"))
+        .values("conversation")
+        .annotate(max_sequence=Max("sequence_no"))
+        .values("max_sequence")
+    )
+    Conversation.objects.update(
+        next_sequence_no=Coalesce(Subquery(max_sequence), 0) + 1,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0008_remove_chat_with_prefix_from_agent_conversations"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="next_sequence_no",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(backfill_next_sequence_no, migrations.RunPython.noop),
+    ]
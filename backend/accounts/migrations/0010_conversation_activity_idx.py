@@ -0,0 +1,25 @@
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0009_conversation_next_sequence_no"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="conversation",
+            index=models.Index(
+                models.F("user"),
+                models.F("status"),
+                models.OrderBy(
+                    django.db.models.functions.comparison.Coalesce("last_message_at", "created_at"),
+                    descending=True,
+                ),
+                models.OrderBy(models.F("id"), descending=True),
+                name="conversation_activity_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0012_embeddingcacheentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="context_summary",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="summary_through_sequence_no",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -2,6 +2,8 @@ import uuid
 
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 
@@ -163,11 +165,25 @@ class Conversation(models.Model):
     title = models.CharField(max_length=255, blank=True, default="New Chat")
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.ACTIVE)
     last_message_at = models.DateTimeField(blank=True, null=True)
+    next_sequence_no = models.PositiveIntegerField(default=1)
+    # Rolling summary of every message up to summary_through_sequence_no,
+    # sent to the model in place of those messages.
+    context_summary = models.TextField(blank=True, default="")
+    summary_through_sequence_no = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-last_message_at", "-created_at"]
+        indexes = [
+            models.Index(
+                F("user"),
+                F("status"),
+                Coalesce("last_message_at", "created_at").desc(),
+                F("id").desc(),
+                name="conversation_activity_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.title}"
@@ -191,6 +207,7 @@ class Message(models.Model):
         STREAMING = "streaming", "Streaming"
         COMPLETED = "completed", "Completed"
         FAILED = "failed", "Failed"
+        INTERRUPTED = "interrupted", "Interrupted"
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name="messages")
@@ -264,6 +281,57 @@ class ChatAsset(models.Model):
         return self.original_name or f"{self.asset_type} {self.id}"
 
 
+class DocumentIngestionJob(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        PARSING = "parsing", "Parsing"
+        EMBEDDING = "embedding", "Embedding"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    asset = models.ForeignKey(ChatAsset, on_delete=models.CASCADE, related_name="ingestion_jobs")
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name="ingestion_jobs")
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="ingestion_jobs")
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    pages_total = models.PositiveIntegerField(default=0)
+    chunks_total = models.PositiveIntegerField(default=0)
+    chunks_stored = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error_message = models.TextField(blank=True, default="")
+    lease_owner = models.CharField(max_length=64, blank=True, default="")
+    lease_expires_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="ingestion_job_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id} {self.status}"
+
+
+class EmbeddingCacheEntry(models.Model):
+    model = models.CharField(max_length=100)
+    content_hash = models.CharField(max_length=64)
+    dimensions = models.PositiveIntegerField()
+    vector = models.BinaryField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["model", "content_hash"], name="unique_embedding_per_model_content"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.content_hash[:12]}"
+
+
 class EmailRecord(models.Model):
     class Status(models.TextChoices):
         DRAFTED = "drafted", "Drafted"
@@ -12,6 +12,9 @@ ALLOWED_HOSTS = []
 
 # ---------------- Applications ----------------
 INSTALLED_APPS = [
+    # ASGI server (must precede staticfiles so runserver serves over ASGI)
+    'daphne',
+
     # Django
     'django.contrib.admin',
     'django.contrib.auth',
@@ -81,6 +84,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
 
 # ---------------- Database ----------------
 DATABASES = {
@@ -183,7 +187,16 @@ DEFAULT_FROM_EMAIL = "no-reply@yourdomain.com"
 FRONTEND_APP_URL = os.getenv("FRONTEND_APP_URL", "http://127.0.0.1:3000")
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "")
 STRIPE_PRO_MONTHLY_PRICE_ID = os.getenv("STRIPE_PRO_MONTHLY_PRICE_ID", "")
+STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "")
+BILLING_PROFILE_CACHE_TTL = int(os.getenv("BILLING_PROFILE_CACHE_TTL", "60"))
 PAID_MONTHLY_TOKEN_QUOTA = int(os.getenv("PAID_MONTHLY_TOKEN_QUOTA", "1000000"))
+# Opt-in cache of agent answers for repeated prompts; a similarity above 0
+# also serves near-duplicates (embedding cosine similarity, e.g. 0.95).
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0"))
+# Token budget for the conversation history sent with each agent request;
+# older turns are folded into a rolling summary.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
 
 
 CACHES = {
@@ -52,6 +52,18 @@ function ChatPageContent() {
   const agentChatIdsRef = useRef(new Map());
   const pendingAgentSelectionRef = useRef(null);
 
+  const [chatsCursor, setChatsCursor] = useState(null);
+  const [loadingMoreChats, setLoadingMoreChats] = useState(false);
+  const messageCursorsRef = useRef(new Map());
+  const messageRequestsRef = useRef(new Map());
+
+  const toChatSummary = (conversation) => ({
+    id: conversation.id,
+    name: conversation.name,
+    lastActive: conversation.lastActive,
+    agentId: conversation.agentId || null,
+  });
+
   const loadPersistedChats = useCallback(async () => {
     const response = await fetchWithAuth(`${API_BASE_URL}/api/chat/conversations/`, {
       method: "GET",
@@ -62,26 +74,125 @@ function ChatPageContent() {
 
     const data = await response.json().catch(() => null);
     const persistedChats = [];
-    const nextMessages = {};
+    const seenChatIds = new Set();
     agentChatIdsRef.current = new Map();
-
-    for (const conversation of data?.conversations || []) {
-      persistedChats.push({
-        id: conversation.id,
-        name: conversation.name,
-        lastActive: conversation.lastActive,
-        agentId: conversation.agentId || null,
-      });
-      nextMessages[conversation.id] = conversation.messages || [];
-      if (conversation.agentId) {
+    messageCursorsRef.current = new Map();
+    messageRequestsRef.current = new Map();
+
+    // Agent threads are listed up front so agent chats never get duplicated
+    // just because they are not on the first page of the index.
+    for (const conversation of [...(data?.conversations || []), ...(data?.agentConversations || [])]) {
+      if (seenChatIds.has(conversation.id)) continue;
+      seenChatIds.add(conversation.id);
+      persistedChats.push(toChatSummary(conversation));
+      if (conversation.agentId && !agentChatIdsRef.current.has(conversation.agentId)) {
         agentChatIdsRef.current.set(conversation.agentId, conversation.id);
       }
     }
 
     setChats(persistedChats);
-    setChatMessages(nextMessages);
+    setChatMessages({});
+    setChatsCursor(data?.nextCursor || null);
   }, []);
 
+  const loadMoreChats = useCallback(async () => {
+    if (!chatsCursor || loadingMoreChats) return;
+
+    setLoadingMoreChats(true);
+    try {
+      const response = await fetchWithAuth(
+        `${API_BASE_URL}/api/chat/conversations/?cursor=${encodeURIComponent(chatsCursor)}`,
+        { method: "GET" }
+      );
+      if (!response.ok) {
+        return;
+      }
+
+      const data = await response.json().catch(() => null);
+      setChats(prev => {
+        const knownIds = new Set(prev.map(chat => chat.id));
+        const nextChats = (data?.conversations || [])
+          .filter(conversation => !knownIds.has(conversation.id))
+          .map(toChatSummary);
+        return [...prev, ...nextChats];
+      });
+      setChatsCursor(data?.nextCursor || null);
+    } finally {
+      setLoadingMoreChats(false);
+    }
+  }, [chatsCursor, loadingMoreChats]);
+
+  const fetchMessagesPage = useCallback(async (chatId, before = null) => {
+    const query = before ? `?before=${before}` : "";
+    const response = await fetchWithAuth(`${API_BASE_URL}/api/chat/conversations/${chatId}/messages/${query}`, {
+      method: "GET",
+    });
+    if (!response.ok) {
+      throw new Error(`Failed to load messages: ${response.status}`);
+    }
+    const data = await response.json();
+    messageCursorsRef.current.set(chatId, data?.nextCursor || null);
+    return data?.messages || [];
+  }, []);
+
+  // Loads the latest page of a conversation the first time it is opened.
+  const ensureChatMessagesLoaded = useCallback((chatId) => {
+    if (!chatId || messageCursorsRef.current.has(chatId)) {
+      return Promise.resolve();
+    }
+    if (messageRequestsRef.current.has(chatId)) {
+      return messageRequestsRef.current.get(chatId);
+    }
+
+    const request = fetchMessagesPage(chatId)
+      .then((messages) => {
+        setChatMessages(prev => {
+          // Keep anything added locally while the page was in flight.
+          const localMessages = (prev[chatId] || []).filter(
+            local => !messages.some(message => message.id === local.id)
+          );
+          return {
+            ...prev,
+            [chatId]: [...messages, ...localMessages]
+          };
+        });
+        if (latestActiveChatId.current === chatId && messages.length > 0) {
+          setHasPrompt(true);
+        }
+      })
+      .catch((error) => {
+        console.error("Failed to load chat messages:", error);
+      })
+      .finally(() => {
+        messageRequestsRef.current.delete(chatId);
+      });
+
+    messageRequestsRef.current.set(chatId, request);
+    return request;
+  }, [fetchMessagesPage]);
+
+  const loadOlderMessages = useCallback(async (chatId) => {
+    const before = messageCursorsRef.current.get(chatId);
+    if (!before) return;
+
+    try {
+      const messages = await fetchMessagesPage(chatId, before);
+      setChatMessages(prev => {
+        const currentMessages = prev[chatId] || [];
+        const olderMessages = messages.filter(
+          older => !currentMessages.some(existing => existing.id === older.id)
+        );
+        return {
+          ...prev,
+          [chatId]: [...olderMessages, ...currentMessages]
+        };
+      });
+    } catch (error) {
+      console.error("Failed to load older messages:", error);
+      showToast.error("Unable to load earlier messages.");
+    }
+  }, [fetchMessagesPage]);
+
   useEffect(() => {
     // Inject custom toast styles
     const style = document.createElement('style');
@@ -370,6 +481,9 @@ function ChatPageContent() {
         ? prev
         : [newChat, ...prev]
     ));
+    if (isNew) {
+      messageCursorsRef.current.set(chatId, null);
+    }
     setChatMessages(prev => (
       prev[chatId]
         ? prev
@@ -406,6 +520,7 @@ function ChatPageContent() {
     setHasPrompt(true);
     setShowAgentDashboard(false);
 
+    messageCursorsRef.current.set(newChatId, null);
     setChatMessages(prev => ({
       ...prev,
       [newChatId]: [firstMessage]
@@ -449,6 +564,7 @@ function ChatPageContent() {
     const hasMessages = chatMessages[chatId]?.length > 0;
     setHasPrompt(hasMessages);
     setShowAgentDashboard(false);
+    ensureChatMessagesLoaded(chatId);
 
     if (pendingAIMessages.current.size > 0) {
       setChatMessages(prev => {
@@ -468,7 +584,7 @@ function ChatPageContent() {
         return newState;
       });
     }
-  }, [chatMessages, chats, contextSetSelectedAgent, allAgents]); // Added allAgents to dependencies
+  }, [chatMessages, chats, contextSetSelectedAgent, allAgents, ensureChatMessagesLoaded]); // Added allAgents to dependencies
 
   // ========== AGENT EVENT HANDLERS ==========
 
@@ -520,6 +636,7 @@ function ChatPageContent() {
         latestActiveChatId.current = agentChat.id;
         setHasPrompt((chatMessages[agentChat.id] || []).length > 0);
         setShowAgentDashboard(false);
+        ensureChatMessagesLoaded(agentChat.id);
 
         if (pendingAIMessages.current.size > 0) {
           setChatMessages(prev => {
@@ -547,7 +664,7 @@ function ChatPageContent() {
         showToast.error(error?.message || `Unable to open chat for ${agent.name}.`);
       }
     }
-  }, [agentsLocked, chatMessages, contextSetSelectedAgent, ensureCustomAgentUsesBackendId, getOrCreateAgentChat, isMobile, router]);
+  }, [agentsLocked, chatMessages, contextSetSelectedAgent, ensureChatMessagesLoaded, ensureCustomAgentUsesBackendId, getOrCreateAgentChat, isMobile, router]);
 
   const handleAgentCreated = useCallback((newAgent) => {
     console.log("Agent created in parent:", newAgent);
@@ -673,6 +790,7 @@ function ChatPageContent() {
         setHasPrompt(true);
         setShowAgentDashboard(false);
 
+        ensureChatMessagesLoaded(finalChatId);
         addMessageToChat(finalChatId, message);
         setChats(prev => prev.map(chat =>
           chat.id === finalChatId
@@ -743,6 +861,7 @@ function ChatPageContent() {
     setChatLoading,
     contextSelectedAgent,
     chats,
+    ensureChatMessagesLoaded,
     getOrCreateAgentChat,
     allAgents,
     router
@@ -819,6 +938,9 @@ function ChatPageContent() {
               onEditAgent={handleEditAgent}
               selectedAgent={contextSelectedAgent}
               onSelectAgent={handleAgentSelect}
+              hasMoreChats={!!chatsCursor}
+              loadingMoreChats={loadingMoreChats}
+              onLoadMoreChats={loadMoreChats}
             />
           </div>
 
@@ -855,6 +977,8 @@ function ChatPageContent() {
                       isLoading={activeChatId ? isChatLoading(activeChatId) : false}
                       onSetLoading={(loading) => activeChatId && setChatLoading(activeChatId, loading)}
                       selectedAgent={contextSelectedAgent}
+                      hasOlderMessages={!!(activeChatId && messageCursorsRef.current.get(activeChatId))}
+                      onLoadOlderMessages={() => activeChatId && loadOlderMessages(activeChatId)}
                       // key={activeChatId}
                     />
                   </div>
@@ -44,7 +44,10 @@ export default function UnifiedSidebar({
   onAgentsButtonClick,
   onEditAgent,
   selectedAgent: externalSelectedAgent,
-  onSelectAgent
+  onSelectAgent,
+  hasMoreChats = false,
+  loadingMoreChats = false,
+  onLoadMoreChats
 }) {
   // Get agents from context
   const {
@@ -938,6 +941,16 @@ export default function UnifiedSidebar({
                         );
                       })}
 
+                    {hasMoreChats && !searchQuery && !isLoading && (
+                      <button
+                        onClick={onLoadMoreChats}
+                        disabled={loadingMoreChats}
+                        className="w-full py-2 text-xs font-medium text-purple-600 hover:text-purple-800 disabled:text-gray-400 transition-colors"
+                      >
+                        {loadingMoreChats ? "Loading..." : "Load more chats"}
+                      </button>
+                    )}
+
                     {searchQuery && filteredChats.length === 0 && !isLoading && (
                       <div className="text-center py-4 text-gray-400">
                         <svg
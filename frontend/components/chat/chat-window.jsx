@@ -14,6 +14,7 @@ import { useNotifications } from '../../utils/useNotifications';
 import rehypeRaw from 'rehype-raw';
 import { MODEL_OPTIONS, getDefaultModelId, subscribeDefaultModel } from "../../utils/model-preferences";
 import { API_URL, fetchWithAuth, getAccessToken } from "../../utils/auth";
+import { MAX_STREAM_RECONNECTS, listenToStream } from "../../utils/sse";
 import { useAuth } from "../auth/auth-context";
 import {
   canUseAgentForPrompt,
@@ -25,6 +26,9 @@ import {
   TOKEN_LIMIT_REACHED_MESSAGE,
 } from "../../utils/plan-access";
 
+const INGESTION_POLL_MS = 1000;
+const INGESTION_WAIT_MS = 120000;
+
 export default function ChatWindow({
   chatId,
   messages: propMessages = [],
@@ -32,7 +36,9 @@ export default function ChatWindow({
   hasActiveChat,
   isLoading,
   onSetLoading,
-  selectedAgent = null
+  selectedAgent = null,
+  hasOlderMessages = false,
+  onLoadOlderMessages
 }) {
   const router = useRouter();
   const { user, loading: userLoading, refreshBilling } = useAuth();
@@ -92,6 +98,7 @@ export default function ChatWindow({
   const prevChatIdRef = useRef(chatId);
   const currentAssistantIdRef = useRef(null);
   const draftManualRef = useRef(false);
+  const ingestionAbortRef = useRef(null);
 
   // ─────────────────────────────────────────────────────────────
   // Built-in domain agents now send chat_id only.
@@ -143,11 +150,11 @@ export default function ChatWindow({
       : buildCricketUrl('stop', chatIdToStop);
 
     const es = new EventSource(url);
-    es.onmessage = (event) => {
-      if (event.data === '[DONE]' || event.data.includes('stopped')) {
+    listenToStream(es, (type) => {
+      if (type === 'done' || type === 'error') {
         es.close();
       }
-    };
+    });
     es.onerror = () => es.close();
     setTimeout(() => es.close(), 5000);
   }, [buildCricketUrl, buildPoliticsUrl]);
@@ -300,7 +307,7 @@ export default function ChatWindow({
         // Don't close the EventSource — makeAPIRequest already handles
         // background mode (isActiveChat = false) and accumulates text
         // into state.assistantMessage without touching the UI.
-        // The stream will self-terminate on [DONE] or [ERROR].
+        // The stream will self-terminate on its done or error event.
         console.log("🔄 Normal stream switching to background for:", prevChatId);
 
         // Flush the current buffer into assistantMessage so background
@@ -354,7 +361,7 @@ export default function ChatWindow({
         }
         chatStatesRef.current.delete(currentChatId);
       }
-      // For non-live streams: don't close — let [DONE] terminate them naturally.
+      // For non-live streams: don't close — let the done event terminate them naturally.
     };
   }, []); // Empty deps — only runs on mount/unmount
 
@@ -615,6 +622,9 @@ export default function ChatWindow({
     }
   }, [input, isInputExpanded]);
 
+  // Stop polling ingestion jobs when the window goes away.
+  useEffect(() => () => ingestionAbortRef.current?.abort(), []);
+
   useEffect(() => {
     const handleClickOutside = (event) => {
       if (modelDialogRef.current && !modelDialogRef.current.contains(event.target)) setShowModelDialog(false);
@@ -634,9 +644,63 @@ export default function ChatWindow({
 
   const showWelcomeScreen = !hasActiveChat || messages.length === 0;
 
+  // Uploads return at once; the PDFs are processed by the ingestion worker,
+  // so poll until every job has finished before the question is sent. After
+  // INGESTION_WAIT_MS the question goes out without the unfinished documents.
+  const waitForIngestionJobs = async (jobs, signal) => {
+    let pending = jobs.filter(job => !["completed", "failed"].includes(job.status));
+    const failed = jobs.filter(job => job.status === "failed");
+    const deadline = Date.now() + INGESTION_WAIT_MS;
+
+    while (pending.length > 0) {
+      if (Date.now() >= deadline) {
+        setStatusMsg(`${pending.map(job => job.fileName).join(", ")} is taking too long to process, sending without it.`);
+        return;
+      }
+      await new Promise((resolve, reject) => {
+        const timer = setTimeout(resolve, INGESTION_POLL_MS);
+        signal?.addEventListener("abort", () => {
+          clearTimeout(timer);
+          reject(new DOMException("Aborted", "AbortError"));
+        }, { once: true });
+      });
+      const ids = pending.map(job => job.id).join(",");
+      const res = await fetchWithAuth(`http://127.0.0.1:8000/api/chat/upload-document/jobs/?ids=${ids}`, {
+        method: "GET",
+        signal,
+      });
+      if (!res.ok) throw new Error(`Status check failed: ${res.status}`);
+      const data = await res.json();
+      const latest = data?.jobs || [];
+
+      failed.push(...latest.filter(job => job.status === "failed"));
+      pending = latest.filter(job => !["completed", "failed"].includes(job.status));
+
+      if (pending.length > 0) {
+        const progress = pending
+          .map(job => job.chunksTotal
+            ? `${job.fileName} ${Math.round((job.chunksStored / job.chunksTotal) * 100)}%`
+            : `${job.fileName} (${job.status})`)
+          .join(", ");
+        setStatusMsg(`Processing ${progress}`);
+      }
+    }
+
+    if (failed.length > 0) {
+      setStatusMsg(`Could not process ${failed.map(job => job.fileName).join(", ")}, continuing without it.`);
+    } else {
+      setStatusMsg("");
+    }
+  };
+
+  // Returns false when the wait was aborted and the message should not be sent.
   const uploadFilesIfAny = async (chatId) => {
-    if (attachedFiles.length === 0) return;
+    if (attachedFiles.length === 0) return true;
+    ingestionAbortRef.current?.abort();
+    const controller = new AbortController();
+    ingestionAbortRef.current = controller;
     try {
+      const jobs = [];
       for (const file of attachedFiles) {
         const formData = new FormData();
         formData.append("file", file);
@@ -646,11 +710,18 @@ export default function ChatWindow({
           body: formData,
         });
         if (!res.ok) throw new Error(`Upload failed: ${res.status}`);
+        const data = await res.json().catch(() => null);
+        jobs.push(...(data?.jobs || []));
       }
+      await waitForIngestionJobs(jobs, controller.signal);
     } catch (err) {
+      if (err?.name === "AbortError") return false;
       console.error("❌ File upload error:", err);
       setStatusMsg("File upload failed, continuing without document.");
+    } finally {
+      if (ingestionAbortRef.current === controller) ingestionAbortRef.current = null;
     }
+    return true;
   };
 
   const generateUniqueId = () => `${Date.now()}-${Math.random().toString(36).substring(2, 9)}`;
@@ -684,9 +755,8 @@ export default function ChatWindow({
   const es = new EventSource(url);
   let fullStopMessage = "";
 
-  es.onmessage = (event) => {
-    const data = event.data;
-    if (data === '[DONE]') {
+  listenToStream(es, (type, payload) => {
+    if (type === 'done') {
       es.close();
       if (onSetLoading) onSetLoading(false);
       setIsLiveUpdatesActive(false);
@@ -695,20 +765,20 @@ export default function ChatWindow({
       if (state) state.hasLiveUpdates = false;
       return;
     }
-    if (data.startsWith("[ERROR]")) {
+    if (type === 'error') {
       es.close();
       if (onSetLoading) onSetLoading(false);
       setIsStoppingUpdates(false);
       return;
     }
-    const processed = data.replace(/\\n/g, '\n');
-    fullStopMessage += processed + " ";
+    if (type !== 'token') return;
+    fullStopMessage += payload.text || "";
     setMessages(prev => {
       const existing = prev.find(m => m.id === stopResponseId);
       if (existing) return prev.map(m => m.id === stopResponseId ? { ...m, text: fullStopMessage } : m);
       return [...prev, { id: stopResponseId, role: "assistant", text: fullStopMessage }];
     });
-  };
+  });
 
   es.onerror = () => {
     es.close();
@@ -781,7 +851,7 @@ export default function ChatWindow({
       setAttachedFiles([]);
       setStatusMsg("");
 
-      if (currentFiles.length > 0) await uploadFilesIfAny(currentChatId);
+      if (currentFiles.length > 0 && !(await uploadFilesIfAny(currentChatId))) return;
 
         const apiText = hasText ? rawInput : "[User sent files]";
         const shouldRefreshBillingAfterResponse = Boolean(
@@ -846,43 +916,77 @@ export default function ChatWindow({
       detectedStart: false,
       detectedStop: false,
       lastNotifBlockText: null,
+      lastEventId: "",
+      reconnects: 0,
     });
 
-    let inactivityTimeout = setTimeout(() => {
-      console.log("⏰ Stream inactivity timeout:", targetChatId);
-      flushChatStateToParent(targetChatId);
-      es.close();
-      activeStreamsRef.current.delete(targetChatId);
-      chatStatesRef.current.delete(targetChatId);
-      if (targetChatId === latestChatIdRef.current) onSetLoading?.(false);
-    }, 180000);
-
-    es.onmessage = (event) => {
-      const data = event.data;
-      const state = chatStatesRef.current.get(targetChatId);
-      if (!state) return;
-
+    // Live streams only send when there is news, so they are not timed out.
+    let inactivityTimeout = null;
+    const armInactivityTimeout = () => {
       clearTimeout(inactivityTimeout);
       inactivityTimeout = setTimeout(() => {
+        if (chatStatesRef.current.get(targetChatId)?.hasLiveUpdates) {
+          armInactivityTimeout();
+          return;
+        }
+        console.log("⏰ Stream inactivity timeout:", targetChatId);
         flushChatStateToParent(targetChatId);
         es.close();
         activeStreamsRef.current.delete(targetChatId);
         chatStatesRef.current.delete(targetChatId);
         if (targetChatId === latestChatIdRef.current) onSetLoading?.(false);
       }, 180000);
+    };
+    armInactivityTimeout();
+
+    listenToStream(es, (type, payload, event) => {
+      const state = chatStatesRef.current.get(targetChatId);
+      if (!state) return;
+
+      armInactivityTimeout();
+      if (event.lastEventId) state.lastEventId = event.lastEventId;
+      state.reconnects = 0;
 
       const isActiveChat = targetChatId === latestChatIdRef.current;
 
-      if (data.startsWith('[TITLE]')) {
-        onNewMessage?.({ id: `title-${Date.now()}`, role: "system", title: data.replace('[TITLE]', ''), chatId: targetChatId });
+      if (type === 'title') {
+        onNewMessage?.({ id: `title-${Date.now()}`, role: "system", title: payload.title || "", chatId: targetChatId });
         return;
       }
 
-      if (data === '[DONE]') {
+      if (type === 'live') {
+        if (payload.active && !state.detectedStart) {
+          console.log("🔴 Live updates started - activating Stop button");
+          setIsLiveUpdatesActive(true);
+          state.hasLiveUpdates = true;
+          state.liveUpdateAgent = selectedAgent ? { id: selectedAgent.id, isBuiltIn: selectedAgent.isBuiltIn } : null;
+          state.liveUpdateModel = selectedModel;
+          state.detectedStart = true;
+        } else if (!payload.active && !state.detectedStop) {
+          console.log("🛑 Live updates ended - deactivating Stop button");
+          setIsLiveUpdatesActive(false);
+          state.hasLiveUpdates = false;
+          state.detectedStop = true;
+        }
+        return;
+      }
+
+      if (type === 'email_draft') {
+        if (state.assistantMessage && payload.draft) {
+          state.assistantMessage.emailDraft = payload.draft;
+        }
+        return;
+      }
+
+      if (type === 'done') {
         console.log("✅ Stream completed:", targetChatId);
         clearTimeout(inactivityTimeout);
         es.close();
         activeStreamsRef.current.delete(targetChatId);
+        if (state.hasLiveUpdates) {
+          setIsLiveUpdatesActive(false);
+          state.hasLiveUpdates = false;
+        }
 
         if (state.buffer && state.assistantMessage) {
           state.assistantRawText += state.buffer;
@@ -923,8 +1027,8 @@ export default function ChatWindow({
         return;
       }
 
-      if (data.startsWith('[IMAGE]')) {
-        state.imageUrl = data.replace('[IMAGE]', '');
+      if (type === 'image') {
+        state.imageUrl = payload.url || null;
         state.hasImage = true;
         if (state.assistantMessage) {
           state.assistantMessage.image = state.imageUrl;
@@ -937,15 +1041,15 @@ export default function ChatWindow({
         return;
       }
 
-      if (data.startsWith("[ERROR]")) {
-        const errorMessage = data.replace("[ERROR]", "");
-        console.error("❌ Stream error:", data);
+      if (type === 'error') {
+        const errorMessage = payload.message || "";
+        console.error("❌ Stream error:", errorMessage);
         clearTimeout(inactivityTimeout);
         flushChatStateToParent(targetChatId);
         es.close();
         activeStreamsRef.current.delete(targetChatId);
         chatStatesRef.current.delete(targetChatId);
-        if (errorMessage === TOKEN_LIMIT_REACHED_MESSAGE) {
+        if (payload.token_limit_reached || errorMessage === TOKEN_LIMIT_REACHED_MESSAGE) {
           toast.info(errorMessage);
           refreshBilling();
         } else if (errorMessage.toLowerCase().includes("upgrade to pro")) {
@@ -958,48 +1062,40 @@ export default function ChatWindow({
         return;
       }
 
-      const processed = data.replace(/\\n/g, '\n');
-      state.buffer += ' ' + processed;
-
-      // Live updates detection
-      // ── Live Updates Detection (Cricket + Politics) ──
-      const fullSoFar = (state.assistantMessage?.text || '') + state.buffer;
-      const normalizedFull = fullSoFar.replace(/\s+/g, ' ').trim().toLowerCase();
-
-      if (!state.detectedStart) {
-        // Cricket
-        if (normalizedFull.includes("starting live updates for") || normalizedFull.includes("--- 🔴 live update")) {
-          console.log("🔴 Cricket live updates detected - activating Stop button");
-          setIsLiveUpdatesActive(true);
-          state.hasLiveUpdates = true;
-          state.liveUpdateAgent = selectedAgent ? { id: selectedAgent.id, isBuiltIn: selectedAgent.isBuiltIn } : null;
-          state.liveUpdateModel = selectedModel;
-          state.detectedStart = true;
-        }
-
-        // Politics
-        if (normalizedFull.includes("starting live politics news") || 
-            normalizedFull.includes("latest politics update") || 
-            normalizedFull.includes("politics news updates for") ||
-            normalizedFull.includes("live politics news updates")) {
-          console.log("📰 Politics live news detected - activating Stop button");
-          setIsLiveUpdatesActive(true);
-          state.hasLiveUpdates = true;
-          state.liveUpdateAgent = selectedAgent ? { id: selectedAgent.id, isBuiltIn: selectedAgent.isBuiltIn } : null;
-          state.liveUpdateModel = selectedModel;
-          state.detectedStart = true;
+      // A resumed stream sends the persisted message in place of the
+      // tokens that were lost: it replaces what was rendered so far.
+      if (type === 'snapshot') {
+        state.buffer = "";
+        state.assistantRawText = payload.text || "";
+        state.receivedFirstMessage = true;
+        const existing = state.assistantMessage || messages.find(m => m.id === assistantId);
+        const parsed = extractEmailDraft(state.assistantRawText, existing?.emailDraft);
+        state.assistantMessage = {
+          id: assistantId,
+          role: "assistant",
+          emailDraftDismissed: false,
+          emailSent: false,
+          ...existing,
+          text: parsed.displayText,
+          emailDraft: parsed.emailDraft ?? existing?.emailDraft,
+          emailDraftReady: false,
+        };
+        state.lastNotifiedTextLength = state.assistantMessage.text.length;
+        if (isActiveChat) {
+          setMessages(prev => (
+            prev.some(m => m.id === assistantId)
+              ? prev.map(m => m.id === assistantId ? state.assistantMessage : m)
+              : [...prev, state.assistantMessage]
+          ));
+          onSetLoading?.(false);
         }
+        onNewMessage?.({ ...state.assistantMessage, chatId: targetChatId });
+        return;
       }
 
-      if (!state.detectedStop) {
-        if (normalizedFull.includes("live updates stopped") || 
-            normalizedFull.includes("politics news updates stopped")) {
-          console.log("🛑 Stop detected - deactivating Stop button");
-          setIsLiveUpdatesActive(false);
-          state.hasLiveUpdates = false;
-          state.detectedStop = true;
-        }
-      }
+      if (type !== 'token') return;
+      const processed = payload.text || "";
+      state.buffer += processed;
 
       const now = Date.now();
 
@@ -1119,9 +1215,18 @@ export default function ChatWindow({
           );
         }
       }
-    };
+    });
 
     es.onerror = (err) => {
+      // A dropped connection is retried by the browser with Last-Event-ID,
+      // and the server answers with the persisted message. Without an event
+      // id the retry would send the prompt again, so that case is closed.
+      const state = chatStatesRef.current.get(targetChatId);
+      if (es.readyState === EventSource.CONNECTING && state?.lastEventId && state.reconnects < MAX_STREAM_RECONNECTS) {
+        state.reconnects += 1;
+        console.warn("🔌 SSE connection lost, reconnecting:", targetChatId, err);
+        return;
+      }
       console.error("🔌 SSE error:", targetChatId, err);
       clearTimeout(inactivityTimeout);
       flushChatStateToParent(targetChatId);
@@ -1229,6 +1334,16 @@ return (
         ) : (
           // Chat messages
           <div className="space-y-3 max-w-3xl mx-auto pt-2">
+            {hasOlderMessages && (
+              <div className="flex justify-center">
+                <button
+                  onClick={onLoadOlderMessages}
+                  className="px-3 py-1.5 text-xs font-medium text-purple-600 hover:text-purple-800 transition-colors"
+                >
+                  Load earlier messages
+                </button>
+              </div>
+            )}
             {messages.map((m) => (
               <div key={m.id}>
                 <div className={`flex ${m.role === "user" ? "justify-end" : "justify-start"}`}>
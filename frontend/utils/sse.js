@@ -0,0 +1,29 @@
+"use client";
+
+// Typed events sent by the backend streams (backend/accounts/api/sse.py).
+// Every event carries a JSON payload:
+//   token {text} · title {title} · image {url} · email_draft {draft}
+//   live {active} · snapshot {text, status} · error {message} · done {}
+export const STREAM_EVENTS = ["token", "title", "image", "email_draft", "live", "snapshot", "error", "done"];
+
+// Reconnects allowed after a dropped connection before a stream is given up.
+// The browser resends the last event id; the server answers with a snapshot.
+export const MAX_STREAM_RECONNECTS = 3;
+
+// Calls onEvent(type, payload, event) for every typed event on `eventSource`.
+// Connection failures also fire "error" on an EventSource, but without data;
+// those are left to eventSource.onerror.
+export const listenToStream = (eventSource, onEvent) => {
+  STREAM_EVENTS.forEach((type) => {
+    eventSource.addEventListener(type, (event) => {
+      if (typeof event.data !== "string") return;
+      let payload;
+      try {
+        payload = JSON.parse(event.data || "{}");
+      } catch {
+        return;
+      }
+      onEvent(type, payload, event);
+    });
+  });
+};